@@ -0,0 +1,72 @@
+"""
+Cost of the static pre-execution analysis per program.
+
+Reports the time of a first (uncached) analysis and of a cached lookup for a
+few typical generated programs, next to the time to compile them. No LLM or
+tools are involved.
+
+Usage:
+    uv run python src/bench/python/bench_analysis.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'main', 'python'))
+
+from program_analysis import analyze_program  # noqa: E402
+from program_cache import compile_program  # noqa: E402
+
+PROGRAMS = {
+    'constant return': "def answer_user_question(question):\n    return 'Jakarta'",
+    'three tool calls': (
+        "def answer_user_question(question):\n"
+        "    county, state = get_user_location()\n"
+        "    weather = get_local_weather(*get_geo_from_county(county, state))\n"
+        "    return call_llm(f'{weather.temperature_fahrenheit:.0f}F in {county}: {question}')"
+    ),
+    'loop over cities': (
+        "def answer_user_question(question):\n"
+        "    cities = [('King County', 'Washington'), ('Cook County', 'Illinois')]\n"
+        "    temperatures = []\n"
+        "    for county, state in cities:\n"
+        "        weather = get_local_weather(*get_geo_from_county(county, state))\n"
+        "        temperatures.append(weather.temperature_fahrenheit)\n"
+        "    return f'{max(temperatures):.0f}F'"
+    ),
+}
+
+
+def median_us(samples: list[float]) -> float:
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'program':<18} {'compile us':>11} {'analyze us':>11} {'cached us':>10}")
+    for name, source in PROGRAMS.items():
+        compile_times, cold_times, cached_times = [], [], []
+        for run in range(args.runs):
+            # A unique trailing comment gives every run its own code object, so nothing is cached
+            unique = f"{source}\n# {run}\nx = {run}"
+            start = time.perf_counter()
+            code = compile_program(unique)
+            compiled = time.perf_counter()
+            analyze_program(unique, code)
+            analyzed = time.perf_counter()
+            analyze_program(unique, code)
+            cached = time.perf_counter()
+            compile_times.append(compiled - start)
+            cold_times.append(analyzed - compiled)
+            cached_times.append(cached - analyzed)
+        print(f"{name:<18} {median_us(compile_times):>11.1f} {median_us(cold_times):>11.1f} "
+              f"{median_us(cached_times):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
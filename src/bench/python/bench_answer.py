@@ -0,0 +1,106 @@
+"""
+Latency and throughput benchmark for App.answer against the replay fake LLM.
+
+Replays the recorded Bedrock fixtures with synthetic latency, so the numbers
+measure the framework's own overhead plus the configured model latency. For
+each concurrency level it reports p50/p95/p99 latency and questions/sec; a
+separate sequential pass reports the peak Python memory allocated per request.
+With --coalesce, concurrent identical questions share one generation (see
+coalescing) and the Bedrock calls saved are reported.
+
+Usage:
+    uv run python src/bench/python/bench_answer.py [--requests N] [--latency S]
+        [--concurrency 1 4 16 64] [--coalesce]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', '..', 'main', 'python'))
+
+from app import App  # noqa: E402
+from coalescing import RequestCoalescer  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+FIXTURES_PATH = os.path.join(BENCH_DIR, '..', '..', 'test', 'resources', 'bedrock_responses.json')
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Return the given percentile of samples (nearest-rank)."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def fixture_questions() -> list[str]:
+    with open(FIXTURES_PATH, 'r', encoding='utf-8') as f:
+        return list(json.load(f)['programs'])
+
+
+def run_load(app: App, questions: list[str], requests: int, concurrency: int) -> tuple[list[float], float]:
+    """Answer `requests` questions at the given concurrency; return per-request latencies (s) and wall time."""
+    def timed_answer(question: str) -> float:
+        start = time.perf_counter()
+        app.answer(question)
+        return time.perf_counter() - start
+
+    workload = [questions[i % len(questions)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed_answer, workload))
+    return latencies, time.perf_counter() - start
+
+
+def memory_per_request(app: App, questions: list[str], requests: int) -> float:
+    """Return the mean peak traced allocation per sequential request, in KiB."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(requests):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            app.answer(questions[i % len(questions)])
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help="synthetic seconds per LLM call")
+    parser.add_argument('--seconds-per-token', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--coalesce', action='store_true', help="share generations of identical in-flight questions")
+    args = parser.parse_args()
+
+    questions = fixture_questions()
+    app = App(coalescer=RequestCoalescer() if args.coalesce else None)
+    app.llm = FakeLLM.from_fixtures(FIXTURES_PATH, latency=args.latency, seconds_per_token=args.seconds_per_token)
+
+    print(f"{'concurrency':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'q/s':>9}")
+    # The pipeline prints every generated program; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [(concurrency, *run_load(app, questions, args.requests, concurrency))
+                   for concurrency in args.concurrency]
+        memory = memory_per_request(app, questions, min(args.requests, 50))
+    for concurrency, latencies, wall in results:
+        print(f"{concurrency:>11} {percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 95) * 1000:>9.1f} "
+              f"{percentile(latencies, 99) * 1000:>9.1f} {len(latencies) / wall:>9.1f}")
+    print(f"peak memory per request: {memory:.1f} KiB")
+    print(f"Bedrock calls: {app.llm.calls}")
+    if app.coalescer is not None:
+        print(f"Bedrock calls saved by coalescing: {app.coalescer.stats()['saved_calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cost of extracting programs from LLM output, old cleaner vs execution.clean_llm_output.
+
+The old cleaner (two regex substitutions, then splitting and rebuilding the
+output line by line) is kept here as the baseline. Outputs range from a typical
+fenced program to large generated programs, multi-block responses with prose
+and unfenced text. Also reports the cost of calling answer_user_question
+through execution.call_entry_point on a compiled program.
+
+Usage:
+    uv run python src/bench/python/bench_clean.py [--runs N] [--lines N]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'main', 'python'))
+
+from execution import call_entry_point, clean_llm_output  # noqa: E402
+from program_cache import compile_program  # noqa: E402
+
+PROGRAM = (
+    "def answer_user_question(question: str) -> str:\n"
+    "    county, state = get_user_location()\n"
+    "    return f'You are in {state}.'\n"
+)
+
+
+def old_clean_llm_output(llm_output: str) -> str:
+    code = re.sub(r'```python\n?', '', llm_output)
+    code = re.sub(r'```\n?', '', code)
+    lines = code.split('\n')
+    cleaned_lines = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.lower() in ['python', 'python3', '>>> python', '$ python']:
+            continue
+        cleaned_lines.append(line)
+    return '\n'.join(cleaned_lines)
+
+
+def outputs(lines: int) -> dict[str, str]:
+    body = ''.join(f"    value_{i} = {i} * 2  # step {i}\n" for i in range(lines))
+    large = f"def answer_user_question(question):\n{body}    return 'done'\n"
+    return {
+        'typical fenced': f"```python\n{PROGRAM}```",
+        f'{lines} lines fenced': f"```python\n{large}```",
+        f'{lines} lines unfenced': large,
+        '20 blocks with prose': ''.join(f"Step {i} explained in a sentence.\n```python\n{PROGRAM}```\n"
+                                        for i in range(20)),
+    }
+
+
+def median_us(function, argument, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(argument)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=500)
+    parser.add_argument('--lines', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'output':<22} {'old us':>10} {'new us':>10} {'speedup':>8}")
+    for name, output in outputs(args.lines).items():
+        old = median_us(old_clean_llm_output, output, args.runs)
+        new = median_us(clean_llm_output, output, args.runs)
+        print(f"{name:<22} {old:>10.1f} {new:>10.1f} {old / new:>7.1f}x")
+
+    code = compile_program(PROGRAM)
+    namespace = {'get_user_location': lambda: ('King County', 'Washington')}
+    call = median_us(lambda question: call_entry_point(code, dict(namespace), question), "where am I?", args.runs)
+    print(f"call_entry_point on a compiled program: {call:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
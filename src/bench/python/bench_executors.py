@@ -0,0 +1,70 @@
+"""
+Per-execution overhead of the generated-code executor backends.
+
+Runs the same compiled programs through each backend and reports the mean and
+p95 time per execution. No LLM is involved: programs are compiled once up front.
+
+Usage:
+    uv run python src/bench/python/bench_executors.py [--runs N] [--workers N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'main', 'python'))
+
+from app import App  # noqa: E402
+from executors import InProcessExecutor, ProcessPoolCodeExecutor  # noqa: E402
+
+PROGRAMS = {
+    'constant return': "def answer_user_question(question):\n    return 'Jakarta'",
+    'three tool calls': (
+        "def answer_user_question(question):\n"
+        "    county, state = get_user_location()\n"
+        "    weather = get_local_weather(*get_geo_from_county(county, state))\n"
+        "    return f'{weather.temperature_fahrenheit:.0f}°F'"
+    ),
+}
+
+
+def time_backend(executor, runs: int) -> dict[str, list[float]]:
+    """Return per-program execution times in microseconds."""
+    app = App(executor=executor)
+    timings = {}
+    for name, source in PROGRAMS.items():
+        code = app.compile_llm_code(source)
+        app.run_compiled_code(code, "warm-up")
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            app.run_compiled_code(code, "question")
+            samples.append((time.perf_counter() - start) * 1e6)
+        timings[name] = samples
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    backends = {
+        'in-process': InProcessExecutor(),
+        'process pool': ProcessPoolCodeExecutor(size=args.workers),
+    }
+    print(f"{'backend':<14} {'program':<18} {'mean us':>10} {'p95 us':>10}")
+    try:
+        for backend_name, executor in backends.items():
+            for program, samples in time_backend(executor, args.runs).items():
+                p95 = statistics.quantiles(samples, n=20)[-1]
+                print(f"{backend_name:<14} {program:<18} {statistics.mean(samples):>10.1f} {p95:>10.1f}")
+    finally:
+        for executor in backends.values():
+            executor.close()
+
+
+if __name__ == "__main__":
+    main()
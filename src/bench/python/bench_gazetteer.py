@@ -0,0 +1,91 @@
+"""
+Cold load time and lookup latency of the county gazetteer.
+
+Loads the bundled table, and a synthetic table with --counties records (the
+size of the full Census county file), comparing memory-mapping the binary
+table with parsing the TSV. Then times exact and fuzzy name lookups and
+nearest-county reverse geocoding, against a brute-force scan of every record.
+
+Usage:
+    uv run python src/bench/python/bench_gazetteer.py [--counties N] [--lookups N]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'main', 'python'))
+
+from tools.gazetteer import DEFAULT_SOURCE, DEFAULT_TABLE, Gazetteer, STATES, haversine_km  # noqa: E402
+
+
+def synthetic_tables(count: int, directory: str) -> tuple[str, str]:
+    """Write a TSV and binary table of count random US-range counties; return their paths."""
+    generator = random.Random(0)
+    codes = sorted(STATES)
+    rows = [(generator.choice(codes), f"Synthetic {index} County",
+             round(generator.uniform(25.0, 49.0), 4), round(generator.uniform(-125.0, -66.0), 4))
+            for index in range(count)]
+    source = os.path.join(directory, 'counties.tsv')
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write("USPS\tNAME\tINTPTLAT\tINTPTLONG\n")
+        f.writelines(f"{code}\t{name}\t{latitude}\t{longitude}\n" for code, name, latitude, longitude in rows)
+    table = os.path.join(directory, 'counties.bin')
+    Gazetteer.from_tsv(source).write(table)
+    return source, table
+
+
+def median_us(function, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def brute_force_nearest(gazetteer: Gazetteer, latitude: float, longitude: float) -> int:
+    return min(range(len(gazetteer)), key=lambda index: haversine_km(
+        latitude, longitude, gazetteer.latitudes[index], gazetteer.longitudes[index]))
+
+
+def report(label: str, source: str, table: str, lookups: int) -> None:
+    print(f"\n{label}")
+    print(f"  {'cold load (mmap binary)':<34} {median_us(lambda: Gazetteer.load(table), 20):>10.0f} us")
+    print(f"  {'cold load (parse TSV)':<34} {median_us(lambda: Gazetteer.from_tsv(source), 20):>10.0f} us")
+
+    gazetteer = Gazetteer.load(table)
+    generator = random.Random(1)
+    indexes = [generator.randrange(len(gazetteer)) for _ in range(lookups)]
+    exact = [(gazetteer.names[index][0], gazetteer.record(index)[1]) for index in indexes]
+    fuzzy = [(county.replace(" County", "").lower() + "x", state) for county, state in exact]
+    points = [(generator.uniform(25.0, 49.0), generator.uniform(-125.0, -66.0)) for _ in range(lookups)]
+    gazetteer.nearest(*points[0])  # builds the grid
+    timings = {
+        'exact name lookup': lambda: [gazetteer.find(county, state) for county, state in exact],
+        'fuzzy name lookup': lambda: [gazetteer.find(county, state) for county, state in fuzzy],
+        'nearest county (grid)': lambda: [gazetteer.nearest(*point) for point in points],
+        'nearest county (brute force)': lambda: [brute_force_nearest(gazetteer, *point) for point in points[:50]],
+    }
+    for name, function in timings.items():
+        count = 50 if 'brute' in name else lookups
+        print(f"  {name:<34} {median_us(function, 3) / count:>10.1f} us/lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--counties', type=int, default=3143)
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    report(f"bundled table ({len(Gazetteer.load(DEFAULT_TABLE))} counties)", DEFAULT_SOURCE, DEFAULT_TABLE, args.lookups)
+    with tempfile.TemporaryDirectory() as directory:
+        source, table = synthetic_tables(args.counties, directory)
+        report(f"synthetic table ({args.counties} counties)", source, table, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
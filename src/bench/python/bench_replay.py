@@ -0,0 +1,73 @@
+"""
+Replay throughput of recorded traffic, and the size of the trace store.
+
+Answers the recorded Bedrock fixture questions with an App writing to a
+TraceStore (or reads an existing store with --traces), then replays every
+record through execution.execute_llm_code against its recorded tool results:
+no model calls and no tool latency, so the time measured is cleaning,
+compiling and running the programs. Reports records replayed per second, the
+mean cost per record, how many answers matched and the bytes stored per record.
+
+Usage:
+    uv run python src/bench/python/bench_replay.py [--requests N] [--runs N] [--traces DIR]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', '..', 'main', 'python'))
+
+from app import App  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+from trace_store import TraceStore, replay  # noqa: E402
+
+FIXTURES_PATH = os.path.join(BENCH_DIR, '..', '..', 'test', 'resources', 'bedrock_responses.json')
+
+
+def record_fixture_traffic(store: TraceStore, requests: int) -> None:
+    """Answer the fixture questions round-robin, appending every answer to store."""
+    with open(FIXTURES_PATH) as f:
+        questions = list(json.load(f)['programs'])
+    app = App(trace_store=store)
+    app.llm = FakeLLM.from_fixtures(FIXTURES_PATH)
+    for i in range(requests):
+        app.answer(questions[i % len(questions)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200, help="answers to record when --traces is not given")
+    parser.add_argument('--runs', type=int, default=5, help="replays of the whole store")
+    parser.add_argument('--traces', help="replay an existing trace store directory instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TraceStore(args.traces or directory)
+        # The pipeline prints every generated program; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            if args.traces is None:
+                record_fixture_traffic(store, args.requests)
+            store.close()
+            records = list(store.records())
+            replay(records)  # warm-up: imports the tool modules
+            reports = [replay(records) for _ in range(args.runs)]
+        stats = store.stats()
+
+    best = min(reports, key=lambda report: report.seconds)
+    print(f"records: {len(records)}  segments: {stats['segments']}  "
+          f"bytes/record: {stats['bytes'] / max(len(records), 1):.0f}")
+    print(f"replayed: {best.replayed}  matched: {best.matched}  changed: {len(best.changed)}  "
+          f"skipped: {best.skipped}")
+    print(f"best of {args.runs}: {best.replayed / best.seconds:,.0f} records/s, "
+          f"{best.stats()['mean_us']:.1f} us/record")
+    for question, recorded, replayed in best.changed[:5]:
+        print(f"  changed: {question!r}: {recorded!r} -> {replayed!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Tokens, tool calls and latency per turn of a conversation, stateless vs session.
+
+Replays the recorded Bedrock fixtures for a conversation of follow-up
+questions twice: once with independent App.answer calls and once through a
+Session, which sends earlier turns and tool results with each question and
+answers repeated tool calls from the session. For every turn it reports the
+input tokens sent (and how many were not prompt-cache reads), the tools that
+actually ran and the latency.
+
+Usage:
+    uv run python src/bench/python/bench_session.py [--latency S] [--token-budget N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', '..', 'main', 'python'))
+
+from app import App  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+from session import Session  # noqa: E402
+from tracing import InMemoryExporter, Tracer  # noqa: E402
+
+FIXTURES_PATH = os.path.join(BENCH_DIR, '..', '..', 'test', 'resources', 'bedrock_responses.json')
+CONVERSATION = [
+    'what state am I in?',
+    'where am I located?',
+    'what is the temperature outside?',
+    'is it going to rain today?',
+    'what should I wear today?',
+]
+
+
+def run_conversation(args, use_session: bool) -> list[tuple[int, int, int, float]]:
+    """Return (input tokens, uncached input tokens, tools run, seconds) per turn."""
+    exporter = InMemoryExporter()
+    app = App(tracer=Tracer([exporter]))
+    app.llm = FakeLLM.from_fixtures(FIXTURES_PATH, latency=args.latency, seconds_per_token=args.seconds_per_token)
+    session = Session(app, token_budget=args.token_budget) if use_session else None
+    turns = []
+    for question in CONVERSATION:
+        usage_before = app.usage.stats()
+        tools_before = sum(1 for span in exporter.spans if span.name.startswith('tool.'))
+        reused_before = session.stats()['reused_tool_results'] if session is not None else 0
+        start = time.perf_counter()
+        if session is not None:
+            session.answer(question)
+        else:
+            app.answer(question)
+        seconds = time.perf_counter() - start
+        usage = app.usage.stats()
+        input_tokens = usage['input_tokens'] - usage_before['input_tokens']
+        uncached = input_tokens - (usage['cache_read_tokens'] - usage_before['cache_read_tokens'])
+        # Tool spans include calls answered from the session; only count tools that ran
+        tools = sum(1 for span in exporter.spans if span.name.startswith('tool.')) - tools_before
+        if session is not None:
+            tools -= session.stats()['reused_tool_results'] - reused_before
+        turns.append((input_tokens, uncached, tools, seconds))
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--latency', type=float, default=0.05, help="synthetic seconds per LLM call")
+    parser.add_argument('--seconds-per-token', type=float, default=0.0)
+    parser.add_argument('--token-budget', type=int, default=1000, help="session context token budget")
+    args = parser.parse_args()
+
+    # The pipeline prints every generated program; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Import the tools and build the prompt once so neither run pays for startup
+        run_conversation(args, use_session=False)
+        stateless = run_conversation(args, use_session=False)
+        session = run_conversation(args, use_session=True)
+
+    columns = ('tokens', 'uncached', 'tools run', 'ms')
+    print(f"{'turn':<34}" + ''.join(f"{column:>16}" for column in columns))
+    print(f"{'':<34}" + f"{'app':>8}{'session':>8}" * len(columns))
+    totals = [tuple(sum(column) for column in zip(*turns)) for turns in (stateless, session)]
+    for question, before, after in [*zip(CONVERSATION, stateless, session), ('total', *totals)]:
+        cells = [f"{before[i]:>8}{after[i]:>8}" for i in range(3)]
+        cells.append(f"{before[3] * 1000:>8.1f}{after[3] * 1000:>8.1f}")
+        print(f"{question:<34}" + ''.join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Startup-time benchmark for the CLI.
+
+Measures, in fresh interpreter processes, how long it takes to reach the point
+where a question can be sent: the thin client path used when a warm server is
+running versus the cold path that imports langchain/boto3, builds the AWS
+clients and renders the system prompt.
+
+Usage:
+    uv run python src/bench/python/bench_startup.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MAIN_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'main', 'python')
+
+SCENARIOS = {
+    'interpreter only': 'pass',
+    'import main (client path)': 'import main',
+    'import app': 'import app',
+    'App() construction': 'from app import App; App()',
+    'cold App warm-up': 'from app import App; from socket_server import warm_up; warm_up(App())',
+}
+
+
+def time_scenario(code: str, runs: int) -> list[float]:
+    """Run code in `runs` fresh interpreters and return wall times in milliseconds."""
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(MAIN_SOURCE_DIR))
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<30} {'median ms':>10} {'min ms':>10}")
+    for name, code in SCENARIOS.items():
+        timings = time_scenario(code, args.runs)
+        print(f"{name:<30} {statistics.median(timings):>10.1f} {min(timings):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
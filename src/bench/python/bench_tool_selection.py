@@ -0,0 +1,119 @@
+"""
+Prompt size benchmark for relevance-based tool selection.
+
+Grows the tool catalog from the four weather tools to 1000 by adding
+synthetic tools from unrelated domains, then compares the estimated input
+tokens of the full system prompt with the prompt holding only the tools
+selected for each recorded question. It also reports how long building the
+index and selecting tools takes, and whether every tool the recorded
+program calls was selected (recall).
+
+Usage:
+    uv run python src/bench/python/bench_tool_selection.py [--sizes 4 10 100 1000] [--max-tools 16]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', '..', 'main', 'python'))
+
+from app import App  # noqa: E402
+from rate_limit import estimate_tokens  # noqa: E402
+from tools.registry import ToolRegistry, get_tool_registry  # noqa: E402
+
+FIXTURES_PATH = os.path.join(BENCH_DIR, '..', '..', 'test', 'resources', 'bedrock_responses.json')
+
+DOMAINS = ['stock', 'flight', 'calendar', 'email', 'invoice', 'recipe', 'playlist', 'parcel', 'hotel',
+           'contact', 'ticket', 'repository', 'database', 'payroll', 'inventory', 'vehicle', 'patient',
+           'library', 'restaurant', 'fitness']
+NOUNS = ['status', 'history', 'summary', 'owner', 'price', 'schedule', 'balance', 'rating', 'details', 'count']
+VERBS = ['get', 'list', 'find', 'count', 'lookup']
+
+
+def write_synthetic_tools(directory: str, count: int, seed: int = 0) -> str:
+    """Write a module with count synthetic tool stubs; return its path."""
+    rng = random.Random(seed)
+    lines = []
+    for number in range(count):
+        domain, noun, verb = rng.choice(DOMAINS), rng.choice(NOUNS), rng.choice(VERBS)
+        lines.append(f'''
+def {verb}_{domain}_{noun}_{number}({domain}_id: str, limit: int = 10) -> dict:
+    """
+    {verb.capitalize()} the {noun} of a {domain} record.
+
+    Returns:
+    dict: {domain} {noun} fields keyed by name
+    """
+    ...
+''')
+    path = os.path.join(directory, f'synthetic_tools_{count}.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    return path
+
+
+def build_registry(directory: str, size: int) -> ToolRegistry:
+    """Return a registry with the weather tools plus size - 4 synthetic tools."""
+    registry = ToolRegistry()
+    for spec in get_tool_registry().specs():
+        registry.register(spec)
+    extra = max(0, size - len(registry.tool_names()))
+    if extra:
+        path = write_synthetic_tools(directory, extra)
+        spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for name, stub in vars(module).items():
+            if callable(stub) and not name.startswith('_'):
+                registry.tool(implementation=f'{module.__name__}:{name}')(stub)
+    return registry
+
+
+def fixture_programs() -> dict[str, str]:
+    with open(FIXTURES_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)['programs']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 10, 100, 1000])
+    parser.add_argument('--max-tools', type=int, default=16, help="App.max_prompt_tools")
+    args = parser.parse_args()
+
+    programs = fixture_programs()
+    print(f"{'tools':>6} {'full tok':>9} {'selected tok':>13} {'reduction':>10} "
+          f"{'index ms':>9} {'select us':>10} {'recall':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            registry = build_registry(directory, size)
+            app = App(tool_registry=registry, max_prompt_tools=args.max_tools)
+            full_tokens = estimate_tokens(app.system_prompt)
+
+            start = time.perf_counter()
+            registry.select("warm up the index", 1)
+            index_ms = (time.perf_counter() - start) * 1000
+
+            selected_tokens, select_times, recalled = [], [], 0
+            for question, program in programs.items():
+                start = time.perf_counter()
+                tools = app.select_tools(question)
+                select_times.append(time.perf_counter() - start)
+                selected_tokens.append(estimate_tokens(app.prompt_for_tools(tools)))
+                needed = {name for name in registry.tool_names() if f"{name}(" in program}
+                recalled += needed <= set(tools if tools is not None else registry.tool_names())
+
+            mean_tokens = statistics.mean(selected_tokens)
+            print(f"{size:>6} {full_tokens:>9} {mean_tokens:>13.0f} {1 - mean_tokens / full_tokens:>10.1%} "
+                  f"{index_ms:>9.1f} {statistics.mean(select_times) * 1e6:>10.1f} "
+                  f"{recalled / len(programs):>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Memory and throughput of per-point weather lookups against the bulk columnar tool.
+
+Compares N calls to get_local_weather (one Weather record per point) with one
+get_local_weather_many call over the same points, and the memory held by N
+Weather records (slotted, as now, and dict-backed, as before) against one
+WeatherColumns result. Implementations are called directly, bypassing the
+result cache, so every point is really computed.
+
+Usage:
+    uv run python src/bench/python/bench_weather.py [--points N] [--runs N]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'main', 'python'))
+
+from tools.implementations import weather_tools_impl  # noqa: E402
+from tools.interfaces.weather_tools import Weather  # noqa: E402
+
+try:
+    import numpy
+except ImportError:  # The bulk tool falls back to array('d') columns
+    numpy = None
+
+
+class DictWeather:
+    """Weather as it was before: a plain class with a per-instance __dict__."""
+    def __init__(self, temperature_fahrenheit: float, precipitation_chance_percent: float):
+        self.temperature_fahrenheit = temperature_fahrenheit
+        self.precipitation_chance_percent = precipitation_chance_percent
+
+
+def allocated_bytes(build) -> int:
+    """Return the bytes still allocated by the object build() returns."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return allocated
+
+
+def median_seconds(function, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--points', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    latitudes = [random.uniform(25.0, 49.0) for _ in range(args.points)]
+    longitudes = [random.uniform(-125.0, -66.0) for _ in range(args.points)]
+    per_point = weather_tools_impl.get_local_weather.__wrapped__
+    bulk = weather_tools_impl.get_local_weather_many
+    values = [(random.uniform(14.0, 104.0), random.uniform(0.0, 100.0)) for _ in range(args.points)]
+
+    print(f"{args.points} points, NumPy {'available' if numpy is not None else 'not installed'}\n")
+    print(f"{'memory':<34} {'bytes/point':>12}")
+    memory = {
+        'dict-backed records': lambda: [DictWeather(t, p) for t, p in values],
+        'slotted Weather records': lambda: [Weather(t, p) for t, p in values],
+        'WeatherColumns': lambda: bulk(latitudes, longitudes),
+    }
+    for name, build in memory.items():
+        print(f"{name:<34} {allocated_bytes(build) / args.points:>12.1f}")
+
+    print(f"\n{'throughput':<34} {'points/s':>12}")
+    throughput = {
+        'get_local_weather per point': lambda: [per_point(lat, lon) for lat, lon in zip(latitudes, longitudes)],
+        'get_local_weather_many (lists)': lambda: bulk(latitudes, longitudes),
+    }
+    if numpy is not None:
+        lat_array, lon_array = numpy.asarray(latitudes), numpy.asarray(longitudes)
+        throughput['get_local_weather_many (arrays)'] = lambda: bulk(lat_array, lon_array)
+    for name, function in throughput.items():
+        print(f"{name:<34} {args.points / median_seconds(function, args.runs):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
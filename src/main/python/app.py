@@ -1,26 +1,213 @@
 """
 Sample application class for demonstration.
 """
-from typing import Optional
-from langchain_aws import ChatBedrockConverse
-import boto3
-import os
-import re
+from collections import OrderedDict
+from contextlib import nullcontext
+from types import CodeType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional
+import contextvars
+import queue
+import threading
+import time
+
+from llm_client import (
+    DEFAULT_MODEL_ID,
+    DEFAULT_REGION,
+    DEFAULT_USER_MESSAGE,
+    UsageStats,
+    build_messages,
+    calling_app,
+    get_registry,
+    get_stream_sink,
+    message_text,
+    stream_with_prompt,
+    streaming_to,
+)
+from coalescing import GeneratedAnswer, RequestCoalescer
+from execution import NO_FUNCTION_ERROR, clean_llm_output, load_entry_point
+from executors import InProcessExecutor
+from parallel_tools import ParallelToolRunner
+from program_analysis import (
+    DEFAULT_POLICY,
+    ProgramPolicy,
+    ProgramRejected,
+    analyze_program,
+    cached_analysis,
+    current_analysis,
+)
+from program_cache import ProgramCache, compile_program
+from repair import RepairStats, ToolResultMemo, build_repair_message, current_tool_memo
+from rate_limit import RateLimiter, acall_with_retries, call_with_retries, estimate_tokens
+from routing import TOOLS, ModelRouter, current_route
+from session import current_session
+from speculation import ToolPrefetcher, current_speculation
+from trace_store import Recording, TraceStore, current_recording
+from tracing import NULL_TRACER, record_usage
+
+ASYNC_PROMPT_SUFFIX = '''
+ In this environment answer_user_question must be declared with "async def", and every function listed above is a coroutine function that has to be awaited (for example: county, state = await get_user_location()). asyncio is already available, so independent calls can be awaited together with asyncio.gather.
+'''
+
+# Result a generated program returns when the tools in a reduced prompt are not enough
+MORE_TOOLS_NEEDED = 'MORE_TOOLS_NEEDED'
+SELECTED_TOOLS_NOTE = f'''
+ Only the functions most relevant to the question are listed above. If they are not enough to answer it, answer_user_question must return exactly "{MORE_TOOLS_NEEDED}" and you will be shown every available function.
+'''
+
+# Told to the model when tool calls are deferred (see parallel_tools)
+PARALLEL_TOOLS_NOTE = '''
+ Function calls run concurrently: each call returns at once and its value is only waited for when it is used. An exception raised by a function therefore surfaces where its result is first used, not at the call, so put that use inside any try/except meant to catch it. Compare results with == rather than "is".
+'''
+
+# Rendered system prompts shared by every App in the process, keyed by (App
+# class, tool registry, tool selection, parallel tools) and stored with the
+# interface files' mtimes at render time; least recently used selections are
+# dropped first
+PROMPT_CACHE_SIZE = 256
+_prompt_lock = threading.Lock()
+_rendered_prompts: OrderedDict[tuple, tuple[tuple, str]] = OrderedDict()
 
 
 class App:
-    def __init__(self, name: Optional[str] = None):
-        self.model_id = 'us.anthropic.claude-sonnet-4-20250514-v1:0'
-        self.region = 'us-east-1'
-        self.llm = ChatBedrockConverse(
-                model=self.model_id,
-                region_name=self.region,
-                temperature=0.7,
-                max_tokens=1000,
-            )
-        self.boto_client = boto3.client("bedrock", region_name=self.region)
-        interface_functions = self.read_from_source_code('weather_tools.py')
-        self.system_prompt = f'''
+    def __init__(self, name: Optional[str] = None, parallel_tools: bool = False,
+                 program_cache: Optional[ProgramCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = 5,
+                 executor=None, tracer=None, prompt_caching: bool = True, tool_registry=None,
+                 max_prompt_tools: Optional[int] = 16, speculative_tools: bool = False,
+                 max_repairs: int = 1, coalescer: Optional[RequestCoalescer] = None,
+                 program_policy: Optional[ProgramPolicy] = DEFAULT_POLICY,
+                 router: Optional[ModelRouter] = None, trace_store: Optional[TraceStore] = None):
+        # When enabled, tool calls in generated programs run concurrently and
+        # only block when their results are used (see parallel_tools)
+        self.parallel_tools = parallel_tools
+        # Optional cache of compiled programs; answer() skips generation on a hit
+        self.program_cache = program_cache
+        # Backend running generated programs (see executors); in-process exec by default
+        self.executor = executor if executor is not None else InProcessExecutor()
+        # Spans for every pipeline stage and tool call (see tracing); no-op by default
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        # Optional client-side quota shared by every Bedrock call this App makes;
+        # throttled calls are retried with jittered backoff up to max_retries times
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # Mark the generation system prompt as a Bedrock cache point; token and
+        # cache-hit totals of every response this App receives go to usage
+        self.prompt_caching = prompt_caching
+        self.usage = UsageStats()
+        # Tools available to generated programs (see tools.registry); the
+        # process-wide registry is loaded on first use
+        self._tool_registry = tool_registry
+        # With more tools than this, only the ones relevant to the question are
+        # put in the prompt (see ToolRegistry.select); None always renders all
+        self.max_prompt_tools = max_prompt_tools
+        # Stream generated programs and start speculative tool calls they make
+        # before the program is complete (see speculation)
+        self.speculative_tools = speculative_tools
+        self._prefetcher: Optional[ToolPrefetcher] = None
+        # A program that fails to compile or raises is sent back to the model with
+        # its traceback up to max_repairs times, reusing the tool results it got
+        self.max_repairs = max_repairs
+        self.repair_stats = RepairStats()
+        # Optional single-flight table: concurrent identical questions share one
+        # generated program, and identical model calls share one response
+        self.coalescer = coalescer
+        # Programs are analyzed before exec (see program_analysis): policy violations
+        # are rejected, literal answers skip execution; None disables the pass
+        self.program_policy = program_policy
+        # Optional per-stage, per-question-class model choice with escalation to
+        # a larger model after a failed program (see routing); model_id otherwise
+        self.router = router
+        # Chat models for routed calls by model id; missing ones come from the client registry
+        self.models: dict[str, object] = {}
+        # Optional append-only log of every answer's program, tool calls and
+        # timings, for offline replay (see trace_store)
+        self.trace_store = trace_store
+        self.model_id = DEFAULT_MODEL_ID
+        self.region = DEFAULT_REGION
+        self.temperature = 0.7
+        self.max_tokens = 1000
+        # Clients and prompts are built on first use so that constructing an App
+        # (e.g. for CLI argument errors or a cache hit) costs no AWS setup or file I/O
+        self._llm = None
+        self._boto_client = None
+        self._async_system_prompt: tuple[str, str] = ('', '')
+
+    @property
+    def llm(self):
+        """Chat model used for program generation and call_llm."""
+        if self._llm is None:
+            # Clients come from the process-wide registry so every App (and call_llm)
+            # shares one connection pool instead of building its own
+            self._llm = get_registry().get_chat_model(
+                    self.model_id,
+                    self.region,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                )
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm) -> None:
+        self._llm = llm
+
+    def llm_for(self, model_id: str):
+        """Chat model for a Bedrock model id; the llm property for model_id."""
+        if model_id == self.model_id:
+            return self.llm
+        llm = self.models.get(model_id)
+        if llm is None:
+            llm = self.models.setdefault(model_id, get_registry().get_chat_model(
+                model_id, self.region, temperature=self.temperature, max_tokens=self.max_tokens))
+        return llm
+
+    def _model_for(self, stage: str) -> str:
+        if self.router is None:
+            return self.model_id
+        route = current_route()
+        if route is None:
+            # Outside answer (e.g. the async path): no question class, so start as for tool questions
+            return self.router.choose(stage, TOOLS)
+        return route.model(stage)
+
+    @property
+    def boto_client(self):
+        """Shared boto3 Bedrock control-plane client."""
+        if self._boto_client is None:
+            self._boto_client = get_registry().get_boto_client("bedrock", self.region)
+        return self._boto_client
+
+    @property
+    def tool_registry(self):
+        """Registry providing tool stubs for the prompt and implementations for execution."""
+        if self._tool_registry is None:
+            from tools.registry import get_tool_registry
+            self._tool_registry = get_tool_registry()
+        return self._tool_registry
+
+    @property
+    def prefetcher(self) -> ToolPrefetcher:
+        """Speculative tool call history and saved-time counters of this App."""
+        if self._prefetcher is None:
+            self._prefetcher = ToolPrefetcher(self.tool_registry)
+        return self._prefetcher
+
+    def build_system_prompt(self, names: Optional[list[str]] = None) -> str:
+        """
+        Render the system prompt describing the available tool interfaces.
+
+        Args:
+            names: Tools to describe (default: all registered tools)
+
+        Returns:
+            str: System prompt for program generation
+        """
+        interface_functions = self.tool_registry.render(names)
+        if names is not None:
+            interface_functions += SELECTED_TOOLS_NOTE
+        if self.parallel_tools:
+            interface_functions += PARALLEL_TOOLS_NOTE
+        return f'''
 Your job is to write python function that answers the user’s question. You have the following functions you can call to help provide context, and then you can make one final call to an LLM to produce an answer, given the context. Alternatively, you can just return an answer directly. If answer cannot be obtained, also return that information directly, along with an explanation. Your response should have the following signature:
 def answer_user_question(question: str) → str
 
@@ -28,69 +215,204 @@ You have the following functions at your disposal:
 
 {interface_functions}
 
- Important: only respond in valid python, with the answer_user_question function implementation. Put any comments you may have in the function's return value. Add any import statements before the function definition. Only use features included in python 3, do not import any additional libraries beyond the above functions (no need to import them).   
+ Important: only respond in valid python, with the answer_user_question function implementation. Put any comments you may have in the function's return value. Add any import statements before the function definition. Only use features included in python 3, do not import any additional libraries beyond the above functions (no need to import them).
 '''
 
-    def read_from_source_code(self, filename: str) -> str:
+    @property
+    def system_prompt(self) -> str:
+        """System prompt for synchronous programs, describing every tool."""
+        return self.prompt_for_tools()
+
+    def prompt_for_tools(self, names: Optional[list[str]] = None) -> str:
         """
-        Read source code from a file and trim import statements from the beginning.
-        
+        Return the system prompt describing the given tools.
+
+        Rendered once per process and re-rendered only when an interface
+        file's mtime changes, so building an App or answering a question costs
+        a stat call per interface file rather than rendering the tool stubs.
+
         Args:
-            filename: Name of the file to read (will look in tools/interfaces/)
-            
+            names: Tools to describe (default: all registered tools)
+
         Returns:
-            str: Source code with import statements trimmed
+            str: System prompt for program generation
         """
-        try:
-            # Construct the full path to the file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            file_path = os.path.join(current_dir, 'tools', 'interfaces', filename)
-            
-            # Read the file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # Find the line with '''INTERFACE DEFINITIONS''' or similar marker
-            start_index = 0
-            for i, line in enumerate(lines):
-                if 'INTERFACE' in line and ('"""' in line or "'''" in line):
-                    start_index = i + 1  # Start from the line after the marker
-                    break
-            
-            # Return the content from after the interface marker
-            return ''.join(lines[start_index:])
-            
-        except FileNotFoundError:
-            return f"# Error: Could not find file {filename}"
-        except Exception as e:
-            return f"# Error reading file {filename}: {str(e)}"
+        key = (type(self), self.tool_registry, None if names is None else tuple(names), self.parallel_tools)
+        mtimes = self.tool_registry.source_mtimes()
+        with _prompt_lock:
+            cached = _rendered_prompts.get(key)
+            if cached is not None and cached[0] == mtimes:
+                _rendered_prompts.move_to_end(key)
+                return cached[1]
+        with self.tracer.span('prompt.build', tools=len(names) if names is not None else None):
+            prompt = self.build_system_prompt(names)
+        with _prompt_lock:
+            _rendered_prompts[key] = (mtimes, prompt)
+            _rendered_prompts.move_to_end(key)
+            while len(_rendered_prompts) > PROMPT_CACHE_SIZE:
+                _rendered_prompts.popitem(last=False)
+        return prompt
+
+    def select_tools(self, message: str) -> Optional[list[str]]:
+        """
+        Pick the tools to describe in the prompt for a question.
+
+        Args:
+            message: The user's question
+
+        Returns:
+            Selected tool names, or None if every tool should be described
+        """
+        if self.max_prompt_tools is None:
+            return None
+        registry = self.tool_registry
+        tool_count = len(registry.tool_names())
+        if tool_count <= self.max_prompt_tools:
+            return None
+        with self.tracer.span('tools.select'):
+            selected = registry.select(message, self.max_prompt_tools)
+        return selected if len(selected) < tool_count else None
+
+    @property
+    def async_system_prompt(self) -> str:
+        """System prompt asking for an async answer_user_question."""
+        system_prompt = self.system_prompt
+        if self._async_system_prompt[0] is not system_prompt:
+            self._async_system_prompt = (system_prompt, system_prompt.replace(
+                'def answer_user_question', 'async def answer_user_question', 1) + ASYNC_PROMPT_SUFFIX)
+        return self._async_system_prompt[1]
 
     def clean_llm_output(self, llm_output: str) -> str:
         """
-        Clean the LLM output by removing markdown code blocks and standalone 'python' lines.
-        
+        Extract the program from LLM output (see execution.clean_llm_output).
+
         Args:
             llm_output: Raw LLM output string
-            
+
         Returns:
             Cleaned Python code string
         """
-        # Remove markdown code blocks
-        code = re.sub(r'```python\n?', '', llm_output)
-        code = re.sub(r'```\n?', '', code)
-        
-        # Remove standalone 'python' lines
-        lines = code.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            stripped = line.strip()
-            # Skip lines that are just 'python' or variations
-            if stripped.lower() in ['python', 'python3', '>>> python', '$ python']:
-                continue
-            cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines)
+        return clean_llm_output(llm_output)
+
+    def tool_namespace(self, names: Optional[Iterable[str]] = None) -> dict:
+        """
+        Build the globals dict generated programs are executed in.
+
+        Args:
+            names: Tools to make available (default: every registered tool)
+
+        Returns:
+            dict: Tool functions (wrapped for parallel execution if enabled) and builtins
+        """
+        registry = self.tool_registry
+        namespace = registry.namespace(names)
+        speculation = current_speculation()
+        memo = current_tool_memo()
+        recording = current_recording()
+        if (self.tracer.enabled or self.parallel_tools or speculation is not None or memo is not None
+                or recording is not None):
+            tool_names = registry.tool_names() if names is None else list(names)
+            analysis = current_analysis()
+            if analysis is not None:
+                # Only tools the program refers to can be called
+                tool_names = [tool_name for tool_name in tool_names if tool_name in analysis.referenced]
+            # A program making at most one tool call has nothing to overlap, and one
+            # catching exceptions or comparing with `is` needs results at the call
+            parallel = self.parallel_tools and (analysis is None or (
+                analysis.calls_may_overlap(tool_names) and not analysis.needs_eager_results))
+            runner = ParallelToolRunner() if parallel else None
+            for tool_name in tool_names:
+                if speculation is not None and registry.get(tool_name).speculative:
+                    namespace[tool_name] = speculation.wrap(tool_name, namespace[tool_name])
+                if memo is not None:
+                    namespace[tool_name] = memo.wrap(tool_name, namespace[tool_name])
+                if recording is not None:
+                    namespace[tool_name] = recording.wrap(tool_name, namespace[tool_name])
+                namespace[tool_name] = self.tracer.wrap_tool(tool_name, namespace[tool_name])
+                if runner is not None:
+                    namespace[tool_name] = runner.wrap(namespace[tool_name])
+        session = current_session()
+        if session is not None:
+            namespace['previous_results'] = session.previous_results()
+        return namespace
+
+    def compile_llm_code(self, llm_output: str) -> CodeType:
+        """
+        Clean and compile LLM output into a code object defining answer_user_question.
+
+        Args:
+            llm_output: Raw LLM output containing Python code
+
+        Returns:
+            CodeType: Compiled program
+        """
+        return self._clean_and_compile(llm_output)[1]
+
+    def _clean_and_compile(self, llm_output: str) -> tuple[str, CodeType]:
+        with self.tracer.span('clean'):
+            cleaned_code = self.clean_llm_output(llm_output)
+        recording = current_recording()
+        if recording is not None:
+            recording.program(cleaned_code, llm_output)
+        with self.tracer.span('compile'):
+            code = compile_program(cleaned_code)
+        if self.program_policy is not None:
+            with self.tracer.span('analyze'):
+                analyze_program(cleaned_code, code, self.program_policy).check()
+        return cleaned_code, code
+
+    def run_compiled_code(self, code: CodeType, question: str, source: Optional[str] = None) -> str:
+        """
+        Run a compiled program with this App's executor backend.
+
+        Exceptions raised by the program propagate to the caller. With a program
+        policy, a program is only run once it has been analyzed: programs that were
+        not compiled by this App (the program cache's disk store, put(), or an
+        analysis evicted since) are analyzed from source, and refused without it.
+
+        Args:
+            code: Compiled program, e.g. from compile_llm_code or the program cache
+            question: The question to ask the generated function
+            source: Cleaned source of code, analyzed if no analysis of code is cached
+
+        Returns:
+            str: Result of the generated function
+
+        Raises:
+            ProgramRejected: If the program violates the policy, or cannot be analyzed
+        """
+        analysis = None
+        if self.program_policy is not None:
+            analysis = cached_analysis(code, self.program_policy)
+            if analysis is None:
+                if source is None:
+                    raise ProgramRejected("program has no source to check against the program policy")
+                with self.tracer.span('analyze'):
+                    analysis = analyze_program(source, code, self.program_policy)
+            analysis.check()
+        with self.tracer.span('execute') as span, self._timed('execute'), self._stream_scope(analysis):
+            if analysis is None:
+                return self._execute(span, code, question)
+            if analysis.constant_result is not None:
+                # The program only returns a literal: no namespace, exec or executor needed
+                span.set_attribute('constant', True)
+                return analysis.constant_result
+            span.set_attribute('estimated_tool_calls', analysis.estimated_calls(self.tool_registry.tool_names()))
+            with analysis.active():
+                return self._execute(span, code, question)
+
+    @staticmethod
+    def _stream_scope(analysis):
+        # Under stream_answer only a call_llm whose text goes straight into the answer
+        # is streamed; calls producing context for later calls are kept from the client
+        if get_stream_sink() is None or (analysis is not None and analysis.answer_call('call_llm')):
+            return nullcontext()
+        return streaming_to(None)
+
+    def _execute(self, span, code: CodeType, question: str) -> str:
+        if self.tracer.profile_generated_code:
+            return self.tracer.profile(span, self.executor.run, self, code, question)
+        return self.executor.run(self, code, question)
 
     def execute_llm_code(self, llm_output: str, question: str) -> str:
         """
@@ -104,86 +426,412 @@ You have the following functions at your disposal:
             Result of executing the code
         """
         try:
-            # Import the weather tools implementations
-            from tools.implementations.weather_tools_impl import (
-                get_user_location,
-                get_geo_from_county,
-                get_local_weather,
-                call_llm
-            )
-            from tools.interfaces.weather_tools import Weather
-            
-            # Clean the LLM output
+            return self.run_compiled_code(self.compile_llm_code(llm_output), question)
+        except Exception as e:
+            return f"Error executing LLM code: {str(e)}"
+
+    async def aexecute_llm_code(self, llm_output: str, question: str) -> str:
+        """
+        Execute LLM-generated async code with access to the async weather tools.
+
+        A generated coroutine is awaited on the running event loop. If the LLM
+        produced a plain function instead, it is executed with the synchronous
+        tools on a worker thread so the loop is never blocked.
+
+        Args:
+            llm_output: Raw LLM output containing Python code
+            question: The question to ask the generated function
+
+        Returns:
+            Result of executing the code
+        """
+        # Deferred so synchronous/CLI use never pays for importing asyncio
+        import asyncio
+        import inspect
+
+        try:
             cleaned_code = self.clean_llm_output(llm_output)
-            
-            # Append code to automatically call the function and store result
-            runner_code = f"""
-# Auto-generated runner code
-if 'answer_user_question' in locals():
-    _user_question = {repr(question)}
-    _function_result = answer_user_question(_user_question)
-else:
-    _function_result = "Error: No 'answer_user_question' function found in the generated code."
-"""
-            
-            # Combine the cleaned code with the runner
-            full_code = cleaned_code + runner_code
-            
-            # Create a namespace with the weather tools available
-            namespace = {
-                'get_user_location': get_user_location,
-                'get_geo_from_county': get_geo_from_county,
-                'get_local_weather': get_local_weather,
-                'call_llm': call_llm,
-                'Weather': Weather,
-                '__builtins__': __builtins__
-            }
-            
-            # Execute the full code in the namespace
-            exec(full_code, namespace)
-            
-            # Return the result stored by the runner
-            return str(namespace.get('_function_result', 'Error: No result generated'))
-                
+            code = compile_program(cleaned_code)
+            if self.program_policy is not None:
+                analyze_program(cleaned_code, code, self.program_policy).check()
+
+            namespace = self.tool_registry.namespace(asynchronous=True)
+            namespace['asyncio'] = asyncio
+
+            # Only defines the function; it is awaited below
+            function = load_entry_point(code, namespace)
+            if function is None:
+                return NO_FUNCTION_ERROR
+            if not inspect.iscoroutinefunction(function):
+                return await asyncio.to_thread(self.execute_llm_code, llm_output, question)
+
+            with calling_app(self), self.tracer.span('execute'):
+                result = await function(question)
+            return str(result)
+
         except Exception as e:
             return f"Error executing LLM code: {str(e)}"
 
     def answer(self, message: str) -> str:
+        with self.tracer.span('answer', question=message) as span:
+            if self.trace_store is None:
+                return self._answer(message, span)
+            with Recording(message).active() as recording:
+                result = self._answer(message, span)
+            self.trace_store.append(recording.to_record(result))
+            return result
+
+    @staticmethod
+    def _timed(stage: str):
+        # Adds the block's duration to the stage total of the answer being recorded, if any
+        recording = current_recording()
+        return recording.timed(stage) if recording is not None else nullcontext()
+
+    @staticmethod
+    def _record_program(source: Optional[str]) -> None:
+        # A program that was not generated by this answer (cache hit or coalesced flight)
+        recording = current_recording()
+        if recording is not None:
+            recording.program(source)
+
+    def _answer(self, message: str, span) -> str:
+        if self.router is None:
+            return self._answer_with_tools(message, span)
+        route = self.router.route(message, self.tool_registry)
+        span.set_attribute('question_class', route.question_class)
+        with route.active():
+            return self._answer_with_tools(message, span)
+
+    def _answer_with_tools(self, message: str, span) -> str:
+        tools = self.select_tools(message)
+        if tools is None:
+            return self._answer_with_prompt(message, self.system_prompt, span)
+        span.set_attribute('tools_selected', len(tools))
+        result = self._answer_with_prompt(message, self.prompt_for_tools(tools), span, partial_tools=True)
+        if not self._needs_more_tools(result):
+            return result
+        # The selected tools were not enough: retry with every tool described
+        span.set_attribute('tool_fallback', True)
+        return self._answer_with_prompt(message, self.system_prompt, span)
+
+    @staticmethod
+    def _needs_more_tools(result: str) -> bool:
+        # Either the program asked for more tools, or it called one it was not shown
+        return result.strip() == MORE_TOOLS_NEEDED or (
+            result.startswith("Error executing LLM code: name '") and result.endswith("' is not defined"))
+
+    def _answer_with_prompt(self, message: str, system_prompt: str, span, partial_tools: bool = False) -> str:
+        # Programs generated in a session depend on the conversation, not just the question
+        if current_session() is not None:
+            return self._generate_and_run(message, system_prompt, partial_tools)[0]
+
+        # A cached program for this question skips generation and compilation
+        if self.program_cache is not None:
+            entry = self.program_cache.lookup(message, system_prompt)
+            span.set_attribute('cache_hit', entry is not None)
+            if entry is not None:
+                code, source = entry
+                self._record_program(source)
+                try:
+                    return self.run_compiled_code(code, message, source)
+                except Exception as e:
+                    return f"Error executing LLM code: {str(e)}"
+
+        if self.coalescer is None:
+            return self._generate_and_run(message, system_prompt, partial_tools)[0]
+        # Only requests routed to the same generation model may share its program
+        (result, code, _), joined = self.coalescer.program(
+            message, system_prompt, lambda: self._generate_and_run(message, system_prompt, partial_tools),
+            scope=self._model_for('generate'))
+        span.set_attribute('coalesced', joined)
+        if not joined or code is None:
+            return result
+        # Another request generated the program; run it with this request's own tool inputs
+        self._record_program(None)
+        try:
+            return self.run_compiled_code(code, message)
+        except Exception as e:
+            return f"Error executing LLM code: {str(e)}"
+
+    def _generate_and_run(self, message: str, system_prompt: str, partial_tools: bool = False) -> GeneratedAnswer:
+        # In a session, earlier turns and tool results are sent ahead of the question
+        session = current_session()
+        generation_message = session.generation_message(message) if session is not None else message
+        if self.speculative_tools:
+            speculation = self.prefetcher.begin()
+            try:
+                with self._timed('generate'):
+                    llm_response = self._generate_speculatively(speculation, system_prompt, generation_message)
+                with speculation.active():
+                    return self._run_generated(message, system_prompt, llm_response, partial_tools)
+            finally:
+                speculation.close()
+
         # Get the LLM response
-        llm_response = self.answer_with_prompt(self.system_prompt, message)
+        with self._timed('generate'):
+            llm_response = self.answer_with_prompt(system_prompt, generation_message,
+                                                   cache_prompt=self.prompt_caching, stage='generate')
+        return self._run_generated(message, system_prompt, llm_response, partial_tools)
 
+    def _generate_speculatively(self, speculation, system_prompt: str, message: str) -> str:
+        # Stream the program so tool calls can start while the rest is generated
+        parts = []
+        try:
+            for chunk in self.stream_with_prompt(system_prompt, message, cache_prompt=self.prompt_caching,
+                                                 stage='generate'):
+                parts.append(chunk)
+                speculation.feed(chunk)
+        except Exception:
+            # Streams are not retried; fall back to a (retried) regular call
+            return self.answer_with_prompt(system_prompt, message, cache_prompt=self.prompt_caching, stage='generate')
+        speculation.finish()
+        return ''.join(parts)
+
+    def _run_generated(self, message: str, system_prompt: str, llm_response: str,
+                       partial_tools: bool = False) -> GeneratedAnswer:
         print(f"LLM responded with: {llm_response}")
-        
-        # Execute the LLM-generated code and return the result
-        return self.execute_llm_code(llm_response, message)
-    
-    def answer_with_prompt(self, system_prompt: str, message: str = "Provide answer to my request, given the context above.") -> str:
+
+        # Tool results of failed attempts are kept for the repaired program
+        # (a session's memo already keeps every result of the conversation)
+        memo = current_tool_memo()
+        if memo is None and self.max_repairs > 0:
+            memo = ToolResultMemo()
+        route = current_route()
+        repairs = 0
+        repair_started = None
+        with memo.active() if memo is not None else nullcontext():
+            while True:
+                code = None
+                try:
+                    cleaned_code, code = self._clean_and_compile(llm_response)
+                    result = self.run_compiled_code(code, message)
+                    error = None
+                except Exception as e:
+                    error = e
+                # A program calling a tool it was not shown is retried with every tool instead
+                give_up = error is not None and (
+                    repairs >= self.max_repairs or (partial_tools and isinstance(error, NameError)))
+                if repair_started is not None:
+                    succeeded = True if error is None else (False if give_up else None)
+                    self.repair_stats.record(time.perf_counter() - repair_started, succeeded,
+                                             memo.hits - reused_before)
+                if route is not None:
+                    route.record(error is None)
+                if error is None:
+                    break
+                if give_up:
+                    # No program: requests that joined this one share the error rather than rerun it
+                    return f"Error executing LLM code: {str(error)}", None, repairs + 1
+                if route is not None:
+                    # The repair and the rest of this answer go to the next larger model
+                    route.escalate()
+                repairs += 1
+                repair_started = time.perf_counter()
+                reused_before = memo.hits
+                with self.tracer.span('repair', attempt=repairs, error=type(error).__name__), self._timed('repair'):
+                    llm_response = self.answer_with_prompt(
+                        system_prompt, build_repair_message(message, self.clean_llm_output(llm_response), error),
+                        cache_prompt=self.prompt_caching, stage='repair')
+                print(f"LLM repaired program: {llm_response}")
+
+        # Only programs that define the entry point and ran cleanly are worth reusing
+        if (self.program_cache is not None and current_session() is None and 'answer_user_question' in code.co_names
+                and result.strip() != MORE_TOOLS_NEEDED):
+            self.program_cache.put(message, system_prompt, cleaned_code, code)
+        return result, code, repairs + 1
     
+    def stream_answer(self, message: str) -> Iterator[str]:
+        """
+        Answer a question, yielding text as soon as it is available.
+
+        Text generated by call_llm inside the program is streamed token by
+        token while the program is still running, if that call is the program's
+        only call_llm and its text goes straight into the returned answer (only
+        once per answer, even if the program is repaired); other call_llm output
+        is only context and is not streamed. Answers returned directly by
+        the program are yielded as one chunk once it finishes. If the program
+        returns more than what was streamed, the remainder is yielded at the
+        end (after a blank line if the result does not extend the streamed text).
+
+        Args:
+            message: The user's question
+
+        Yields:
+            str: Answer text chunks
+        """
+        chunks: queue.Queue = queue.Queue()
+        finished = object()
+        outcome = {}
+
+        def run():
+            try:
+                with streaming_to(chunks.put):
+                    outcome['result'] = self.answer(message)
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                chunks.put(finished)
+
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True)
+        worker.start()
+
+        streamed = []
+        while (chunk := chunks.get()) is not finished:
+            streamed.append(chunk)
+            yield chunk
+        worker.join()
+
+        if 'error' in outcome:
+            raise outcome['error']
+        result = outcome['result']
+        streamed_text = ''.join(streamed)
+        if not streamed_text:
+            yield result
+        elif result.startswith(streamed_text):
+            if len(result) > len(streamed_text):
+                yield result[len(streamed_text):]
+        else:
+            yield '\n\n' + result
+
+    async def aanswer(self, message: str) -> str:
+        """
+        Async variant of answer: generates an async program and awaits it.
+
+        Args:
+            message: The user's question
+
+        Returns:
+            str: Answer produced by the generated program
+        """
+        with self.tracer.span('answer', question=message):
+            llm_response = await self.aanswer_with_prompt(self.async_system_prompt, message,
+                                                          cache_prompt=self.prompt_caching, stage='generate')
+
+            print(f"LLM responded with: {llm_response}")
+
+            return await self.aexecute_llm_code(llm_response, message)
+
+    def answer_many(self, questions: Iterable[str], max_concurrency: int = 8) -> list[str]:
+        """
+        Answer many questions concurrently, returning answers in input order.
+
+        Args:
+            questions: Questions to answer
+            max_concurrency: Maximum number of questions in flight at once
+
+        Returns:
+            list[str]: One answer (or error message) per question
+        """
+        questions = list(questions)
+        answers = [''] * len(questions)
+        for index, answer in self.answer_as_completed(questions, max_concurrency):
+            answers[index] = answer
+        return answers
+
+    def answer_as_completed(self, questions: Iterable[str], max_concurrency: int = 8) -> Iterator[tuple[int, str]]:
+        """
+        Answer many questions concurrently, yielding answers as they complete.
+
+        Each question goes through answer(), so program generation and any
+        call_llm inside the programs respect this App's rate limiter and retries.
+
+        Args:
+            questions: Questions to answer
+            max_concurrency: Maximum number of questions in flight at once
+
+        Yields:
+            tuple[int, str]: Index of the question in questions, and its answer
+        """
+        def answer_one(question: str) -> str:
+            try:
+                return self.answer(question)
+            except Exception as e:
+                return f"Error answering question: {str(e)}"
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='answer') as executor:
+            futures = {executor.submit(answer_one, question): index for index, question in enumerate(questions)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _request_tokens(self, system_prompt: str, message: str) -> int:
+        # Bedrock counts the input plus the reserved max_tokens against the quota
+        return estimate_tokens(system_prompt) + estimate_tokens(message) + self.max_tokens
+
+    def _invoke_limited(self, system_prompt: str, message: str, cache_prompt: bool = False,
+                        model_id: Optional[str] = None) -> str:
+        model_id = model_id or self.model_id
+        if self.rate_limiter is not None:
+            with self.tracer.span('rate_limit.wait'):
+                self.rate_limiter.acquire(self._request_tokens(system_prompt, message))
+        with self.tracer.span('llm.generate', model=model_id) as span:
+            started = time.perf_counter()
+            try:
+                response = self.llm_for(model_id).invoke(build_messages(system_prompt, message, cache_prompt))
+            except Exception:
+                self._record_call(model_id, started, succeeded=False)
+                raise
+            self._record_call(model_id, started)
+            record_usage(span, response)
+        self.usage.record(response)
+        return message_text(response)
+
+    async def _ainvoke_limited(self, system_prompt: str, message: str, cache_prompt: bool = False,
+                               model_id: Optional[str] = None) -> str:
+        model_id = model_id or self.model_id
+        if self.rate_limiter is not None:
+            with self.tracer.span('rate_limit.wait'):
+                await self.rate_limiter.aacquire(self._request_tokens(system_prompt, message))
+        with self.tracer.span('llm.generate', model=model_id) as span:
+            started = time.perf_counter()
+            try:
+                response = await self.llm_for(model_id).ainvoke(build_messages(system_prompt, message, cache_prompt))
+            except Exception:
+                self._record_call(model_id, started, succeeded=False)
+                raise
+            self._record_call(model_id, started)
+            record_usage(span, response)
+        self.usage.record(response)
+        return message_text(response)
+
+    def _record_call(self, model_id: str, started: float, succeeded: bool = True) -> None:
+        if self.router is not None:
+            self.router.record_call(model_id, time.perf_counter() - started, succeeded)
+
+    def answer_with_prompt(self, system_prompt: str, message: str = DEFAULT_USER_MESSAGE,
+                           cache_prompt: bool = False, stage: str = 'call_llm') -> str:
+        model_id = self._model_for(stage)
+        if self.coalescer is not None:
+            return self.coalescer.call(
+                system_prompt, message,
+                lambda: self._answer_with_retries(system_prompt, message, cache_prompt, model_id), scope=model_id)
+        return self._answer_with_retries(system_prompt, message, cache_prompt, model_id)
+
+    def _answer_with_retries(self, system_prompt: str, message: str, cache_prompt: bool,
+                             model_id: Optional[str] = None) -> str:
         try:
-            # Python does not support traditional method overloading by argument signature.
-            # Defining multiple methods with the same name in a class will override previous definitions.
-            from langchain_core.messages import HumanMessage, SystemMessage
-            
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=message)
-            ]
-            
-            # Invoke the model with messages
-            response = self.llm.invoke(messages)
-            
-            # Extract the content from the response
-            if hasattr(response, 'content'):
-                content = response.content
-                if isinstance(content, str):
-                    return content
-                elif isinstance(content, list):
-                    # Handle list of content parts
-                    return " ".join(str(part) for part in content)
-                else:
-                    return str(content)
-            else:
-                return str(response)
-                
+            return call_with_retries(lambda: self._invoke_limited(system_prompt, message, cache_prompt, model_id),
+                                     self.max_retries)
+        except Exception as e:
+            raise Exception(f"Error calling Bedrock LLM with system prompt: {str(e)}")
+
+    def stream_with_prompt(self, system_prompt: str, message: str = DEFAULT_USER_MESSAGE,
+                           cache_prompt: bool = False, stage: str = 'call_llm') -> Iterator[str]:
+        """Streaming variant of answer_with_prompt, yielding text chunks as they arrive."""
+        try:
+            model_id = self._model_for(stage)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self._request_tokens(system_prompt, message))
+            with self.tracer.span('llm.stream', model=model_id):
+                yield from stream_with_prompt(self.llm_for(model_id), system_prompt, message, cache_prompt)
+        except Exception as e:
+            raise Exception(f"Error calling Bedrock LLM with system prompt: {str(e)}")
+
+    async def aanswer_with_prompt(self, system_prompt: str, message: str = DEFAULT_USER_MESSAGE,
+                                  cache_prompt: bool = False, stage: str = 'call_llm') -> str:
+        """Async variant of answer_with_prompt using the model's ainvoke."""
+        model_id = self._model_for(stage)
+        try:
+            return await acall_with_retries(
+                lambda: self._ainvoke_limited(system_prompt, message, cache_prompt, model_id), self.max_retries)
         except Exception as e:
             raise Exception(f"Error calling Bedrock LLM with system prompt: {str(e)}")
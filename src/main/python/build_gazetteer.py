@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Build the binary county table read by tools.gazetteer from a Census Gazetteer TSV.
+
+Usage:
+    python src/main/python/build_gazetteer.py [SOURCE] [OUTPUT]
+
+SOURCE defaults to tools/data/counties.tsv; pass the Census county file
+(e.g. 2020_Gaz_counties_national.txt) to cover every US county.
+"""
+import argparse
+
+from tools.gazetteer import DEFAULT_SOURCE, DEFAULT_TABLE, Gazetteer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('source', nargs='?', default=DEFAULT_SOURCE)
+    parser.add_argument('output', nargs='?', default=DEFAULT_TABLE)
+    args = parser.parse_args()
+    table = Gazetteer.from_tsv(args.source)
+    table.write(args.output)
+    print(f"Wrote {len(table)} counties to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Coalescing of identical requests that are in flight at the same time.
+
+When many users ask the same question at once, only the first (the leader)
+generates a program; concurrent requests whose normalized question and system
+prompt match wait for it and then run that program themselves. If the leader
+gave up on its program (it still failed after repairs), they get its error
+instead of running the program again. Only generation is shared: each request
+executes the program in its own context, so per-user tool inputs such as
+get_user_location stay separate. Tool calls with identical arguments are
+already shared by the tool result caches (see tools.caching).
+
+Identical model calls made while running programs (e.g. call_llm prompts built
+from the same data) are coalesced the same way. Nothing is kept once a flight
+completes: this is not a cache, see program_cache for that.
+"""
+import threading
+from concurrent.futures import Future
+from types import CodeType
+from typing import Any, Callable, Hashable, Optional
+
+from program_cache import normalize_question, prompt_hash
+
+# (answer, final program or None if none ran cleanly, model calls spent generating it)
+GeneratedAnswer = tuple[str, Optional[CodeType], int]
+
+
+class RequestCoalescer:
+    """
+    Thread-safe single-flight table shared by the Apps (and threads) answering questions.
+
+    stats() reports how many requests joined an in-flight one instead of
+    starting their own, and how many upstream model calls that saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.coalesced_questions = 0
+        self.coalesced_calls = 0
+        self.saved_calls = 0
+
+    def _share(self, key: Hashable, function: Callable[[], Any]) -> tuple[Any, bool]:
+        """Run function once for all concurrent callers with key; return (result, joined another caller)."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = Future()
+                self._in_flight[key] = future
+                self.leaders += 1
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            return future.result(), True
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def program(self, question: str, system_prompt: str, generate: Callable[[], GeneratedAnswer],
+                scope: Hashable = None) -> tuple[GeneratedAnswer, bool]:
+        """
+        Generate (and run) a program once for concurrent identical questions.
+
+        Args:
+            question: The user's question; compared after normalize_question
+            system_prompt: System prompt the program is generated with
+            generate: Generates and runs the program for the leader
+            scope: Anything else the program depends on, e.g. the model id
+
+        Returns:
+            tuple[GeneratedAnswer, bool]: The leader's answer, program and model
+            call count, and whether this caller joined the leader's flight
+            (and so must run the program itself)
+        """
+        key = ('program', normalize_question(question), prompt_hash(system_prompt), scope)
+        generated, joined = self._share(key, generate)
+        if joined:
+            with self._lock:
+                self.coalesced_questions += 1
+                self.saved_calls += generated[2]
+        return generated, joined
+
+    def call(self, system_prompt: str, message: str, invoke: Callable[[], str], scope: Hashable = None) -> str:
+        """
+        Make one model call for concurrent callers sending exactly the same messages.
+
+        Args:
+            system_prompt: System prompt of the call
+            message: User message of the call
+            invoke: Makes the call for the leader (including retries)
+            scope: Anything else the response depends on, e.g. the model id
+
+        Returns:
+            str: The response text
+        """
+        response, joined = self._share(('call', system_prompt, message, scope), invoke)
+        if joined:
+            with self._lock:
+                self.coalesced_calls += 1
+                self.saved_calls += 1
+        return response
+
+    def stats(self) -> dict[str, int]:
+        """Return flight and coalescing counters and the upstream calls saved."""
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'leaders': self.leaders,
+                'coalesced_questions': self.coalesced_questions,
+                'coalesced_calls': self.coalesced_calls,
+                'saved_calls': self.saved_calls,
+            }
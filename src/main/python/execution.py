@@ -0,0 +1,114 @@
+"""
+Shared core turning raw LLM output into an answer.
+
+clean_llm_output extracts the program from a model response in one scan for
+fences, without splitting the output into lines:
+- fenced output: the python (or unlabeled) blocks are joined in order and the
+  prose around them is dropped; a block left open by a truncated response runs
+  to the end;
+- unfenced output is taken as it is;
+- a first line that only names the language ("python", "$ python") is dropped.
+
+call_entry_point executes a compiled program in a namespace and calls its
+answer_user_question. App, the executor backends and the execute_llm_output
+script all run programs through these functions.
+"""
+import re
+from types import CodeType
+from typing import Any, Callable, Optional
+
+from program_cache import compile_program
+
+ENTRY_POINT = 'answer_user_question'
+NO_FUNCTION_ERROR = f"Error: No '{ENTRY_POINT}' function found in the generated code."
+
+FENCE = '```'
+_PYTHON_LABELS = frozenset({'', 'python', 'python3', 'py'})
+# A first line that only names the language
+_LANGUAGE_LINE = re.compile(r'[ \t]*(?:python3?|>>> python|\$ python)[ \t]*(?:\n|\Z)', re.I)
+
+
+def _strip_language_line(code: str) -> str:
+    match = _LANGUAGE_LINE.match(code)
+    return code[match.end():] if match else code
+
+
+def _fenced_blocks(llm_output: str) -> list[tuple[str, str]]:
+    """Return (language label, body) of every fenced block, in one left-to-right scan."""
+    blocks = []
+    position = llm_output.find(FENCE)
+    while position >= 0:
+        line_end = llm_output.find('\n', position)
+        if line_end < 0:
+            break
+        label = llm_output[position + len(FENCE):line_end].strip().lower()
+        end = llm_output.find(FENCE, line_end + 1)
+        blocks.append((label, llm_output[line_end + 1:end if end >= 0 else len(llm_output)]))
+        if end < 0:
+            break
+        position = llm_output.find(FENCE, end + len(FENCE))
+    return blocks
+
+
+def clean_llm_output(llm_output: str) -> str:
+    """
+    Extract the Python program from raw LLM output.
+
+    Args:
+        llm_output: Raw LLM output, fenced or not, with one or more code blocks
+
+    Returns:
+        str: Program source
+    """
+    if FENCE not in llm_output:
+        return _strip_language_line(llm_output)
+    blocks = _fenced_blocks(llm_output)
+    code = [_strip_language_line(body) for label, body in blocks if label in _PYTHON_LABELS]
+    if not any(part.strip() for part in code):
+        # Only blocks in another language: they are the best guess there is
+        code = [_strip_language_line(body) for _, body in blocks]
+    return '\n'.join(code)
+
+
+def load_entry_point(code: CodeType, namespace: dict) -> Optional[Callable[..., Any]]:
+    """Execute a compiled program in namespace and return its answer_user_question, or None."""
+    exec(code, namespace)
+    return namespace.get(ENTRY_POINT)
+
+
+def call_entry_point(code: CodeType, namespace: dict, question: str) -> Any:
+    """
+    Execute a compiled program and call its answer_user_question.
+
+    Exceptions raised by the program propagate to the caller.
+
+    Args:
+        code: Compiled program
+        namespace: Globals the program runs in (tools and builtins)
+        question: The question to ask the generated function
+
+    Returns:
+        The function's result, or NO_FUNCTION_ERROR if the program does not define it
+    """
+    function = load_entry_point(code, namespace)
+    if function is None:
+        return NO_FUNCTION_ERROR
+    return function(question)
+
+
+def execute_llm_code(llm_output: str, question: str, namespace: dict) -> str:
+    """
+    Clean, compile and run LLM output in a namespace.
+
+    Args:
+        llm_output: Raw LLM output containing Python code
+        question: The question to ask the generated function
+        namespace: Globals the program runs in
+
+    Returns:
+        str: Result of the generated function, or an error message
+    """
+    try:
+        return str(call_entry_point(compile_program(clean_llm_output(llm_output)), namespace, question))
+    except Exception as e:
+        return f"Error executing LLM code: {str(e)}"
@@ -0,0 +1,300 @@
+"""
+Pluggable backends for running compiled answer_user_question programs.
+
+InProcessExecutor runs generated code with exec in the serving process (the
+original behaviour). ProcessPoolCodeExecutor runs it in a pool of pre-started
+worker processes: the compiled code and question are sent over a pipe, every
+tool call is proxied back to the parent (which owns the real tools and the
+Bedrock client), and each execution is bounded by wall-time, CPU-time and
+memory limits. A runaway program is killed together with its worker, which is
+replaced, so it can neither block the server nor hold its GIL.
+"""
+import marshal
+import multiprocessing
+import pickle
+import queue
+import sys
+import threading
+import time
+from types import CodeType
+from typing import Any, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; CPU and memory limits are skipped
+    resource = None
+
+from execution import call_entry_point
+from llm_client import calling_app
+from parallel_tools import join_tool_calls, resolve
+from repair import program_frames
+
+
+class ExecutionLimitExceeded(Exception):
+    """Raised when a generated program exceeds its time or memory limits."""
+
+
+class InProcessExecutor:
+    """Runs generated programs with exec in the calling thread."""
+
+    def run(self, app, code: CodeType, question: str) -> str:
+        """
+        Run a compiled program and call its answer_user_question function.
+
+        Exceptions raised by the program propagate to the caller.
+
+        Args:
+            app: The App whose tools and client the program uses
+            code: Compiled program
+            question: The question to ask the generated function
+
+        Returns:
+            str: Result of the generated function
+        """
+        namespace = app.tool_namespace()
+
+        # Execute the program in the namespace; call_llm reuses this App's client
+        with calling_app(app):
+            result = call_entry_point(code, namespace, question)
+
+        # Wait for any pending tool calls the result still depends on, then for
+        # the rest, so errors of calls whose results were never used surface
+        result = str(resolve(result))
+        join_tool_calls(namespace)
+        return result
+
+    def close(self) -> None:
+        pass
+
+
+def _set_cpu_limit(seconds: Optional[float]) -> None:
+    if resource is None:
+        return
+    if seconds is None:
+        soft = resource.RLIM_INFINITY
+    else:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _tool_proxy(connection, name: str):
+    def proxy(*args, **kwargs):
+        connection.send(('call', name, args, kwargs))
+        status, value = connection.recv()
+        if status == 'error':
+            raise value
+        return value
+    proxy.__name__ = name
+    return proxy
+
+
+def _describe_exception(error: BaseException) -> tuple[str, str, tuple, list[tuple[int, str]]]:
+    """Return (module, qualified type name, args, program frames) of an exception, all picklable."""
+    args = error.args
+    try:
+        pickle.dumps(args)
+    except Exception:
+        args = (str(error),)
+    error_type = type(error)
+    return error_type.__module__, error_type.__qualname__, args, program_frames(error)
+
+
+def _rebuild_exception(module: str, qualname: str, args: tuple, frames: list[tuple[int, str]]) -> Exception:
+    """
+    Recreate an exception described by _describe_exception in the parent.
+
+    The type is only looked up among modules the parent has already imported
+    (the worker runs untrusted code, so nothing is imported on its behalf).
+    Types that cannot be found or rebuilt become RuntimeError("Type: message").
+    """
+    error_type = sys.modules.get(module)
+    for part in qualname.split('.'):
+        error_type = getattr(error_type, part, None)
+    error = None
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        try:
+            error = error_type(*args)
+        except Exception:
+            error = None
+    if error is None:
+        message = str(args[0]) if len(args) == 1 else ', '.join(map(str, args))
+        error = RuntimeError(f"{qualname}: {message}")
+    error.program_frames = frames
+    return error
+
+
+def _worker_main(connection, memory_limit_bytes: Optional[int]) -> None:
+    """Worker process loop: run programs sent by the parent until told to stop."""
+    if resource is not None and memory_limit_bytes is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    while True:
+        message = connection.recv()
+        if message is None:
+            return
+        code_bytes, question, globals_spec, cpu_seconds = message
+        namespace = {'__builtins__': __builtins__}
+        for name, value in globals_spec.items():
+            namespace[name] = _tool_proxy(connection, name) if value is None else value
+        _set_cpu_limit(cpu_seconds)
+        try:
+            reply = ('done', str(call_entry_point(marshal.loads(code_bytes), namespace, question)))
+        except BaseException as e:
+            reply = ('failed', _describe_exception(e))
+        finally:
+            _set_cpu_limit(None)
+        connection.send(reply)
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_bytes: Optional[int]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, memory_limit_bytes), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+
+
+class ProcessPoolCodeExecutor:
+    """
+    Runs generated programs in a pool of sandboxed worker processes.
+
+    Tools stay in the parent: callables in the App's tool namespace are replaced
+    by proxies in the worker that send (name, args) over the pipe and wait for
+    the (picklable) result. Classes such as Weather are sent by reference.
+    """
+
+    def __init__(self,
+                 size: int = 4,
+                 wall_time_limit: Optional[float] = 30.0,
+                 cpu_time_limit: Optional[float] = 10.0,
+                 memory_limit_bytes: Optional[int] = None,
+                 start_method: str = 'spawn'):
+        """
+        Args:
+            size: Number of worker processes started up front
+            wall_time_limit: Seconds an execution may take, including tool calls
+            cpu_time_limit: CPU seconds the program itself may use
+            memory_limit_bytes: Address-space limit of each worker, or None
+            start_method: multiprocessing start method for the workers
+        """
+        self.wall_time_limit = wall_time_limit
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_bytes = memory_limit_bytes
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: list[_Worker] = []
+        self._closed = False
+        for _ in range(size):
+            self._add_worker()
+
+    def _add_worker(self) -> None:
+        worker = _Worker(self._context, self.memory_limit_bytes)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._workers.remove(worker)
+            closed = self._closed
+        if not closed:
+            self._add_worker()
+
+    @staticmethod
+    def _globals_spec(namespace: dict) -> dict[str, Any]:
+        # None marks a tool to proxy; anything else is sent to the worker as is
+        spec = {}
+        for name, value in namespace.items():
+            if name == '__builtins__':
+                continue
+            spec[name] = value if isinstance(value, type) or not callable(value) else None
+        return spec
+
+    def run(self, app, code: CodeType, question: str) -> str:
+        """
+        Run a compiled program in a worker process.
+
+        Args:
+            app: The App whose tools and client the program uses
+            code: Compiled program
+            question: The question to ask the generated function
+
+        Returns:
+            str: Result of the generated function
+
+        Raises:
+            ExecutionLimitExceeded: If the program ran out of time or memory
+            Exception: The program's exception, re-raised with the same type when the
+                parent has that type (RuntimeError otherwise), carrying program_frames
+        """
+        namespace = app.tool_namespace()
+        worker = self._idle.get()
+        # The wall-time limit starts once a worker is free, not while waiting for one
+        deadline = None if self.wall_time_limit is None else time.monotonic() + self.wall_time_limit
+        returned = False
+        try:
+            worker.connection.send((marshal.dumps(code), question, self._globals_spec(namespace), self.cpu_time_limit))
+            with calling_app(app):
+                while True:
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    if not worker.connection.poll(timeout):
+                        raise ExecutionLimitExceeded(f"Execution exceeded {self.wall_time_limit}s wall-time limit")
+                    message = worker.connection.recv()
+                    if message[0] == 'call':
+                        _, name, args, kwargs = message
+                        try:
+                            reply = ('result', resolve(namespace[name](*args, **kwargs)))
+                        except Exception as e:
+                            reply = ('error', e)
+                        try:
+                            worker.connection.send(reply)
+                        except Exception as e:
+                            # Unpicklable result or exception: report it in a form that pickles
+                            worker.connection.send(('error', RuntimeError(f"{name} returned an unpicklable value: {e}")))
+                    elif message[0] == 'done':
+                        returned = True
+                        self._idle.put(worker)
+                        return message[1]
+                    else:
+                        returned = True
+                        self._idle.put(worker)
+                        raise _rebuild_exception(*message[1])
+        except (EOFError, OSError):
+            raise ExecutionLimitExceeded("Worker process died (CPU or memory limit exceeded)")
+        finally:
+            # A worker in an unknown state (limit hit, pipe broken, any other error) is never reused
+            if not returned:
+                self._replace(worker)
+
+    def close(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
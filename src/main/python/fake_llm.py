@@ -0,0 +1,241 @@
+"""
+Offline stand-ins for ChatBedrockConverse.
+
+FakeLLM implements the subset of the chat model interface App uses (invoke,
+ainvoke, stream) so the pipeline can be exercised and benchmarked without
+Bedrock, with configurable synthetic latency. RecordingLLM wraps a real model
+and captures its responses into the fixture format FakeLLM.from_fixtures replays.
+
+Fixture files are JSON objects with:
+    programs: normalized question -> generated program (first-stage response)
+    call_llm: response returned for call_llm prompts made by the programs
+"""
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+from llm_client import DEFAULT_USER_MESSAGE, chunk_text, message_text
+from program_cache import normalize_question
+from rate_limit import estimate_tokens
+
+Responder = Callable[[str, str], Optional[str]]
+
+
+def lookup_question(table: dict[str, str], message: str) -> Optional[str]:
+    """
+    Look up a user message in a table keyed by normalized question.
+
+    A message whose last line is a known question (e.g. a session turn, which
+    sends the conversation so far before the question) matches that question.
+    """
+    response = table.get(normalize_question(message))
+    if response is None and '\n' in message:
+        response = table.get(normalize_question(message.rsplit('\n', 1)[1]))
+    return response
+
+
+def has_cache_point(messages) -> bool:
+    """Return True if the system message of a message list ends a cacheable prefix."""
+    for item in messages:
+        if item.type == 'system' and isinstance(item.content, list):
+            return any(isinstance(part, dict) and 'cachePoint' in part for part in item.content)
+    return False
+
+
+def split_messages(messages) -> tuple[str, str]:
+    """Return the (system prompt, last user message) texts of a message list."""
+    system_prompt = ''
+    message = ''
+    for item in messages:
+        if item.type == 'system':
+            system_prompt = chunk_text(item)
+        else:
+            message = chunk_text(item)
+    return system_prompt, message
+
+
+class FakeLLM:
+    """
+    Chat model double answering from a mapping or a callable.
+
+    A dict maps normalized user messages (or their last line) to responses; a callable receives
+    (system_prompt, user_message) and returns the response text.
+
+    Bedrock prompt caching is simulated: a system prompt followed by a cache
+    point is reported as a cache write the first time and a cache read after.
+    """
+
+    def __init__(self,
+                 responses: Union[dict[str, str], Responder],
+                 default: Optional[str] = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 seconds_per_token: float = 0.0,
+                 failures: Iterable[BaseException] = ()):
+        """
+        Args:
+            responses: Mapping of normalized user message to response, or a responder callable
+            default: Response for messages missing from the mapping
+            latency: Fixed seconds per call, e.g. time to first token
+            jitter: Uniform random +/- seconds added to latency
+            seconds_per_token: Additional seconds per (estimated) output token
+            failures: Exceptions raised by the first calls, in order (e.g. throttling errors)
+        """
+        if isinstance(responses, dict):
+            table = {normalize_question(key): value for key, value in responses.items()}
+
+            def respond(system_prompt: str, message: str) -> Optional[str]:
+                response = lookup_question(table, message)
+                return default if response is None else response
+
+            self.responder: Responder = respond
+        else:
+            self.responder = responses
+        self.latency = latency
+        self.jitter = jitter
+        self.seconds_per_token = seconds_per_token
+        self._failures = list(failures)
+        self._lock = threading.Lock()
+        self._cached_prompts: set[str] = set()
+        self.calls = 0
+
+    @classmethod
+    def from_fixtures(cls, path: str, **kwargs) -> 'FakeLLM':
+        """
+        Build a FakeLLM replaying a fixture file.
+
+        Args:
+            path: Path of the JSON fixture file
+            **kwargs: Latency and failure settings passed to FakeLLM
+
+        Returns:
+            FakeLLM answering the recorded questions and call_llm prompts
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+        programs = {normalize_question(question): program for question, program in fixtures['programs'].items()}
+        call_llm_response = fixtures.get('call_llm')
+
+        def responder(system_prompt: str, message: str) -> Optional[str]:
+            # call_llm sends its prompt as the system prompt with the default user message
+            if message == DEFAULT_USER_MESSAGE:
+                return call_llm_response
+            return lookup_question(programs, message)
+
+        return cls(responder, **kwargs)
+
+    def _respond(self, messages) -> tuple[dict[str, int], str]:
+        with self._lock:
+            self.calls += 1
+            failure = self._failures.pop(0) if self._failures else None
+        if failure is not None:
+            raise failure
+        system_prompt, message = split_messages(messages)
+        response = self.responder(system_prompt, message)
+        if response is None:
+            raise KeyError(f"FakeLLM has no response for: {message!r}")
+        return self._usage(system_prompt, message, response, has_cache_point(messages)), response
+
+    def _usage(self, system_prompt: str, message: str, response: str, cache_point: bool) -> dict[str, int]:
+        system_tokens = estimate_tokens(system_prompt)
+        input_tokens = system_tokens + estimate_tokens(message)
+        output_tokens = estimate_tokens(response)
+        details = {}
+        if cache_point:
+            with self._lock:
+                hit = system_prompt in self._cached_prompts
+                self._cached_prompts.add(system_prompt)
+            details = {'cache_read': system_tokens if hit else 0, 'cache_creation': 0 if hit else system_tokens}
+        usage = {
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': input_tokens + output_tokens,
+        }
+        if details:
+            usage['input_token_details'] = details
+        return usage
+
+    def _delay(self, response: str) -> float:
+        delay = self.latency + estimate_tokens(response) * self.seconds_per_token
+        if self.jitter:
+            delay += random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+    @staticmethod
+    def _message(usage: dict[str, int], response: str):
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=response, usage_metadata=usage)
+
+    def invoke(self, messages, **kwargs):
+        usage, response = self._respond(messages)
+        time.sleep(self._delay(response))
+        return self._message(usage, response)
+
+    async def ainvoke(self, messages, **kwargs):
+        import asyncio
+        usage, response = self._respond(messages)
+        await asyncio.sleep(self._delay(response))
+        return self._message(usage, response)
+
+    def stream(self, messages, **kwargs) -> Iterator:
+        from langchain_core.messages import AIMessageChunk
+        _, response = self._respond(messages)
+        words = response.split(' ')
+        delay = self._delay(response)
+        for index, word in enumerate(words):
+            time.sleep(delay / len(words))
+            text = word if index == len(words) - 1 else word + ' '
+            yield AIMessageChunk(content=[{'type': 'text', 'text': text, 'index': 0}])
+
+
+class RecordingLLM:
+    """
+    Wraps a real chat model and records its responses as replayable fixtures.
+
+    Program generations are stored under their question; the most recent
+    call_llm response is stored as the call_llm fixture.
+    """
+
+    def __init__(self, llm: Any, path: str):
+        """
+        Args:
+            llm: The chat model to wrap, e.g. ChatBedrockConverse
+            path: Fixture file written by save()
+        """
+        self.llm = llm
+        self.path = path
+        self._lock = threading.Lock()
+        self.fixtures: dict[str, Any] = {'programs': {}, 'call_llm': None}
+
+    def _record(self, messages, response: str) -> None:
+        _, message = split_messages(messages)
+        with self._lock:
+            if message == DEFAULT_USER_MESSAGE:
+                self.fixtures['call_llm'] = response
+            else:
+                self.fixtures['programs'][message] = response
+
+    def invoke(self, messages, **kwargs):
+        result = self.llm.invoke(messages, **kwargs)
+        self._record(messages, message_text(result))
+        return result
+
+    async def ainvoke(self, messages, **kwargs):
+        result = await self.llm.ainvoke(messages, **kwargs)
+        self._record(messages, message_text(result))
+        return result
+
+    def stream(self, messages, **kwargs) -> Iterator:
+        parts = []
+        for chunk in self.llm.stream(messages, **kwargs):
+            parts.append(chunk_text(chunk))
+            yield chunk
+        self._record(messages, ''.join(parts))
+
+    def save(self) -> None:
+        """Write the recorded fixtures to the fixture file."""
+        with self._lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.fixtures, f, indent=2, ensure_ascii=False)
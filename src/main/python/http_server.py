@@ -0,0 +1,325 @@
+"""
+HTTP/JSON front end serving App.answer with a bounded worker pool.
+
+Connections are handled by a standard-library ThreadingHTTPServer; answers run
+on a fixed pool of worker threads. At most `workers` questions run at once
+and at most `queue_size` more wait for a worker. Beyond that a request is
+refused at once with 429 and a Retry-After header instead of piling up.
+A request still waiting when its timeout expires is cancelled before it
+starts; one already running cannot be interrupted, so the client gets 504 and
+the result is dropped (bound programs with an executor wall-time limit).
+
+Endpoints:
+    POST /answer   {"question": "..."} -> {"answer": "..."}
+    GET  /healthz  200 while the process serves requests
+    GET  /readyz   200 once the App is warm, 503 while warming up or draining
+    GET  /metrics  queue depth, in-flight requests, outcome counters, latency
+                   histograms and the App's token usage, as JSON
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_REQUEST_TIMEOUT = 60.0
+MAX_BODY_BYTES = 64 * 1024
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class QueueFull(Exception):
+    """Raised when every worker is busy and the request queue is full."""
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Add one observation."""
+        milliseconds = seconds * 1000
+        index = next((i for i, bound in enumerate(self.buckets_ms) if milliseconds <= bound), len(self.buckets_ms))
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += milliseconds
+
+    def stats(self) -> dict[str, Any]:
+        """Return the count, mean and per-bucket counts keyed by upper bound ("inf" for the last)."""
+        with self._lock:
+            bounds = [str(bound) for bound in self.buckets_ms] + ['inf']
+            return {
+                'count': self.count,
+                'mean_ms': self.total_ms / self.count if self.count else 0.0,
+                'buckets_ms': dict(zip(bounds, self._counts)),
+            }
+
+
+class AnswerPool:
+    """Fixed pool of worker threads answering questions, with a bounded queue in front."""
+
+    def __init__(self, answer: Callable[[str], str], workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            answer: Answers one question, e.g. App.answer
+            workers: Questions answered at the same time
+            queue_size: Questions allowed to wait for a worker
+        """
+        self.answer = answer
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-answer')
+        self._capacity = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.in_flight = 0
+        self.queue_wait = LatencyHistogram()
+
+    def submit(self, question: str) -> Future:
+        """
+        Queue a question.
+
+        Raises:
+            QueueFull: If workers + queue_size questions are already pending
+        """
+        if not self._capacity.acquire(blocking=False):
+            raise QueueFull(f"{self.workers} workers busy and {self.queue_size} requests queued")
+        with self._lock:
+            self.pending += 1
+        queued = time.perf_counter()
+        try:
+            future = self._executor.submit(self._run, question, queued)
+        except BaseException:
+            self._release()
+            raise
+        # A request cancelled while queued never reaches _run
+        future.add_done_callback(lambda done: self._release() if done.cancelled() else None)
+        return future
+
+    def _run(self, question: str, queued: float) -> str:
+        self.queue_wait.observe(time.perf_counter() - queued)
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self.answer(question)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self.pending -= 1
+        self._capacity.release()
+
+    def stats(self) -> dict[str, int]:
+        """Return queue depth, in-flight questions and pool size."""
+        with self._lock:
+            return {
+                'queue_depth': self.pending - self.in_flight,
+                'in_flight': self.in_flight,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+            }
+
+    def shutdown(self) -> None:
+        """Cancel queued questions and wait for running ones."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _AnswerHandler(BaseHTTPRequestHandler):
+
+    server: 'HttpAppServer'
+
+    def log_message(self, format: str, *args) -> None:
+        # Request outcomes are counted in /metrics instead of logged per request
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        server = self.server
+        if self.path == '/healthz':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/readyz':
+            ready = server.is_ready()
+            self._send_json(200 if ready else 503, {'status': 'ready' if ready else 'not ready'})
+        elif self.path == '/metrics':
+            self._send_json(200, server.metrics())
+        else:
+            self._send_json(404, {'error': f"no such endpoint: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != '/answer':
+            self._send_json(404, {'error': f"no such endpoint: {self.path}"})
+            return
+        try:
+            question = self._read_question()
+        except ValueError as e:
+            self.server.count('requests', 'invalid')
+            self._send_json(400, {'error': str(e)})
+            return
+        status, body, headers = self.server.handle_answer(question)
+        self._send_json(status, body, headers)
+
+    def _read_question(self) -> str:
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            raise ValueError("invalid Content-Length")
+        if length < 0:
+            # rfile.read(-1) would block until the client closes the connection
+            raise ValueError("invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"request body over {MAX_BODY_BYTES} bytes")
+        try:
+            question = json.loads(self.rfile.read(length))['question']
+        except (ValueError, KeyError, TypeError):
+            raise ValueError('expected a JSON body {"question": "..."}')
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError('"question" must be a non-empty string')
+        return question
+
+
+class HttpAppServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering questions with one shared App on an AnswerPool."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], app, workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT):
+        """
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            app: The App answering the questions
+            workers: Questions answered at the same time
+            queue_size: Questions allowed to wait for a worker before requests get 429
+            request_timeout: Seconds a request may take, queueing included, before it gets 504
+        """
+        self.app = app
+        self.pool = AnswerPool(app.answer, workers, queue_size)
+        self.request_timeout = request_timeout
+        # Set once the App is warm (see serve_http); cleared again while draining
+        self.ready = threading.Event()
+        self.draining = False
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'answered': 0, 'rejected': 0, 'timed_out': 0, 'failed': 0, 'invalid': 0}
+        self.latency = LatencyHistogram()
+        super().__init__(address, _AnswerHandler)
+
+    def is_ready(self) -> bool:
+        """True once warmed up and not draining."""
+        return self.ready.is_set() and not self.draining
+
+    def count(self, *names: str) -> None:
+        """Increment request counters."""
+        with self._lock:
+            for name in names:
+                self.counters[name] += 1
+
+    def handle_answer(self, question: str) -> tuple[int, dict, Optional[dict[str, str]]]:
+        """Answer one /answer request; return (status, JSON body, extra headers)."""
+        self.count('requests')
+        if self.draining:
+            self.count('rejected')
+            return 503, {'error': 'server is shutting down'}, None
+        started = time.perf_counter()
+        try:
+            future = self.pool.submit(question)
+        except QueueFull as e:
+            self.count('rejected')
+            return 429, {'error': str(e)}, {'Retry-After': '1'}
+        try:
+            answer = future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            # Still queued: never runs; already running: the result is dropped
+            future.cancel()
+            self.count('timed_out')
+            return 504, {'error': f"no answer within {self.request_timeout} seconds"}, None
+        except Exception as e:
+            self.count('failed')
+            return 500, {'error': str(e)}, None
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+        self.count('answered')
+        return 200, {'answer': answer}, None
+
+    def metrics(self) -> dict[str, Any]:
+        """Return pool, request counter, latency and token usage metrics."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **self.pool.stats(),
+            **counters,
+            'latency': self.latency.stats(),
+            'queue_wait': self.pool.queue_wait.stats(),
+            'usage': self.app.usage.stats(),
+        }
+
+    def drain(self) -> None:
+        """Stop accepting questions (503, not ready), then wait for the running ones."""
+        self.draining = True
+        self.pool.shutdown()
+
+    def server_close(self) -> None:
+        self.drain()
+        super().server_close()
+
+
+def serve_http(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+               app_factory: Optional[Callable[[], object]] = None, workers: int = DEFAULT_WORKERS,
+               queue_size: int = DEFAULT_QUEUE_SIZE,
+               request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT) -> None:
+    """
+    Serve App.answer over HTTP until interrupted.
+
+    The App is warmed up in the background: /healthz answers at once and
+    /readyz turns ready when the warm-up finishes.
+
+    Args:
+        host: Interface to listen on
+        port: TCP port to listen on
+        app_factory: Callable returning the App to serve (defaults to App())
+        workers: Questions answered at the same time
+        queue_size: Questions allowed to wait for a worker
+        request_timeout: Seconds a request may take before it gets 504
+    """
+    from socket_server import warm_up
+    if app_factory is None:
+        from app import App
+        app_factory = App
+    app = app_factory()
+
+    with HttpAppServer((host, port), app, workers, queue_size, request_timeout) as server:
+        def warm() -> None:
+            warm_up(app)
+            server.ready.set()
+
+        threading.Thread(target=warm, name='warm-up', daemon=True).start()
+        print(f"Serving on http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
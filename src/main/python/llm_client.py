@@ -0,0 +1,380 @@
+"""
+Process-wide registry of Bedrock clients shared by App and the tool implementations.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+DEFAULT_MODEL_ID = 'us.anthropic.claude-sonnet-4-20250514-v1:0'
+# Smaller, faster model tried first by routing.ModelRouter
+FAST_MODEL_ID = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
+DEFAULT_REGION = 'us-east-1'
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_MAX_TOKENS = 1000
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_USER_MESSAGE = "Provide answer to my request, given the context above."
+# Converse content block marking the end of a cacheable prompt prefix
+CACHE_POINT = {'cachePoint': {'type': 'default'}}
+
+# The App currently executing generated code, so that call_llm can reuse its client
+_calling_app: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar('calling_app', default=None)
+# Receives streamed call_llm text while App.stream_answer is running: a one-item
+# list emptied by the call that claims it, so at most one call_llm per answer streams
+_stream_sink: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar('stream_sink', default=None)
+_claim_lock = threading.Lock()
+
+
+class LLMClientRegistry:
+    """
+    Thread-safe cache of boto3 clients and chat models.
+
+    All clients are created from a single boto3 session and share a connection
+    pool sized by max_pool_connections, so repeated App/call_llm usage reuses
+    established TLS connections instead of opening new ones.
+    """
+
+    def __init__(self, max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS):
+        self.max_pool_connections = max_pool_connections
+        self._lock = threading.Lock()
+        self._session = None
+        self._boto_clients: dict[tuple[str, str], Any] = {}
+        self._chat_models: dict[tuple, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get_session(self):
+        # Caller must hold self._lock; boto3 sessions are not thread-safe
+        if self._session is None:
+            import boto3
+            self._session = boto3.session.Session()
+        return self._session
+
+    def _create_boto_client(self, service: str, region: str):
+        from botocore.config import Config
+        config = Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=True,
+        )
+        return self._get_session().client(service, region_name=region, config=config)
+
+    def get_boto_client(self, service: str, region: str = DEFAULT_REGION):
+        """
+        Return a shared boto3 client for the given service and region.
+
+        Args:
+            service: boto3 service name, e.g. "bedrock" or "bedrock-runtime"
+            region: AWS region name
+
+        Returns:
+            A boto3 client, created on first use
+        """
+        key = (service, region)
+        with self._lock:
+            client = self._boto_clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            client = self._create_boto_client(service, region)
+            self._boto_clients[key] = client
+            return client
+
+    def get_chat_model(self,
+                       model_id: str = DEFAULT_MODEL_ID,
+                       region: str = DEFAULT_REGION,
+                       temperature: float = DEFAULT_TEMPERATURE,
+                       max_tokens: int = DEFAULT_MAX_TOKENS):
+        """
+        Return a shared ChatBedrockConverse for the given model settings.
+
+        Args:
+            model_id: Bedrock model identifier
+            region: AWS region name
+            temperature: Sampling temperature
+            max_tokens: Maximum number of tokens to generate
+
+        Returns:
+            ChatBedrockConverse backed by the pooled bedrock-runtime client
+        """
+        key = (model_id, region, temperature, max_tokens)
+        with self._lock:
+            llm = self._chat_models.get(key)
+            if llm is not None:
+                self.hits += 1
+                return llm
+            self.misses += 1
+        # Build outside the lock; get_boto_client takes it again
+        runtime_client = self.get_boto_client("bedrock-runtime", region)
+        from langchain_aws import ChatBedrockConverse
+        llm = ChatBedrockConverse(
+            model=model_id,
+            region_name=region,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            client=runtime_client,
+        )
+        with self._lock:
+            # Another thread may have won the race; keep the first instance
+            return self._chat_models.setdefault(key, llm)
+
+    def stats(self) -> dict[str, int]:
+        """Return pool hit/miss counters and the number of cached clients."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'boto_clients': len(self._boto_clients),
+                'chat_models': len(self._chat_models),
+            }
+
+    def clear(self) -> None:
+        """Drop all cached clients and reset the counters."""
+        with self._lock:
+            self._session = None
+            self._boto_clients.clear()
+            self._chat_models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_registry = LLMClientRegistry()
+
+
+def get_registry() -> LLMClientRegistry:
+    """Return the process-wide client registry."""
+    return _registry
+
+
+def get_calling_app() -> Optional[Any]:
+    """Return the App whose generated code is currently executing, if any."""
+    return _calling_app.get()
+
+
+@contextmanager
+def calling_app(app: Any) -> Iterator[None]:
+    """
+    Make app reachable from tool implementations for the duration of the block.
+
+    Args:
+        app: The App executing generated code
+    """
+    token = _calling_app.set(app)
+    try:
+        yield
+    finally:
+        _calling_app.reset(token)
+
+
+def get_stream_sink() -> Optional[Callable[[str], None]]:
+    """Return the callback receiving streamed LLM text, if streaming is active and not yet claimed."""
+    holder = _stream_sink.get()
+    return holder[0] if holder else None
+
+
+def claim_stream_sink() -> Optional[Callable[[str], None]]:
+    """Return the stream callback for the one call that streams the answer; None once claimed."""
+    holder = _stream_sink.get()
+    if not holder:
+        return None
+    with _claim_lock:
+        return holder.pop() if holder else None
+
+
+@contextmanager
+def streaming_to(sink: Optional[Callable[[str], None]]) -> Iterator[None]:
+    """
+    Stream call_llm output to sink for the duration of the block.
+
+    Only the first call_llm that claims the sink streams (see claim_stream_sink);
+    threads started with a copy of this context share that claim.
+
+    Args:
+        sink: Callback invoked with each text chunk as it arrives, or None to stop streaming in the block
+    """
+    token = _stream_sink.set([sink] if sink is not None else None)
+    try:
+        yield
+    finally:
+        _stream_sink.reset(token)
+
+
+def forward_stream(chunks: Iterable[str], sink: Callable[[str], None]) -> str:
+    """
+    Pass each chunk to sink and return the concatenated text.
+
+    Args:
+        chunks: Text chunks, e.g. from stream_with_prompt
+        sink: Callback receiving each chunk
+
+    Returns:
+        str: The full streamed text
+    """
+    parts = []
+    for chunk in chunks:
+        sink(chunk)
+        parts.append(chunk)
+    return ''.join(parts)
+
+
+def chunk_text(chunk: Any) -> str:
+    """
+    Extract the text of a streamed message chunk.
+
+    Converse chunks carry content as a list of blocks such as
+    {'type': 'text', 'text': '...'}; only text blocks are kept.
+    """
+    content = getattr(chunk, 'content', chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, str):
+                parts.append(part)
+            elif isinstance(part, dict) and part.get('type', 'text') == 'text':
+                parts.append(part.get('text', ''))
+        return ''.join(parts)
+    return ''
+
+
+def message_text(response: Any) -> str:
+    """
+    Extract the text content from a chat model response.
+
+    Args:
+        response: Message returned by the chat model
+
+    Returns:
+        str: Response content as a single string
+    """
+    if hasattr(response, 'content'):
+        content = response.content
+        if isinstance(content, str):
+            return content
+        elif isinstance(content, list):
+            # Handle list of content parts
+            return " ".join(str(part) for part in content)
+        else:
+            return str(content)
+    else:
+        return str(response)
+
+
+def build_messages(system_prompt: str, message: str = DEFAULT_USER_MESSAGE, cache_system_prompt: bool = False) -> list:
+    """
+    Build the system + human message pair sent to the chat model.
+
+    Args:
+        system_prompt: System prompt text
+        message: User message text
+        cache_system_prompt: Follow the system prompt with a Bedrock cache point,
+            so later requests with the same system prompt read it from the prompt cache
+
+    Returns:
+        list: LangChain messages
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+    if cache_system_prompt:
+        system_content = [{'type': 'text', 'text': system_prompt}, CACHE_POINT]
+    else:
+        system_content = system_prompt
+    return [
+        SystemMessage(content=system_content),
+        HumanMessage(content=message)
+    ]
+
+
+class UsageStats:
+    """
+    Thread-safe totals of the token usage reported by chat model responses.
+
+    input_tokens includes tokens read from and written to the prompt cache, as
+    in LangChain's usage_metadata, so cache_hit_rate is the share of all input
+    tokens that were served from the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def record(self, response: Any) -> None:
+        """Add the usage_metadata of a response; responses without it are ignored."""
+        usage = getattr(response, 'usage_metadata', None)
+        if not usage:
+            return
+        details = usage.get('input_token_details') or {}
+        cache_read = details.get('cache_read', 0)
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += usage.get('input_tokens', 0)
+            self.output_tokens += usage.get('output_tokens', 0)
+            self.cache_read_tokens += cache_read
+            self.cache_write_tokens += details.get('cache_creation', 0)
+            if cache_read:
+                self.cache_hits += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return the totals plus request and token cache hit rates."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'cache_read_tokens': self.cache_read_tokens,
+                'cache_write_tokens': self.cache_write_tokens,
+                'cache_hit_rate': self.cache_hits / self.requests if self.requests else 0.0,
+                'cache_token_rate': self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Reset all totals."""
+        with self._lock:
+            self.requests = self.cache_hits = 0
+            self.input_tokens = self.output_tokens = 0
+            self.cache_read_tokens = self.cache_write_tokens = 0
+
+
+def invoke_with_prompt(llm: Any, system_prompt: str, message: str = DEFAULT_USER_MESSAGE) -> str:
+    """
+    Invoke a chat model with a system prompt and a single user message.
+
+    Args:
+        llm: Chat model to invoke
+        system_prompt: System prompt text
+        message: User message text
+
+    Returns:
+        str: Text of the model response
+    """
+    return message_text(llm.invoke(build_messages(system_prompt, message)))
+
+
+def stream_with_prompt(llm: Any, system_prompt: str, message: str = DEFAULT_USER_MESSAGE,
+                       cache_system_prompt: bool = False) -> Iterator[str]:
+    """
+    Stream a chat model response for a system prompt and a single user message.
+
+    Args:
+        llm: Chat model to stream from
+        system_prompt: System prompt text
+        message: User message text
+        cache_system_prompt: Mark the system prompt as a Bedrock cache point
+
+    Yields:
+        str: Non-empty text chunks as they arrive
+    """
+    for chunk in llm.stream(build_messages(system_prompt, message, cache_system_prompt)):
+        text = chunk_text(chunk)
+        if text:
+            yield text
+
+
+async def ainvoke_with_prompt(llm: Any, system_prompt: str, message: str = DEFAULT_USER_MESSAGE) -> str:
+    """Async variant of invoke_with_prompt using the model's ainvoke."""
+    return message_text(await llm.ainvoke(build_messages(system_prompt, message)))
@@ -1,25 +1,68 @@
 """
 Main application module for llm-tool-calling.
 """
+import argparse
+import os
 import sys
-from app import App
+
+from socket_server import DEFAULT_SOCKET_PATH, SOCKET_ENV_VAR, ask, serve
+
+
+def print_answer(chunks) -> None:
+    """Print answer chunks as they arrive."""
+    prefix = "Answer: "
+    for chunk in chunks:
+        print(prefix + chunk, end="", flush=True)
+        prefix = ""
+    print()
 
 
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="Answer a question with code-first tool calling.")
+    parser.add_argument('question', nargs=argparse.REMAINDER,
+                        help="question to answer; put -- before a question starting with '-'")
+    parser.add_argument('--serve', nargs='?', const=DEFAULT_SOCKET_PATH, metavar='SOCKET',
+                        help="keep a warm App running and answer questions sent to SOCKET")
+    parser.add_argument('--socket', default=os.environ.get(SOCKET_ENV_VAR), metavar='SOCKET',
+                        help=f"ask a server started with --serve (default: ${SOCKET_ENV_VAR})")
+    parser.add_argument('--http', nargs='?', const='8080', metavar='[HOST:]PORT',
+                        help="serve POST /answer over HTTP (default 127.0.0.1:8080)")
+    parser.add_argument('--workers', type=int, default=8, help="with --http: questions answered at once")
+    parser.add_argument('--queue-size', type=int, default=64, help="with --http: requests waiting before 429")
+    parser.add_argument('--request-timeout', type=float, default=60.0, help="with --http: seconds before 504")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    if args.http:
+        from http_server import DEFAULT_HOST, serve_http
+        host, _, port = args.http.rpartition(':')
+        serve_http(host or DEFAULT_HOST, int(port), workers=args.workers, queue_size=args.queue_size,
+                   request_timeout=args.request_timeout)
+        return
+
     # Get question from command line args or use default
-    if len(sys.argv) > 1:
-        question = " ".join(sys.argv[1:])
+    words = args.question[1:] if args.question[:1] == ['--'] else args.question
+    if words:
+        question = " ".join(words)
     else:
         question = "what should I wear today?"
-    
-    # Create and run the app
-    app = App()
-    answer = app.answer(question)
-    print(f"Answer: {answer}")
 
-    
- 
+    # A warm server answers without this process importing langchain or boto3
+    if args.socket and os.path.exists(args.socket):
+        try:
+            print_answer(ask(question, args.socket))
+            return
+        except ConnectionRefusedError:
+            print(f"No server listening on {args.socket}, answering locally", file=sys.stderr)
+
+    # Create and run the app, printing the answer as it streams in
+    from app import App
+    app = App()
+    print_answer(app.stream_answer(question))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,282 @@
+"""
+Parallel execution of independent tool calls made by generated programs.
+
+Tool functions are wrapped in proxies that submit the call to a thread pool and
+immediately return a ToolFuture. The generated program keeps running until it
+actually uses a value (unpacks it, reads an attribute, formats it, ...), at
+which point only that value is waited for. A ToolFuture passed as an argument
+to another tool is chained rather than waited on, so dependent calls start as
+soon as their inputs are ready and wall-clock time follows the longest
+dependency chain instead of the total number of calls.
+
+This changes when tool errors and values are seen by the program:
+- a tool's exception is raised where its result is first used, not at the
+  call, so a try/except around the call alone does not catch it;
+- identity checks such as `result is None` see the ToolFuture, not the value.
+App describes this in the system prompt and runs programs that use try or
+`is` comparisons without the runner (see program_analysis). Before a program's
+answer is returned, join_tool_calls waits for every call it started and
+raises the first error the program never saw, so failures of results that
+were never used are not dropped.
+"""
+import contextvars
+import operator
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+DEFAULT_MAX_WORKERS = 16
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool used for tool calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS,
+                                           thread_name_prefix='tool-call')
+        return _executor
+
+
+class ToolFuture:
+    """
+    Placeholder for the result of a tool call that may still be running.
+
+    Behaves like the eventual value: any use of it blocks until the call has
+    completed and then forwards the operation to the result.
+    """
+    __slots__ = ('_future', '_runner')
+
+    def __init__(self, future: Future, runner: Optional['ParallelToolRunner'] = None):
+        object.__setattr__(self, '_future', future)
+        object.__setattr__(self, '_runner', runner)
+
+    def result(self) -> Any:
+        """Wait for the tool call and return its value (or raise its error)."""
+        try:
+            return self._future.result()
+        except BaseException as e:
+            if self._runner is not None:
+                # The program saw this error; join() does not raise it again
+                self._runner._seen(e)
+            raise
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    @property
+    def __class__(self):
+        # Lets isinstance(value, Weather) work on an unresolved value
+        return type(self.result())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.result(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.result(), name, value)
+
+    def __iter__(self):
+        return iter(self.result())
+
+    def __repr__(self) -> str:
+        return repr(self.result())
+
+    def __str__(self) -> str:
+        return str(self.result())
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.result(), format_spec)
+
+    def __bool__(self) -> bool:
+        return bool(self.result())
+
+    def __hash__(self) -> int:
+        return hash(self.result())
+
+
+def _swap(function: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    return lambda value, other: function(other, value)
+
+
+def _forward(function: Callable[..., Any]) -> Callable[..., Any]:
+    def method(self, *args):
+        return function(self.result(), *(resolve(arg) for arg in args))
+    return method
+
+
+_FORWARDED_OPERATIONS = {
+    '__len__': len, '__contains__': operator.contains,
+    '__getitem__': operator.getitem, '__float__': float, '__int__': int,
+    '__index__': operator.index, '__round__': round, '__abs__': abs,
+    '__neg__': operator.neg, '__pos__': operator.pos,
+    '__eq__': operator.eq, '__ne__': operator.ne, '__lt__': operator.lt,
+    '__le__': operator.le, '__gt__': operator.gt, '__ge__': operator.ge,
+    '__add__': operator.add, '__radd__': _swap(operator.add),
+    '__sub__': operator.sub, '__rsub__': _swap(operator.sub),
+    '__mul__': operator.mul, '__rmul__': _swap(operator.mul),
+    '__truediv__': operator.truediv, '__rtruediv__': _swap(operator.truediv),
+    '__floordiv__': operator.floordiv, '__rfloordiv__': _swap(operator.floordiv),
+    '__mod__': operator.mod, '__rmod__': _swap(operator.mod),
+    '__pow__': operator.pow, '__rpow__': _swap(operator.pow),
+}
+
+for _name, _function in _FORWARDED_OPERATIONS.items():
+    setattr(ToolFuture, _name, _forward(_function))
+
+
+def resolve(value: Any) -> Any:
+    """
+    Replace ToolFutures in value (including inside lists, tuples and dicts) with their results.
+
+    Args:
+        value: Any value, possibly containing ToolFutures
+
+    Returns:
+        The value with every ToolFuture resolved
+    """
+    if type(value) is ToolFuture:
+        return resolve(value.result())
+    if type(value) in (list, tuple, set):
+        return type(value)(resolve(item) for item in value)
+    if type(value) is dict:
+        return {resolve(key): resolve(item) for key, item in value.items()}
+    return value
+
+
+def _pending_futures(value: Any, found: list[Future]) -> list[Future]:
+    if type(value) is ToolFuture:
+        found.append(value._future)
+    elif type(value) in (list, tuple, set):
+        for item in value:
+            _pending_futures(item, found)
+    elif type(value) is dict:
+        for key, item in value.items():
+            _pending_futures(key, found)
+            _pending_futures(item, found)
+    return found
+
+
+class ParallelToolRunner:
+    """
+    Wraps tool functions so that calls run concurrently on a thread pool.
+
+    Calls whose arguments are still pending are not submitted until those
+    arguments complete, so no pool thread ever blocks waiting on another call.
+    """
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self.executor = executor or get_executor()
+        self._lock = threading.Lock()
+        self._futures: list[Future] = []
+        self._seen_errors: list[BaseException] = []
+
+    def _seen(self, error: BaseException) -> None:
+        with self._lock:
+            self._seen_errors.append(error)
+
+    def _track(self, future: Future) -> ToolFuture:
+        with self._lock:
+            self._futures.append(future)
+        return ToolFuture(future, self)
+
+    def join(self) -> None:
+        """
+        Wait for every call submitted so far.
+
+        Raises:
+            The first error (in call order) that the program did not already get from a ToolFuture
+        """
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            error = future.exception()
+            if error is None:
+                continue
+            with self._lock:
+                seen = any(error is seen_error for seen_error in self._seen_errors)
+            if not seen:
+                raise error
+
+    def submit(self, function: Callable[..., Any], *args, **kwargs) -> ToolFuture:
+        """
+        Schedule function(*args, **kwargs) once all ToolFuture arguments are ready.
+
+        Args:
+            function: Tool implementation to call
+            *args: Positional arguments, may contain ToolFutures
+            **kwargs: Keyword arguments, may contain ToolFutures
+
+        Returns:
+            ToolFuture for the call's result
+        """
+        # Tool threads see the caller's context (e.g. the calling App for call_llm)
+        context = contextvars.copy_context()
+        outer: Future = Future()
+
+        def run():
+            try:
+                outer.set_result(context.run(function, *resolve(args), **resolve(kwargs)))
+            except BaseException as e:
+                outer.set_exception(e)
+
+        dependencies = _pending_futures((args, kwargs), [])
+        if not dependencies:
+            self.executor.submit(run)
+            return self._track(outer)
+
+        remaining = [len(dependencies)]
+        lock = threading.Lock()
+
+        def on_dependency_done(dependency: Future):
+            error = dependency.exception()
+            with lock:
+                if outer.done():
+                    return
+                if error is not None:
+                    # A failed input fails the dependent call without running it
+                    outer.set_exception(error)
+                    return
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                self.executor.submit(run)
+
+        for dependency in dependencies:
+            dependency.add_done_callback(on_dependency_done)
+        return self._track(outer)
+
+    def wrap(self, function: Callable[..., Any]) -> Callable[..., ToolFuture]:
+        """
+        Return a proxy for function that schedules calls instead of running them inline.
+
+        Args:
+            function: Tool implementation to wrap
+
+        Returns:
+            Callable with the same signature returning a ToolFuture
+        """
+        def proxy(*args, **kwargs):
+            return self.submit(function, *args, **kwargs)
+        proxy.__name__ = getattr(function, '__name__', 'tool')
+        proxy.__doc__ = getattr(function, '__doc__', None)
+        proxy.tool_runner = self
+        return proxy
+
+
+def join_tool_calls(namespace: dict) -> None:
+    """
+    Wait for every tool call started through the runners wrapping tools in namespace.
+
+    Raises:
+        The first tool error the program did not see (see ParallelToolRunner.join)
+    """
+    runners = {}
+    for value in namespace.values():
+        runner = getattr(value, 'tool_runner', None)
+        if isinstance(runner, ParallelToolRunner):
+            runners[id(runner)] = runner
+    for runner in runners.values():
+        runner.join()
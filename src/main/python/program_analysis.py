@@ -0,0 +1,354 @@
+"""
+Static analysis of generated programs before they are executed.
+
+One AST pass over the cleaned source finds:
+- programs whose answer_user_question only returns a literal, which App answers
+  without building a tool namespace or calling the executor;
+- imports, names and attributes the policy forbids (a name only where it can
+  reach the builtin, not a function local shadowing it), and while loops that
+  can never exit, so the program is rejected (and repaired) before exec;
+- how often each global name is called and which calls sit inside loops, so
+  App knows how many tool calls to expect before running the program;
+- whether the program catches exceptions or compares with `is`, which only
+  behave as written when tool results are not deferred (see parallel_tools);
+- which calls put their result straight into the returned answer, so
+  App.stream_answer only streams call_llm text that is part of the answer.
+
+Results are cached by code object (code objects hash and compare by content),
+so a program seen before costs one dictionary lookup.
+"""
+import ast
+import contextvars
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import CodeType
+from typing import Iterable, Iterator, Optional
+
+ANALYSIS_CACHE_SIZE = 1024
+
+DEFAULT_FORBIDDEN_MODULES = frozenset({
+    'builtins', 'ctypes', 'gc', 'importlib', 'inspect', 'marshal', 'multiprocessing', 'os', 'pathlib',
+    'pickle', 'shutil', 'signal', 'socket', 'subprocess', 'sys', 'threading',
+})
+DEFAULT_FORBIDDEN_NAMES = frozenset({
+    '__import__', 'breakpoint', 'compile', 'eval', 'exec', 'globals', 'input', 'locals', 'open', 'vars',
+})
+
+_active: contextvars.ContextVar[Optional['ProgramAnalysis']] = contextvars.ContextVar('program_analysis', default=None)
+_lock = threading.Lock()
+_analyses: OrderedDict[tuple[CodeType, 'ProgramPolicy'], 'ProgramAnalysis'] = OrderedDict()
+
+
+class ProgramRejected(Exception):
+    """Raised for a program the policy does not allow to run."""
+
+
+class ProgramPolicy:
+    """What generated programs may import and reference."""
+
+    def __init__(self, forbidden_modules: Iterable[str] = DEFAULT_FORBIDDEN_MODULES,
+                 forbidden_names: Iterable[str] = DEFAULT_FORBIDDEN_NAMES,
+                 allow_dunder_attributes: bool = False):
+        """
+        Args:
+            forbidden_modules: Top-level packages that may not be imported
+            forbidden_names: Global names (mostly builtins) that may not be referenced
+            allow_dunder_attributes: Allow attributes such as __class__ or __globals__
+        """
+        self.forbidden_modules = frozenset(forbidden_modules)
+        self.forbidden_names = frozenset(forbidden_names)
+        self.allow_dunder_attributes = allow_dunder_attributes
+
+
+DEFAULT_POLICY = ProgramPolicy()
+
+
+def current_analysis() -> Optional['ProgramAnalysis']:
+    """Return the analysis of the program running in this context, if any."""
+    return _active.get()
+
+
+class ProgramAnalysis:
+    """Facts about one program, established without running it."""
+
+    __slots__ = ('violations', 'constant_result', 'calls', 'looped_calls', 'referenced', 'needs_eager_results',
+                 'returned_calls')
+
+    def __init__(self, violations: tuple[str, ...], constant_result: Optional[str], calls: dict[str, int],
+                 looped_calls: frozenset[str], referenced: frozenset[str], needs_eager_results: bool = False,
+                 returned_calls: frozenset[str] = frozenset()):
+        """
+        Args:
+            violations: Policy violations, e.g. "import of 'os' (line 1)"
+            constant_result: What answer_user_question returns if it only returns a literal, else None
+            calls: Call sites per called global name
+            looped_calls: Called names with a call site inside a loop or comprehension
+            referenced: Every name the program loads
+            needs_eager_results: The program has try statements or `is` comparisons, so
+                tool results must be values at the call rather than ToolFutures
+            returned_calls: Names called directly in a return expression of answer_user_question
+                (not as an argument of another call)
+        """
+        self.violations = violations
+        self.constant_result = constant_result
+        self.calls = calls
+        self.looped_calls = looped_calls
+        self.referenced = referenced
+        self.needs_eager_results = needs_eager_results
+        self.returned_calls = returned_calls
+
+    def check(self) -> None:
+        """Raise ProgramRejected if the program violates the policy."""
+        if self.violations:
+            raise ProgramRejected("Program rejected: " + "; ".join(self.violations))
+
+    def estimated_calls(self, names: Iterable[str]) -> int:
+        """Number of call sites of the given names (each call in a loop counts once)."""
+        return sum(self.calls.get(name, 0) for name in names)
+
+    def answer_call(self, name: str) -> bool:
+        """True if the program calls name exactly once, outside loops, with the result going into its answer."""
+        return self.calls.get(name) == 1 and name not in self.looped_calls and name in self.returned_calls
+
+    def calls_may_overlap(self, names: Iterable[str]) -> bool:
+        """True if the program may call the given names more than once, so running them concurrently can help."""
+        names = list(names)
+        return self.estimated_calls(names) > 1 or any(name in self.looped_calls for name in names)
+
+    @contextmanager
+    def active(self) -> Iterator['ProgramAnalysis']:
+        """Make this analysis visible to App.tool_namespace for the duration of the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+
+def _may_exit(body: list[ast.stmt]) -> bool:
+    # Any break, return or raise counts, even one that only leaves a nested loop:
+    # a loop is only rejected when it certainly never exits
+    return any(isinstance(node, (ast.Break, ast.Return, ast.Raise))
+               for statement in body for node in ast.walk(statement))
+
+
+_LOOPS = (ast.For, ast.AsyncFor, ast.While, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+_TRY = (ast.Try, ast.TryStar) if hasattr(ast, 'TryStar') else (ast.Try,)
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+_COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+def _bound_names(body: list[ast.AST]) -> tuple[set[str], set[str]]:
+    """Return (names bound, names declared global or nonlocal) by a function or class body, without nested scopes."""
+    names: set[str] = set()
+    declared: set[str] = set()
+    pending = list(body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.Global, ast.Nonlocal)):
+            declared.update(node.names)
+        elif type(node) is ast.Name and type(node.ctx) is not ast.Load:
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            # Decorators and defaults are evaluated here; the body is a scope of its own
+            pending.extend(node.decorator_list)
+            if not isinstance(node, ast.ClassDef):
+                pending.extend(node.args.defaults)
+                pending.extend(default for default in node.args.kw_defaults if default is not None)
+            continue
+        # Comprehension variables do not leak into the enclosing body
+        if not isinstance(node, (ast.Lambda, *_COMPREHENSIONS)):
+            pending.extend(ast.iter_child_nodes(node))
+    return names - declared, declared
+
+
+def _shadowed_loads(tree: ast.Module) -> set[int]:
+    """
+    Return the ids of Name loads that resolve to a local of an enclosing function.
+
+    Python decides at compile time that such a name is local, so it can never
+    reach the builtin of the same name (e.g. a variable called input).
+    """
+    shadowed_loads: set[int] = set()
+
+    def visit(node: ast.AST, local: frozenset[str]) -> None:
+        if type(node) is ast.Name:
+            if type(node.ctx) is ast.Load and node.id in local:
+                shadowed_loads.add(id(node))
+        elif isinstance(node, _FUNCTIONS):
+            # Decorators, defaults and annotations are evaluated in the enclosing scope
+            for child in (*getattr(node, 'decorator_list', ()), node.args, getattr(node, 'returns', None)):
+                if child is not None:
+                    visit(child, local)
+            arguments = node.args
+            parameters = {argument.arg for argument in (*arguments.posonlyargs, *arguments.args,
+                                                        *arguments.kwonlyargs, arguments.vararg, arguments.kwarg)
+                          if argument is not None}
+            body = node.body if isinstance(node.body, list) else [node.body]
+            bound, declared = _bound_names(body)
+            inner = (local - declared) | parameters | bound
+            for statement in body:
+                visit(statement, inner)
+        elif isinstance(node, ast.ClassDef):
+            for child in (*node.decorator_list, *node.bases, *node.keywords):
+                visit(child, local)
+            # A name the class body binds is looked up in the class, then globals and builtins
+            bound, declared = _bound_names(node.body)
+            inner = local - bound - declared
+            for statement in node.body:
+                visit(statement, inner)
+        else:
+            for child in ast.iter_child_nodes(node):
+                visit(child, local)
+
+    visit(tree, frozenset())
+    return shadowed_loads
+
+
+def _analyze_tree(tree: ast.Module,
+                  policy: ProgramPolicy) -> tuple[list[str], dict[str, int], set[str], set[str], bool]:
+    """Return (violations, call sites per name, names called in loops, loaded names, needs eager results)."""
+    violations: list[tuple[int, str]] = []
+    shadowed_loads = _shadowed_loads(tree)
+    calls: dict[str, int] = {}
+    looped: set[str] = set()
+    referenced: set[str] = set()
+    eager = False
+    for node in ast.walk(tree):
+        kind = type(node)
+        if kind in _TRY or (kind is ast.Compare and any(type(op) in (ast.Is, ast.IsNot) for op in node.ops)):
+            eager = True
+        if kind is ast.Name:
+            # Assigning (shadowing) a forbidden name is harmless; only reading the builtin is not
+            if type(node.ctx) is ast.Load:
+                referenced.add(node.id)
+                if node.id in policy.forbidden_names and id(node) not in shadowed_loads:
+                    violations.append((node.lineno, f"use of '{node.id}' (line {node.lineno})"))
+        elif kind is ast.Call:
+            if type(node.func) is ast.Name:
+                calls[node.func.id] = calls.get(node.func.id, 0) + 1
+        elif kind is ast.Attribute:
+            if not policy.allow_dunder_attributes and node.attr.startswith('__') and node.attr.endswith('__'):
+                violations.append((node.lineno, f"attribute '{node.attr}' (line {node.lineno})"))
+        elif kind is ast.Import:
+            for alias in node.names:
+                if alias.name.split('.')[0] in policy.forbidden_modules:
+                    violations.append((node.lineno, f"import of '{alias.name}' (line {node.lineno})"))
+        elif kind is ast.ImportFrom:
+            if node.level:
+                violations.append((node.lineno, f"relative import (line {node.lineno})"))
+            elif node.module and node.module.split('.')[0] in policy.forbidden_modules:
+                violations.append((node.lineno, f"import of '{node.module}' (line {node.lineno})"))
+        if isinstance(node, _LOOPS):
+            if kind is ast.While and isinstance(node.test, ast.Constant) and node.test.value and not _may_exit(node.body):
+                violations.append((node.lineno, f"while loop that never exits (line {node.lineno})"))
+            looped.update(inner.func.id for inner in ast.walk(node)
+                          if type(inner) is ast.Call and type(inner.func) is ast.Name)
+    # ast.walk is breadth-first; report violations in source order
+    violations.sort(key=lambda violation: violation[0])
+    return [message for _, message in violations], calls, looped, referenced, eager
+
+
+def _literal_result(node: Optional[ast.expr]) -> Optional[str]:
+    if node is None:
+        return 'None'
+    if isinstance(node, ast.JoinedStr):
+        # An f-string without placeholders is a constant too
+        if all(isinstance(part, ast.Constant) for part in node.values):
+            return ''.join(str(part.value) for part in node.values)
+        return None
+    try:
+        return str(ast.literal_eval(node))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _returned_calls(tree: ast.Module) -> set[str]:
+    """Return names called in answer_user_question's return expressions other than as another call's argument."""
+    names: set[str] = set()
+
+    def visit(node: ast.AST, in_call: bool) -> None:
+        if isinstance(node, _SCOPES):
+            return
+        if type(node) is ast.Call:
+            if not in_call and type(node.func) is ast.Name:
+                names.add(node.func.id)
+            in_call = True
+        for child in ast.iter_child_nodes(node):
+            visit(child, in_call)
+
+    for function in tree.body:
+        if isinstance(function, ast.FunctionDef) and function.name == 'answer_user_question':
+            pending = list(function.body)
+            while pending:
+                statement = pending.pop()
+                if isinstance(statement, ast.Return) and statement.value is not None:
+                    visit(statement.value, False)
+                elif not isinstance(statement, _SCOPES):
+                    pending.extend(child for child in ast.iter_child_nodes(statement) if isinstance(child, ast.stmt))
+    return names
+
+
+def _constant_result(tree: ast.Module) -> Optional[str]:
+    """Return the result of a program that only defines answer_user_question returning a literal."""
+    statements = [node for node in tree.body
+                  if not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))]
+    if len(statements) != 1:
+        return None
+    function = statements[0]
+    if (not isinstance(function, ast.FunctionDef) or function.name != 'answer_user_question'
+            or function.decorator_list or function.args.defaults or any(function.args.kw_defaults)):
+        return None
+    body = function.body
+    if len(body) > 1 and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]
+    if len(body) != 1 or not isinstance(body[0], ast.Return):
+        return None
+    return _literal_result(body[0].value)
+
+
+def analyze_program(source: str, code: CodeType, policy: ProgramPolicy = DEFAULT_POLICY) -> ProgramAnalysis:
+    """
+    Analyze a program, or return its cached analysis.
+
+    Args:
+        source: The cleaned program source
+        code: The program compiled from source (the cache key)
+        policy: What the program may import and reference
+
+    Returns:
+        ProgramAnalysis: Violations, constant result and call estimates
+    """
+    key = (code, policy)
+    with _lock:
+        analysis = _analyses.get(key)
+        if analysis is not None:
+            _analyses.move_to_end(key)
+            return analysis
+    tree = ast.parse(source)
+    violations, calls, looped, referenced, eager = _analyze_tree(tree, policy)
+    analysis = ProgramAnalysis(tuple(violations), _constant_result(tree), calls, frozenset(looped),
+                               frozenset(referenced), eager, frozenset(_returned_calls(tree)))
+    with _lock:
+        _analyses[key] = analysis
+        while len(_analyses) > ANALYSIS_CACHE_SIZE:
+            _analyses.popitem(last=False)
+    return analysis
+
+
+def cached_analysis(code: CodeType, policy: ProgramPolicy = DEFAULT_POLICY) -> Optional[ProgramAnalysis]:
+    """Return the analysis of a program compiled earlier in this process, or None."""
+    key = (code, policy)
+    with _lock:
+        analysis = _analyses.get(key)
+        if analysis is not None:
+            _analyses.move_to_end(key)
+        return analysis
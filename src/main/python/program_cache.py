@@ -0,0 +1,200 @@
+"""
+Cache of compiled answer_user_question programs keyed by normalized question.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import CodeType
+from typing import Optional
+
+PROGRAM_FILENAME = '<llm_code>'
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.]+$')
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivially different phrasings share a cache entry.
+
+    Args:
+        question: The user's question
+
+    Returns:
+        str: Lowercased question with collapsed whitespace and no trailing punctuation
+    """
+    question = _WHITESPACE.sub(' ', question.strip().lower())
+    return _TRAILING_PUNCTUATION.sub('', question)
+
+
+def prompt_hash(system_prompt: str) -> str:
+    """Return a stable hash of the system prompt."""
+    return hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()
+
+
+def compile_program(source: str) -> CodeType:
+    """Compile cleaned LLM code into a module-level code object."""
+    return compile(source, PROGRAM_FILENAME, 'exec')
+
+
+class ProgramCache:
+    """
+    LRU/TTL cache mapping (normalized question, system prompt) to compiled code.
+
+    Entries optionally persist to a directory as JSON files holding the cleaned
+    source, so a restarted process can skip regeneration; code objects are
+    recompiled from that source on first use. Entries are not checked against a
+    program policy here: App analyzes the source (see lookup) before running them.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None, directory: Optional[str] = None):
+        """
+        Args:
+            maxsize: Maximum number of programs kept in memory
+            ttl: Seconds an entry stays valid, or None to never expire
+            directory: Optional directory for the on-disk backing store
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[CodeType, str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, question: str, system_prompt: str) -> str:
+        """Return the cache key for a question under a system prompt."""
+        material = normalize_question(question) + '\0' + prompt_hash(system_prompt)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _load_from_disk(self, key: str) -> Optional[tuple[CodeType, str, float]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            if self._expired(record['created']):
+                os.remove(self._path(key))
+                return None
+            return compile_program(record['source']), record['source'], record['created']
+        except (OSError, ValueError, KeyError, SyntaxError):
+            return None
+
+    def _save_to_disk(self, key: str, source: str, created: float) -> None:
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'source': source, 'created': created}, f)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def _insert(self, key: str, entry: tuple[CodeType, str, float]) -> None:
+        # Caller must hold self._lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, question: str, system_prompt: str) -> Optional[CodeType]:
+        """
+        Look up the compiled program for a question.
+
+        Args:
+            question: The user's question
+            system_prompt: System prompt the program was generated with
+
+        Returns:
+            The compiled code object, or None on a miss
+        """
+        entry = self.lookup(question, system_prompt)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, question: str, system_prompt: str) -> Optional[tuple[CodeType, str]]:
+        """
+        Look up the compiled program for a question together with its cleaned source.
+
+        Args:
+            question: The user's question
+            system_prompt: System prompt the program was generated with
+
+        Returns:
+            (code object, source), or None on a miss
+        """
+        key = self.key(question, system_prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[2]):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+        if self.directory is not None:
+            entry = self._load_from_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._insert(key, entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return entry[0], entry[1]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: str, system_prompt: str, source: str, code: Optional[CodeType] = None) -> CodeType:
+        """
+        Store a cleaned program for a question.
+
+        Args:
+            question: The user's question
+            system_prompt: System prompt the program was generated with
+            source: Cleaned program source
+            code: Already compiled code for source, compiled here if omitted
+
+        Returns:
+            The compiled code object
+        """
+        if code is None:
+            code = compile_program(source)
+        key = self.key(question, system_prompt)
+        created = time.time()
+        with self._lock:
+            self._insert(key, (code, source, created))
+        if self.directory is not None:
+            self._save_to_disk(key, source, created)
+        return code
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop all in-memory entries; the on-disk store is left untouched."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,175 @@
+"""
+Client-side Bedrock rate limiting and retry with jittered exponential backoff.
+"""
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+THROTTLING_ERROR_CODES = (
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token) used for budgeting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute.
+
+    Requests larger than the capacity are allowed once the bucket is full, so a
+    single oversized request can never block forever.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: Tokens added per minute
+            capacity: Maximum burst size (defaults to one minute's worth)
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        # Caller must hold self._lock
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Take amount tokens if available.
+
+        Args:
+            amount: Number of tokens needed
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            self._refill()
+            needed = min(amount, self.capacity)
+            if self._tokens >= needed:
+                self._tokens -= amount
+                return 0.0
+            return (needed - self._tokens) / self.rate_per_second
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until amount tokens have been taken."""
+        while (wait := self.try_acquire(amount)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1) -> None:
+        """Async variant of acquire that sleeps without blocking the event loop."""
+        import asyncio
+        while (wait := self.try_acquire(amount)) > 0:
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits applied to every Bedrock call."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        Args:
+            requests_per_minute: Request quota, or None for unlimited
+            tokens_per_minute: Token quota (input + max output tokens), or None for unlimited
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request and tokens tokens fit within the quotas."""
+        if self.requests is not None:
+            self.requests.acquire(1)
+        if self.tokens is not None:
+            self.tokens.acquire(tokens)
+
+    async def aacquire(self, tokens: int) -> None:
+        """Async variant of acquire."""
+        if self.requests is not None:
+            await self.requests.aacquire(1)
+        if self.tokens is not None:
+            await self.tokens.aacquire(tokens)
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """
+    Return True if error (or an exception it wraps) is a Bedrock throttling error.
+
+    App.answer_with_prompt re-raises client errors as plain Exceptions, so the
+    exception chain and message are inspected as well as botocore error codes.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        # botocore ClientError carries the service error code in .response
+        response = getattr(error, 'response', None)
+        code = response.get('Error', {}).get('Code') if isinstance(response, dict) else None
+        if code in THROTTLING_ERROR_CODES or type(error).__name__ in THROTTLING_ERROR_CODES:
+            return True
+        if any(name in str(error) for name in THROTTLING_ERROR_CODES):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def backoff_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 20.0) -> float:
+    """Full-jitter exponential backoff delay for the given zero-based attempt."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(function: Callable[[], Any],
+                      max_retries: int = 5,
+                      should_retry: Callable[[BaseException], bool] = is_throttling_error,
+                      base_delay: float = 0.5,
+                      max_delay: float = 20.0) -> Any:
+    """
+    Call function, retrying with jittered exponential backoff on retryable errors.
+
+    Args:
+        function: Zero-argument callable to invoke
+        max_retries: Maximum number of retries after the first attempt
+        should_retry: Predicate deciding whether an error is retryable
+        base_delay: Backoff base in seconds
+        max_delay: Upper bound of a single backoff delay in seconds
+
+    Returns:
+        The function's return value
+    """
+    attempt = 0
+    while True:
+        try:
+            return function()
+        except Exception as e:
+            if attempt >= max_retries or not should_retry(e):
+                raise
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
+
+
+async def acall_with_retries(function: Callable[[], Any],
+                             max_retries: int = 5,
+                             should_retry: Callable[[BaseException], bool] = is_throttling_error,
+                             base_delay: float = 0.5,
+                             max_delay: float = 20.0) -> Any:
+    """Async variant of call_with_retries; function returns an awaitable."""
+    import asyncio
+    attempt = 0
+    while True:
+        try:
+            return await function()
+        except Exception as e:
+            if attempt >= max_retries or not should_retry(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
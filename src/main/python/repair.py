@@ -0,0 +1,158 @@
+"""
+Repair of generated programs that fail to compile or raise.
+
+Instead of regenerating from the question, App sends the model the failing
+program, the part of the traceback inside it and a short instruction. Tool
+results computed by the failed attempt are memoized for the duration of the
+answer, so the repaired program gets them back without calling the tools again.
+"""
+import contextvars
+import functools
+import threading
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from program_cache import PROGRAM_FILENAME
+
+REPAIR_INSTRUCTION = '''The answer_user_question program below failed while answering the question "{question}". Respond with the complete corrected program only, following the same rules as before.
+
+Program:
+{code}
+
+Error:
+{error}
+'''
+
+_active: contextvars.ContextVar[Optional['ToolResultMemo']] = contextvars.ContextVar('tool_result_memo', default=None)
+
+
+def current_tool_memo() -> Optional['ToolResultMemo']:
+    """Return the tool result memo of the answer running in this context, if any."""
+    return _active.get()
+
+
+def program_frames(error: BaseException) -> list[tuple[int, str]]:
+    """
+    Return (line number, function name) of the traceback frames inside the generated program.
+
+    An error re-raised from another process (see executors) carries the frames
+    of the original traceback in its program_frames attribute.
+    """
+    frames = getattr(error, 'program_frames', None)
+    if frames is not None:
+        return list(frames)
+    return [(frame.lineno, frame.name) for frame in traceback.extract_tb(error.__traceback__)
+            if frame.filename == PROGRAM_FILENAME]
+
+
+def format_program_error(error: BaseException, source: str) -> str:
+    """
+    Describe an error raised by a generated program.
+
+    Args:
+        error: Exception raised while compiling or running the program
+        source: The program's source code
+
+    Returns:
+        str: The program's own traceback frames (with their source lines) and the error
+    """
+    lines = source.splitlines()
+    if isinstance(error, SyntaxError):
+        location = f"line {error.lineno}: {error.text.strip() if error.text else ''}\n" if error.lineno else ''
+        return f"{location}SyntaxError: {error.msg}"
+    frames = []
+    for lineno, name in program_frames(error):
+        text = lines[lineno - 1].strip() if lineno and lineno <= len(lines) else ''
+        frames.append(f"line {lineno}, in {name}: {text}")
+    frames.append(f"{type(error).__name__}: {error}")
+    return '\n'.join(frames)
+
+
+def build_repair_message(question: str, source: str, error: BaseException) -> str:
+    """Return the user message asking the model to fix a failed program."""
+    return REPAIR_INSTRUCTION.format(question=question, code=source, error=format_program_error(error, source))
+
+
+class RepairStats:
+    """Thread-safe counters and timing of repair attempts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.repaired = 0
+        self.failed = 0
+        self.seconds = 0.0
+        self.reused_tool_results = 0
+
+    def record(self, seconds: float, succeeded: Optional[bool] = None, reused_tool_results: int = 0) -> None:
+        """
+        Add one repair attempt.
+
+        Args:
+            seconds: Time spent generating and running the repaired program
+            succeeded: True if it ran cleanly, False if repairs were given up, None if another attempt follows
+            reused_tool_results: Tool calls answered from the failed attempts' results
+        """
+        with self._lock:
+            self.attempts += 1
+            self.seconds += seconds
+            self.reused_tool_results += reused_tool_results
+            if succeeded is True:
+                self.repaired += 1
+            elif succeeded is False:
+                self.failed += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return the counters plus mean seconds per repair attempt."""
+        with self._lock:
+            return {
+                'attempts': self.attempts,
+                'repaired': self.repaired,
+                'failed': self.failed,
+                'seconds': self.seconds,
+                'mean_seconds': self.seconds / self.attempts if self.attempts else 0.0,
+                'reused_tool_results': self.reused_tool_results,
+            }
+
+
+class ToolResultMemo:
+    """Results of the tool calls made while answering one question, keyed by arguments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: dict[tuple, Any] = {}
+        self.hits = 0
+
+    def wrap(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Return function answering repeated calls from the memo."""
+        @functools.wraps(function)
+        def memoized(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                with self._lock:
+                    if key in self._results:
+                        self.hits += 1
+                        return self._results[key]
+            except TypeError:
+                # Unhashable arguments are never memoized
+                return function(*args, **kwargs)
+            result = function(*args, **kwargs)
+            with self._lock:
+                self._results[key] = result
+            return result
+        return memoized
+
+    def results(self) -> dict[tuple, Any]:
+        """Return a snapshot of the memoized results, keyed by (name, args, sorted kwargs), oldest first."""
+        with self._lock:
+            return dict(self._results)
+
+    @contextmanager
+    def active(self) -> Iterator['ToolResultMemo']:
+        """Make this memo visible to App.tool_namespace for the duration of the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
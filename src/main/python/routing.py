@@ -0,0 +1,228 @@
+"""
+Model routing per pipeline stage and question class.
+
+A ModelRouter holds models ordered from cheapest to most capable. Every
+question App answers gets a Route for its class: "direct" if no tool is
+relevant to it (e.g. "what is the capital of Indonesia?"), "tools" otherwise.
+Each stage of the answer (generate, repair, call_llm) starts on the model
+configured for (stage, class), the first one by default.
+
+When a generated program fails to compile, is rejected by the static checks or
+raises, the route escalates: the repair, and every later call made for the
+same answer, go to the next model. The router keeps per-model latency and
+program success counts. A starting model whose recent success rate for a
+(stage, class) falls below min_success_rate is skipped until it recovers, so
+question classes the small model handles badly go straight to the larger one.
+Since a skipped model gets no new outcomes, one in probe_every questions that
+would skip it is sent to it anyway; the outcomes of these probes let it recover.
+"""
+import contextvars
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Mapping, Optional, Sequence
+
+from llm_client import DEFAULT_MODEL_ID, FAST_MODEL_ID
+
+STAGES = ('generate', 'repair', 'call_llm')
+DIRECT = 'direct'
+TOOLS = 'tools'
+QUESTION_CLASSES = (DIRECT, TOOLS)
+
+_active: contextvars.ContextVar[Optional['Route']] = contextvars.ContextVar('route', default=None)
+
+
+def current_route() -> Optional['Route']:
+    """Return the route of the question being answered in this context, if any."""
+    return _active.get()
+
+
+def classify_question(question: str, tool_registry) -> str:
+    """Return DIRECT if no tool is relevant to the question, else TOOLS."""
+    return TOOLS if tool_registry.rank(question, 1) else DIRECT
+
+
+class Route:
+    """Model choices for answering one question; escalates after each failed program."""
+
+    __slots__ = ('router', 'question_class', 'escalation', 'program_model', 'program_stage', '_tiers')
+
+    def __init__(self, router: 'ModelRouter', question_class: str):
+        self.router = router
+        self.question_class = question_class
+        self.escalation = 0
+        # Starting tier per stage, chosen once per question so a probe applies to the whole answer
+        self._tiers: dict[str, int] = {}
+        # Model and stage that produced the program being run
+        self.program_model: Optional[str] = None
+        self.program_stage: Optional[str] = None
+
+    def model(self, stage: str) -> str:
+        """Return the model for the next call of a stage."""
+        tier = self._tiers.get(stage)
+        if tier is None:
+            tier = self._tiers[stage] = self.router.start_tier(stage, self.question_class)
+        model_id = self.router.models[min(tier + self.escalation, len(self.router.models) - 1)]
+        if stage != 'call_llm':
+            self.program_model = model_id
+            self.program_stage = stage
+        return model_id
+
+    def record(self, succeeded: bool) -> None:
+        """Record whether the last generated or repaired program ran."""
+        if self.program_model is not None:
+            self.router.record_outcome(self.program_model, self.program_stage, self.question_class, succeeded)
+
+    def escalate(self) -> None:
+        """Send the rest of this answer's calls to the next model."""
+        if self.program_model is not None:
+            self.router.record_escalation(self.program_model)
+        self.escalation += 1
+
+    @contextmanager
+    def active(self) -> Iterator['Route']:
+        """Make this route visible to App for the duration of the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+
+class _ModelStats:
+    __slots__ = ('calls', 'errors', 'seconds', 'programs', 'succeeded', 'escalated', 'probes')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.programs = 0
+        self.succeeded = 0
+        self.escalated = 0
+        self.probes = 0
+
+
+class ModelRouter:
+    """
+    Thread-safe model choice and per-model statistics, shared by the Apps using it.
+
+    stats() reports, per model, calls, errors, mean latency, program success
+    rate, how many of its failed programs were escalated and how many questions
+    were sent to it as probes while it was being skipped.
+    """
+
+    def __init__(self, models: Sequence[str] = (FAST_MODEL_ID, DEFAULT_MODEL_ID),
+                 routes: Optional[Mapping[tuple[str, str], int]] = None,
+                 min_success_rate: float = 0.8, min_samples: int = 20, window: int = 100,
+                 probe_every: int = 20):
+        """
+        Args:
+            models: Bedrock model ids, cheapest first
+            routes: Index into models of the starting model per (stage, question class);
+                missing routes start on the first model
+            min_success_rate: A starting model whose recent program success rate for the
+                route is below this is skipped
+            min_samples: Programs a route needs before its success rate is trusted
+            window: Most recent programs per (model, stage, class) the success rate is taken over
+            probe_every: One in this many questions that would skip a model is sent to it as a
+                probe, so its success rate can recover; 0 never probes
+        """
+        if not models:
+            raise ValueError("ModelRouter needs at least one model")
+        self.models = list(models)
+        self.routes = dict(routes or {})
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.probe_every = probe_every
+        self._lock = threading.Lock()
+        self._models: dict[str, _ModelStats] = {}
+        self._outcomes: dict[tuple[str, str, str], deque[bool]] = {}
+        self._skips: dict[tuple[str, str, str], int] = {}
+
+    def route(self, question: str, tool_registry) -> Route:
+        """Return a new Route for a question, classified with the registry's tool index."""
+        return Route(self, classify_question(question, tool_registry))
+
+    def choose(self, stage: str, question_class: str, escalation: int = 0) -> str:
+        """
+        Pick the model for a call.
+
+        Args:
+            stage: 'generate', 'repair' or 'call_llm'
+            question_class: DIRECT or TOOLS
+            escalation: Failed programs so far while answering this question
+
+        Returns:
+            str: Bedrock model id
+        """
+        return self.models[min(self.start_tier(stage, question_class) + escalation, len(self.models) - 1)]
+
+    def start_tier(self, stage: str, question_class: str) -> int:
+        """Return the index into models a question of the class starts the stage on."""
+        last = len(self.models) - 1
+        tier = min(self.routes.get((stage, question_class), 0), last)
+        with self._lock:
+            while tier < last and not self._healthy(self.models[tier], stage, question_class):
+                key = (self.models[tier], stage, question_class)
+                skips = self._skips[key] = self._skips.get(key, 0) + 1
+                if self.probe_every and skips % self.probe_every == 0:
+                    self._stats_for(self.models[tier]).probes += 1
+                    break
+                tier += 1
+        return tier
+
+    def _healthy(self, model_id: str, stage: str, question_class: str) -> bool:
+        outcomes = self._outcomes.get((model_id, stage, question_class))
+        if outcomes is None or len(outcomes) < self.min_samples:
+            return True
+        return sum(outcomes) / len(outcomes) >= self.min_success_rate
+
+    def _stats_for(self, model_id: str) -> _ModelStats:
+        stats = self._models.get(model_id)
+        if stats is None:
+            stats = self._models[model_id] = _ModelStats()
+        return stats
+
+    def record_call(self, model_id: str, seconds: float, succeeded: bool = True) -> None:
+        """Record the latency of a model call, or that it failed."""
+        with self._lock:
+            stats = self._stats_for(model_id)
+            stats.calls += 1
+            stats.seconds += seconds
+            if not succeeded:
+                stats.errors += 1
+
+    def record_outcome(self, model_id: str, stage: str, question_class: str, succeeded: bool) -> None:
+        """Record whether a program the model generated (or repaired) ran."""
+        with self._lock:
+            stats = self._stats_for(model_id)
+            stats.programs += 1
+            stats.succeeded += succeeded
+            key = (model_id, stage, question_class)
+            outcomes = self._outcomes.get(key)
+            if outcomes is None:
+                outcomes = self._outcomes[key] = deque(maxlen=self.window)
+            outcomes.append(succeeded)
+
+    def record_escalation(self, model_id: str) -> None:
+        """Record that a failed program of the model was escalated to the next one."""
+        with self._lock:
+            self._stats_for(model_id).escalated += 1
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return per-model call, latency, program success, escalation and probe counters."""
+        with self._lock:
+            return {
+                model_id: {
+                    'calls': stats.calls,
+                    'errors': stats.errors,
+                    'mean_seconds': stats.seconds / stats.calls if stats.calls else 0.0,
+                    'programs': stats.programs,
+                    'succeeded': stats.succeeded,
+                    'success_rate': stats.succeeded / stats.programs if stats.programs else 0.0,
+                    'escalated': stats.escalated,
+                    'probes': stats.probes,
+                }
+                for model_id, stats in self._models.items()
+            }
@@ -0,0 +1,170 @@
+"""
+Multi-turn sessions on top of App.
+
+App.answer is stateless: every question is generated from scratch and every
+tool is called again. A Session keeps what the conversation already established:
+- earlier questions and answers are sent after the (cached) system prompt with
+  the next question, so "what should I wear?" can build on "what state am I in?";
+- tool results are memoized for the session, so a later program calling a tool
+  with the same arguments gets the earlier result back without calling it. The
+  results are listed in the message and available to programs as the global
+  dict previous_results.
+
+The context sent with a question is kept under token_budget: tool results get
+at most half of it (newest first) and the oldest turns are dropped for good
+once the rest is used. Rendered turns and results are kept with their token
+counts, so each question only renders and counts what is new.
+
+Answers depend on the conversation, so session questions bypass the program
+cache and request coalescing.
+"""
+import contextvars
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Iterator, Optional
+
+from rate_limit import estimate_tokens
+from repair import ToolResultMemo
+
+DEFAULT_TOKEN_BUDGET = 1000
+# Longest repr of one tool result put in the message
+MAX_RESULT_CHARS = 200
+
+HISTORY_HEADER = 'Earlier in this conversation:'
+RESULTS_HEADER = ('Tool results from earlier in this conversation are in the global dict previous_results, '
+                  'keyed by the call; use them instead of calling the tool again:')
+
+_active: contextvars.ContextVar[Optional['Session']] = contextvars.ContextVar('session', default=None)
+
+
+def current_session() -> Optional['Session']:
+    """Return the session of the question being answered in this context, if any."""
+    return _active.get()
+
+
+def format_call(key: tuple) -> str:
+    """Render a ToolResultMemo key as the call that produced it, e.g. get_geo_from_county('Cook', 'Illinois')."""
+    name, args, kwargs = key
+    arguments = [repr(arg) for arg in args] + [f'{keyword}={value!r}' for keyword, value in kwargs]
+    return f"{name}({', '.join(arguments)})"
+
+
+class Session:
+    """
+    A conversation with one App. Questions are answered one at a time, in order.
+
+    stats() reports the turns kept and dropped, the context tokens sent and the
+    tool calls answered from earlier turns.
+    """
+
+    def __init__(self, app, token_budget: int = DEFAULT_TOKEN_BUDGET, remember_tool_results: bool = True):
+        """
+        Args:
+            app: The App answering the questions
+            token_budget: Estimated tokens of earlier turns and tool results sent with a question
+            remember_tool_results: Reuse tool results for the rest of the session. Results such
+                as the weather are not refreshed, so keep sessions short or pass False
+        """
+        self.app = app
+        self.token_budget = token_budget
+        self.tool_results = ToolResultMemo() if remember_tool_results else None
+        self._lock = threading.Lock()
+        # Rendered turns and their token counts, oldest first
+        self._turns: deque[tuple[str, int]] = deque()
+        self._turn_tokens = 0
+        # Rendered tool results by memo key, in the order they were first seen
+        self._result_lines: dict[tuple, tuple[str, int]] = {}
+        self._context = ''
+        self.turns = 0
+        self.trimmed_turns = 0
+        self.context_tokens = 0
+
+    def answer(self, question: str) -> str:
+        """
+        Answer a question in the context of the conversation so far.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            str: Answer produced by the generated program
+        """
+        with self._lock:
+            self._context = self._render_context()
+            self.context_tokens += estimate_tokens(self._context) if self._context else 0
+        memo = self.tool_results.active() if self.tool_results is not None else nullcontext()
+        with self.active(), memo:
+            result = self.app.answer(question)
+        self._add_turn(question, result)
+        return result
+
+    def generation_message(self, question: str) -> str:
+        """Return the user message App generates the program from: the context, then the question."""
+        return f"{self._context}\n\n{question}" if self._context else question
+
+    def previous_results(self) -> dict[str, Any]:
+        """Return the session's tool results keyed by the call, as exposed to programs."""
+        if self.tool_results is None:
+            return {}
+        return {format_call(key): value for key, value in self.tool_results.results().items()}
+
+    @contextmanager
+    def active(self) -> Iterator['Session']:
+        """Make this session visible to App for the duration of the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def _add_turn(self, question: str, answer: str) -> None:
+        turn = f"Q: {question}\nA: {answer}"
+        tokens = estimate_tokens(turn)
+        with self._lock:
+            self._turns.append((turn, tokens))
+            self._turn_tokens += tokens
+            self.turns += 1
+
+    def _render_results(self) -> tuple[list[str], int]:
+        """Return the newest tool result lines fitting in half the budget, oldest first, and their tokens."""
+        if self.tool_results is None:
+            return [], 0
+        for key, value in self.tool_results.results().items():
+            if key not in self._result_lines:
+                line = f"previous_results[{format_call(key)!r}] == {repr(value)[:MAX_RESULT_CHARS]}"
+                self._result_lines[key] = (line, estimate_tokens(line))
+        budget = self.token_budget // 2
+        lines, used = [], 0
+        for line, tokens in reversed(self._result_lines.values()):
+            if used + tokens > budget:
+                break
+            lines.append(line)
+            used += tokens
+        lines.reverse()
+        return lines, used
+
+    def _render_context(self) -> str:
+        result_lines, result_tokens = self._render_results()
+        # Turns that no longer fit are dropped for good, oldest first
+        while self._turns and self._turn_tokens > self.token_budget - result_tokens:
+            self._turn_tokens -= self._turns.popleft()[1]
+            self.trimmed_turns += 1
+        sections = []
+        if self._turns:
+            sections.append('\n'.join([HISTORY_HEADER, *(turn for turn, _ in self._turns)]))
+        if result_lines:
+            sections.append('\n'.join([RESULTS_HEADER, *result_lines]))
+        return '\n\n'.join(sections)
+
+    def stats(self) -> dict[str, int]:
+        """Return turn, trimming and context token counters and the tool calls reused."""
+        with self._lock:
+            return {
+                'turns': self.turns,
+                'kept_turns': len(self._turns),
+                'trimmed_turns': self.trimmed_turns,
+                'context_tokens': self.context_tokens,
+                'tool_results': len(self.tool_results.results()) if self.tool_results is not None else 0,
+                'reused_tool_results': self.tool_results.hits if self.tool_results is not None else 0,
+            }
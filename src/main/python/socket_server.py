@@ -0,0 +1,114 @@
+"""
+Persistent local server that keeps a warm App behind a unix socket.
+
+A CLI invocation that finds the server only needs the standard library to send
+its question, so it skips importing langchain/boto3, building AWS clients and
+rendering the system prompt.
+
+Protocol: the client sends one JSON line {"question": "..."}; the server replies
+with JSON lines {"chunk": "..."} as the answer streams, terminated by either
+{"done": true} or {"error": "..."}.
+"""
+import json
+import os
+import socket
+import socketserver
+from typing import Callable, Iterator, Optional
+
+DEFAULT_SOCKET_PATH = os.path.join(os.environ.get('XDG_RUNTIME_DIR', '/tmp'), 'llm-tool-calling.sock')
+SOCKET_ENV_VAR = 'LLM_TOOL_CALLING_SOCKET'
+
+
+class _QuestionHandler(socketserver.StreamRequestHandler):
+
+    def _send(self, message: dict) -> None:
+        self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            question = json.loads(line)['question']
+            for chunk in self.server.app.stream_answer(question):
+                self._send({'chunk': chunk})
+            self._send({'done': True})
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            self._send({'error': str(e)})
+
+
+class AppServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded unix-socket server answering questions with one shared App."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, app):
+        self.app = app
+        super().__init__(socket_path, _QuestionHandler)
+
+
+def warm_up(app) -> None:
+    """Import the tool implementations and build clients and prompts ahead of the first question."""
+    app.llm
+    app.boto_client
+    app.system_prompt
+    app.tool_namespace()
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, app_factory: Optional[Callable[[], object]] = None) -> None:
+    """
+    Start a warm server on socket_path and serve until interrupted.
+
+    Args:
+        socket_path: Filesystem path of the unix socket
+        app_factory: Callable returning the App to serve (defaults to App())
+    """
+    if app_factory is None:
+        from app import App
+        app_factory = App
+    app = app_factory()
+    warm_up(app)
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with AppServer(socket_path, app) as server:
+        print(f"Serving on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+
+def ask(question: str, socket_path: str = DEFAULT_SOCKET_PATH) -> Iterator[str]:
+    """
+    Send a question to a running server and yield the answer as it streams back.
+
+    Args:
+        question: The user's question
+        socket_path: Filesystem path of the unix socket
+
+    Yields:
+        str: Answer text chunks
+
+    Raises:
+        OSError: If no server is listening on socket_path
+        RuntimeError: If the server reported an error
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile('rwb') as stream:
+            stream.write(json.dumps({'question': question}).encode('utf-8') + b'\n')
+            stream.flush()
+            for line in stream:
+                message = json.loads(line)
+                if 'chunk' in message:
+                    yield message['chunk']
+                elif 'error' in message:
+                    raise RuntimeError(message['error'])
+                else:
+                    return
@@ -0,0 +1,231 @@
+"""
+Speculative tool prefetch while a program is still being generated.
+
+While App streams the generated program, a Speculation scans each completed
+line for calls to tools registered with speculative=True. Calls whose
+arguments are literals start immediately. Calls whose arguments are only known
+at run time start with the arguments the same tool was last called with
+(e.g. the user's county), on the bet that they have not changed. Started calls
+run on the shared tool thread pool. When the program executes, a call
+with the same arguments takes the prefetched result instead of running the
+tool again. Calls nobody asked for are discarded when the answer completes.
+
+Only side-effect-free tools should be marked speculative: a wrong guess costs a
+wasted call, never a wrong answer, because results are only used for an exact
+argument match.
+"""
+import ast
+import contextvars
+import functools
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from parallel_tools import get_executor
+
+_active: contextvars.ContextVar[Optional['Speculation']] = contextvars.ContextVar('speculation', default=None)
+
+
+def current_speculation() -> Optional['Speculation']:
+    """Return the speculation of the answer running in this context, if any."""
+    return _active.get()
+
+
+def _call_key(name: str, args: tuple, kwargs: dict) -> Optional[tuple]:
+    key = (name, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _literal_arguments(call_source: str) -> Optional[tuple[tuple, dict]]:
+    """Return the (args, kwargs) of a call expression if all of them are literals."""
+    try:
+        call = ast.parse(call_source, mode='eval').body
+        if not isinstance(call, ast.Call):
+            return None
+        args = tuple(ast.literal_eval(arg) for arg in call.args)
+        kwargs = {keyword.arg: ast.literal_eval(keyword.value) for keyword in call.keywords}
+    except (SyntaxError, ValueError, TypeError):
+        return None
+    if None in kwargs:
+        return None
+    return args, kwargs
+
+
+def _call_end(text: str, open_index: int) -> Optional[int]:
+    """Return the index after the parenthesis closing text[open_index], or None if not there yet."""
+    depth = 0
+    for index in range(open_index, len(text)):
+        char = text[index]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+
+class ToolPrefetcher:
+    """
+    Per-App speculation settings, argument history and counters.
+
+    History holds the last arguments each speculative tool was really called
+    with; stats() reports how many prefetches were used or discarded and the
+    wall time they saved.
+    """
+
+    def __init__(self, registry):
+        """
+        Args:
+            registry: ToolRegistry providing the implementations and speculative flags
+        """
+        self.registry = registry
+        self._lock = threading.Lock()
+        self.history: dict[str, tuple[tuple, dict]] = {}
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+        self.saved_seconds = 0.0
+
+    def speculative_tools(self) -> list[str]:
+        """Names of the tools that may be called speculatively."""
+        return [spec.name for spec in self.registry.specs() if not spec.is_type and spec.speculative]
+
+    def begin(self) -> 'Speculation':
+        """Start speculating for one answer."""
+        return Speculation(self)
+
+    def record_call(self, name: str, args: tuple, kwargs: dict) -> None:
+        with self._lock:
+            self.history[name] = (args, kwargs)
+
+    def _count(self, used: int = 0, discarded: int = 0, started: int = 0, saved_seconds: float = 0.0) -> None:
+        with self._lock:
+            self.used += used
+            self.discarded += discarded
+            self.started += started
+            self.saved_seconds += saved_seconds
+
+    def stats(self) -> dict[str, Any]:
+        """Return prefetch counters and the total wall time saved."""
+        with self._lock:
+            return {
+                'started': self.started,
+                'used': self.used,
+                'discarded': self.discarded,
+                'saved_seconds': self.saved_seconds,
+            }
+
+
+class Speculation:
+    """Prefetched tool calls for the program of a single answer."""
+
+    def __init__(self, prefetcher: ToolPrefetcher):
+        self.prefetcher = prefetcher
+        names = prefetcher.speculative_tools()
+        self._pattern = re.compile(r'\b(' + '|'.join(map(re.escape, names)) + r')\s*\(') if names else None
+        self._lock = threading.Lock()
+        self._text = ''
+        self._scanned = 0
+        self._futures: dict[tuple, Future] = {}
+
+    def feed(self, chunk: str) -> None:
+        """Add a chunk of generated text and start calls on the lines it completes."""
+        self._text += chunk
+        self._scan(self._text.rfind('\n') + 1)
+
+    def finish(self) -> None:
+        """Scan the remainder once generation is complete."""
+        self._scan(len(self._text))
+
+    def _scan(self, end: int) -> None:
+        if self._pattern is None:
+            return
+        text = self._text[:end]
+        for match in self._pattern.finditer(text, self._scanned):
+            close = _call_end(text, match.end() - 1)
+            if close is None:
+                # Arguments continue past the scanned text; look again later
+                self._scanned = match.start()
+                return
+            name = match.group(1)
+            arguments = _literal_arguments(name + text[match.end() - 1:close])
+            if arguments is None:
+                # Arguments depend on run-time values: guess they repeat the last call
+                with self.prefetcher._lock:
+                    arguments = self.prefetcher.history.get(name)
+            if arguments is not None:
+                self._start(name, *arguments)
+        self._scanned = end
+
+    def _start(self, name: str, args: tuple, kwargs: dict) -> None:
+        key = _call_key(name, args, kwargs)
+        if key is None:
+            return
+        with self._lock:
+            if key in self._futures:
+                return
+            future: Future = Future()
+            self._futures[key] = future
+        function = self.prefetcher.registry.implementation(name)
+        context = contextvars.copy_context()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            started = time.perf_counter()
+            try:
+                value = context.run(function, *args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result((value, started, time.perf_counter()))
+
+        self.prefetcher._count(started=1)
+        get_executor().submit(run)
+
+    def wrap(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Return function taking prefetched results for matching calls."""
+        @functools.wraps(function)
+        def prefetched(*args, **kwargs):
+            self.prefetcher.record_call(name, args, kwargs)
+            key = _call_key(name, args, kwargs)
+            with self._lock:
+                future = self._futures.pop(key, None) if key is not None else None
+            if future is None:
+                return function(*args, **kwargs)
+            requested = time.perf_counter()
+            try:
+                value, started, finished = future.result()
+            except Exception:
+                # The speculative call failed; run it for real so the program sees its own error
+                self.prefetcher._count(discarded=1)
+                return function(*args, **kwargs)
+            self.prefetcher._count(used=1, saved_seconds=max(0.0, min(requested, finished) - started))
+            return value
+        return prefetched
+
+    @contextmanager
+    def active(self) -> Iterator['Speculation']:
+        """Make this speculation visible to App.tool_namespace for the duration of the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def close(self) -> None:
+        """Discard prefetched calls the program did not use."""
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future in futures:
+            future.cancel()
+        self.prefetcher._count(discarded=len(futures))
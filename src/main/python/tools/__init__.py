@@ -3,34 +3,81 @@ Tools package for weather-related functionality.
 """
 from .interfaces import (
     Weather,
+    WeatherColumns,
     GetUserLocationFunc,
     GetGeoFromCountyFunc,
+    GetCountyFromGeoFunc,
     GetLocalWeatherFunc,
+    GetLocalWeatherManyFunc,
     CallLLMFunc,
     get_user_location,
     get_geo_from_county,
+    get_county_from_geo,
     get_local_weather,
+    get_local_weather_many,
     call_llm
 )
-from .implementations import (
-    get_user_location as get_user_location_impl,
-    get_geo_from_county as get_geo_from_county_impl,
-    get_local_weather as get_local_weather_impl,
-    call_llm as call_llm_impl
-)
+from .caching import cached_tool, tool_cache_stats, clear_tool_caches
+from .registry import ToolRegistry, ToolSpec, get_tool_registry, interface_type, tool
+
+# Implementations are imported on first access, so that loading the registry
+# (which imports this package) does not import every implementation module
+_IMPLEMENTATIONS = {
+    'get_user_location_impl': 'get_user_location',
+    'get_geo_from_county_impl': 'get_geo_from_county',
+    'get_county_from_geo_impl': 'get_county_from_geo',
+    'get_local_weather_impl': 'get_local_weather',
+    'get_local_weather_many_impl': 'get_local_weather_many',
+    'call_llm_impl': 'call_llm',
+    'get_user_location_async': 'get_user_location_async',
+    'get_geo_from_county_async': 'get_geo_from_county_async',
+    'get_county_from_geo_async': 'get_county_from_geo_async',
+    'get_local_weather_async': 'get_local_weather_async',
+    'get_local_weather_many_async': 'get_local_weather_many_async',
+    'call_llm_async': 'call_llm_async',
+}
+
+
+def __getattr__(name):
+    if name in _IMPLEMENTATIONS:
+        from . import implementations
+        return getattr(implementations, _IMPLEMENTATIONS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'Weather',
+    'WeatherColumns',
     'GetUserLocationFunc',
     'GetGeoFromCountyFunc',
+    'GetCountyFromGeoFunc',
     'GetLocalWeatherFunc',
+    'GetLocalWeatherManyFunc',
     'CallLLMFunc',
     'get_user_location',
     'get_geo_from_county',
+    'get_county_from_geo',
     'get_local_weather',
+    'get_local_weather_many',
     'call_llm',
     'get_user_location_impl',
     'get_geo_from_county_impl',
+    'get_county_from_geo_impl',
     'get_local_weather_impl',
-    'call_llm_impl'
+    'get_local_weather_many_impl',
+    'call_llm_impl',
+    'get_user_location_async',
+    'get_geo_from_county_async',
+    'get_county_from_geo_async',
+    'get_local_weather_async',
+    'get_local_weather_many_async',
+    'call_llm_async',
+    'cached_tool',
+    'tool_cache_stats',
+    'clear_tool_caches',
+    'ToolRegistry',
+    'ToolSpec',
+    'get_tool_registry',
+    'interface_type',
+    'tool'
 ]
@@ -0,0 +1,166 @@
+"""
+Declarative result caching for tool implementations.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+_MISSING = object()
+
+
+class ToolCache:
+    """
+    Thread-safe LRU/TTL cache for one tool with single-flight deduplication.
+
+    Concurrent calls with identical arguments share one underlying call: the
+    first caller runs the tool and every other caller waits for its result.
+    Exceptions are propagated to all waiters but never cached.
+    """
+
+    def __init__(self, name: str, ttl: Optional[float] = None, maxsize: int = 1024):
+        """
+        Args:
+            name: Tool name used in the statistics
+            ttl: Seconds a result stays valid, or None to never expire
+            maxsize: Maximum number of results kept before LRU eviction
+        """
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
+        self._in_flight: dict[Any, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def _lookup(self, key: Any) -> Any:
+        # Caller must hold self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Any, value: Any) -> None:
+        # Caller must hold self._lock
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def call(self, function: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """
+        Return the cached result of function(*args, **kwargs), calling it at most once per key.
+
+        Args:
+            function: The tool implementation
+            args: Positional arguments
+            kwargs: Keyword arguments
+
+        Returns:
+            The (possibly cached) tool result
+        """
+        key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+        try:
+            hash(key)
+        except TypeError:
+            with self._lock:
+                self.uncacheable += 1
+            return function(*args, **kwargs)
+
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            waiting_on = self._in_flight.get(key)
+            if waiting_on is not None:
+                self.deduplicated += 1
+            else:
+                self.misses += 1
+                pending = Future()
+                self._in_flight[key] = pending
+        if waiting_on is not None:
+            return waiting_on.result()
+
+        try:
+            value = function(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._store(key, value)
+            del self._in_flight[key]
+        pending.set_result(value)
+        return value
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters and current size of this cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'deduplicated': self.deduplicated,
+                'evictions': self.evictions,
+                'uncacheable': self.uncacheable,
+                'size': len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+
+_tool_caches: dict[str, ToolCache] = {}
+
+
+def cached_tool(ttl: Optional[float] = None, maxsize: int = 1024, name: Optional[str] = None):
+    """
+    Decorator that memoizes a tool implementation.
+
+    Args:
+        ttl: Seconds a result stays valid, or None to never expire
+        maxsize: Maximum number of results kept before LRU eviction
+        name: Name to register the cache under (defaults to the function name)
+
+    Returns:
+        Decorator producing the caching wrapper; the wrapper's ``cache`` attribute
+        is the underlying ToolCache
+    """
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        cache = ToolCache(name or function.__name__, ttl=ttl, maxsize=maxsize)
+        _tool_caches[cache.name] = cache
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return cache.call(function, args, kwargs)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def tool_cache_stats() -> dict[str, dict[str, int]]:
+    """Return the statistics of every registered tool cache, keyed by tool name."""
+    return {name: cache.stats() for name, cache in _tool_caches.items()}
+
+
+def clear_tool_caches() -> None:
+    """Drop the cached results of every registered tool."""
+    for cache in _tool_caches.values():
+        cache.clear()
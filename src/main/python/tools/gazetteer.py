@@ -0,0 +1,294 @@
+"""
+US county gazetteer: county name <-> coordinates.
+
+The table is a flat binary file, memory-mapped once per process. It holds a
+latitude column, a longitude column and a UTF-8 block of "<county>\\t<USPS>"
+lines. Name lookups normalize case, punctuation, "Saint" and county-type
+suffixes, and fall back to fuzzy matching. Reverse geocoding uses a one-degree
+grid over the county internal points. Both indexes are built on first use, so
+loading only maps the file and splits the names.
+
+The bundled table is built from tools/data/counties.tsv and covers the most
+populous counties, positioned at their principal city. Until a table is
+complete (see Gazetteer.complete), the geocoding tools report counties and
+locations it does not cover as errors rather than guessing. To cover every
+county, rebuild it from the Census Gazetteer county file (any TSV with USPS,
+NAME, INTPTLAT and INTPTLONG columns):
+
+    python src/main/python/build_gazetteer.py 2020_Gaz_counties_national.txt
+"""
+import csv
+import difflib
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from typing import Iterable, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_SOURCE = os.path.join(DATA_DIR, 'counties.tsv')
+DEFAULT_TABLE = os.path.join(DATA_DIR, 'counties.bin')
+
+_MAGIC = b'GAZ1'
+# magic, record count, name blob size, reserved (keeps the columns 8-byte aligned)
+_HEADER = struct.Struct('<4sIII')
+GRID_DEGREES = 1.0
+# A table with fewer records than the ~3,100 US counties is a partial one
+COMPLETE_COUNTY_COUNT = 3000
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois',
+    'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon',
+    'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina', 'SD': 'South Dakota',
+    'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont', 'VA': 'Virginia',
+    'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+    'PR': 'Puerto Rico',
+}
+_STATE_CODES = {name.lower(): code for code, name in STATES.items()}
+_SUFFIX = re.compile(r'\s+(county|cnty|parish|borough|census area|municipality|city and borough)$')
+_PUNCTUATION = re.compile(r"[.'’]")
+
+
+def normalize_county(name: str) -> str:
+    """Return the lookup key of a county name: "St. Louis County" -> "st louis"."""
+    key = _PUNCTUATION.sub('', name.lower()).replace('-', ' ')
+    key = ' '.join(key.split())
+    key = re.sub(r'^saint\s', 'st ', key)
+    return _SUFFIX.sub('', key)
+
+
+def state_code(state: str) -> Optional[str]:
+    """Return the USPS code of a state given by name or code, or None if unknown."""
+    key = ' '.join(state.replace('.', '').split()).lower()
+    if key.upper() in STATES:
+        return key.upper()
+    return _STATE_CODES.get(key)
+
+
+def haversine_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Great-circle distance between two points in kilometers."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(latitude: float, longitude: float) -> tuple[int, int]:
+    return math.floor(latitude / GRID_DEGREES), math.floor(longitude / GRID_DEGREES)
+
+
+class Gazetteer:
+    """
+    Array-backed county table with name and nearest-point indexes.
+
+    Records are addressed by index; latitudes and longitudes are float64
+    columns (memoryviews over the mapped file when loaded with load()).
+    """
+
+    def __init__(self, latitudes, longitudes, names: list[tuple[str, str]], buffer=None):
+        """
+        Args:
+            latitudes: float64 column of internal-point latitudes
+            longitudes: float64 column of internal-point longitudes
+            names: (county, USPS code) per record
+            buffer: Mapping the columns view into, kept open while the table is used
+        """
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.names = names
+        self._buffer = buffer
+        self._lock = threading.Lock()
+        self._by_state: Optional[dict[str, dict[str, int]]] = None
+        self._everywhere: Optional[dict[str, int]] = None
+        self._grid: Optional[dict[tuple[int, int], list[int]]] = None
+        self._grid_bounds = (0, 0, 0, 0)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[str, str, float, float]]) -> 'Gazetteer':
+        """Build a table from (USPS code, county, latitude, longitude) rows, sorted by state and name."""
+        records = sorted(rows, key=lambda row: (row[0], row[1]))
+        return cls(array('d', (row[2] for row in records)), array('d', (row[3] for row in records)),
+                   [(row[1], row[0]) for row in records])
+
+    @classmethod
+    def from_tsv(cls, path: str) -> 'Gazetteer':
+        """Build a table from a Census Gazetteer style TSV (USPS, NAME, INTPTLAT, INTPTLONG columns)."""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f, delimiter='\t')
+            header = [column.strip() for column in next(reader)]
+            usps, name, latitude, longitude = (header.index(column)
+                                               for column in ('USPS', 'NAME', 'INTPTLAT', 'INTPTLONG'))
+            return cls.from_rows((row[usps].strip(), row[name].strip(), float(row[latitude]), float(row[longitude]))
+                                 for row in reader if row)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TABLE) -> 'Gazetteer':
+        """Memory-map a table written by write()."""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, names_size, _ = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a gazetteer table")
+        view = memoryview(buffer)
+        size = count * 8
+        columns = []
+        for start in (_HEADER.size, _HEADER.size + size):
+            column = view[start:start + size].cast('d')
+            if sys.byteorder != 'little':
+                column = array('d', column)
+                column.byteswap()
+            columns.append(column)
+        start = _HEADER.size + 2 * size
+        lines = str(view[start:start + names_size], 'utf-8').split('\n') if count else []
+        names = [tuple(line.split('\t')) for line in lines]
+        return cls(columns[0], columns[1], names, buffer)
+
+    def write(self, path: str) -> None:
+        """Write the table in the binary format read by load()."""
+        names = '\n'.join(f"{county}\t{code}" for county, code in self.names).encode('utf-8')
+        columns = [array('d', self.latitudes), array('d', self.longitudes)]
+        if sys.byteorder != 'little':
+            for column in columns:
+                column.byteswap()
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.names), len(names), 0))
+            for column in columns:
+                f.write(column.tobytes())
+            f.write(names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def complete(self) -> bool:
+        """True if the table covers every county, so a county missing from it does not exist."""
+        return len(self.names) >= COMPLETE_COUNTY_COUNT
+
+    def record(self, index: int) -> tuple[str, str, float, float]:
+        """Return (county, state name, latitude, longitude) of a record."""
+        county, code = self.names[index]
+        return county, STATES.get(code, code), self.latitudes[index], self.longitudes[index]
+
+    def find(self, county: str, state: str, cutoff: float = 0.8) -> Optional[int]:
+        """
+        Return the index of a county, or None if nothing matches.
+
+        Args:
+            county: County name, with or without its "County"/"Parish"/... suffix
+            state: State name or USPS code; if unknown, every state is searched
+            cutoff: Minimum difflib similarity for a fuzzy match
+
+        Returns:
+            Optional[int]: Index of the exact normalized match, else of the closest name
+        """
+        key = normalize_county(county)
+        code = state_code(state)
+        by_state, everywhere = self._name_index()
+        if code is not None:
+            candidates = by_state.get(code, {})
+            if key in candidates:
+                return candidates[key]
+            if f"{key} city" in candidates:
+                # Independent cities such as "Baltimore city" are usually named without the suffix
+                return candidates[f"{key} city"]
+            matches = difflib.get_close_matches(key, list(candidates), n=1, cutoff=cutoff)
+            return candidates[matches[0]] if matches else None
+        if key in everywhere:
+            return everywhere[key]
+        matches = difflib.get_close_matches(key, list(everywhere), n=1, cutoff=cutoff)
+        return everywhere[matches[0]] if matches else None
+
+    def coordinates(self, county: str, state: str) -> tuple[float, float]:
+        """Return (latitude, longitude) of a county; raises ValueError if it is not in the table."""
+        index = self.find(county, state)
+        if index is None and not self.complete:
+            raise ValueError(f"Unknown county: {county}, {state} (the bundled gazetteer covers only "
+                             f"{len(self)} counties)")
+        if index is None:
+            raise ValueError(f"Unknown county: {county}, {state}")
+        return self.latitudes[index], self.longitudes[index]
+
+    def _name_index(self) -> tuple[dict[str, dict[str, int]], dict[str, int]]:
+        if self._by_state is None:
+            with self._lock:
+                if self._by_state is None:
+                    by_state: dict[str, dict[str, int]] = {}
+                    everywhere: dict[str, int] = {}
+                    for index, (county, code) in enumerate(self.names):
+                        key = normalize_county(county)
+                        by_state.setdefault(code, {}).setdefault(key, index)
+                        everywhere.setdefault(key, index)
+                    self._everywhere = everywhere
+                    self._by_state = by_state
+        return self._by_state, self._everywhere
+
+    def _grid_index(self) -> dict[tuple[int, int], list[int]]:
+        if self._grid is None:
+            with self._lock:
+                if self._grid is None:
+                    grid: dict[tuple[int, int], list[int]] = {}
+                    for index in range(len(self.names)):
+                        grid.setdefault(_cell(self.latitudes[index], self.longitudes[index]), []).append(index)
+                    if grid:
+                        rows = [cell[0] for cell in grid]
+                        columns = [cell[1] for cell in grid]
+                        self._grid_bounds = (min(rows), max(rows), min(columns), max(columns))
+                    self._grid = grid
+        return self._grid
+
+    def nearest(self, latitude: float, longitude: float) -> int:
+        """
+        Return the index of the county whose internal point is closest to a location.
+
+        Searches grid rings outward from the location's cell and stops once the
+        remaining rings are farther away than the best match found so far.
+        """
+        grid = self._grid_index()
+        if not grid:
+            raise ValueError("The gazetteer is empty")
+        row, column = _cell(latitude, longitude)
+        min_row, max_row, min_column, max_column = self._grid_bounds
+        max_ring = max(abs(row - min_row), abs(row - max_row), abs(column - min_column), abs(column - max_column))
+        best, best_km = -1, math.inf
+        for ring in range(max_ring + 1):
+            # Closest any point in this ring can be: (ring - 1) whole cells away along
+            # one axis, with longitude degrees shrinking toward the poles
+            reach = min(89.0, abs(latitude) + (ring + 1) * GRID_DEGREES)
+            bound_km = max(0, ring - 1) * GRID_DEGREES * KM_PER_DEGREE * math.cos(math.radians(reach))
+            if bound_km > best_km:
+                break
+            for cell_row in range(row - ring, row + ring + 1):
+                step = 1 if abs(cell_row - row) == ring else 2 * ring
+                for cell_column in range(column - ring, column + ring + 1, step):
+                    for index in grid.get((cell_row, cell_column), ()):
+                        km = haversine_km(latitude, longitude, self.latitudes[index], self.longitudes[index])
+                        if km < best_km:
+                            best, best_km = index, km
+        return best
+
+
+_default: Optional[Gazetteer] = None
+_default_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide table, memory-mapping the bundled file on first use."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Gazetteer.load(DEFAULT_TABLE)
+    return _default
+
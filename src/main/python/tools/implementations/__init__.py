@@ -4,13 +4,29 @@ Weather tools implementations package.
 from .weather_tools_impl import (
     get_user_location,
     get_geo_from_county,
+    get_county_from_geo,
     get_local_weather,
-    call_llm
+    get_local_weather_many,
+    call_llm,
+    get_user_location_async,
+    get_geo_from_county_async,
+    get_county_from_geo_async,
+    get_local_weather_async,
+    get_local_weather_many_async,
+    call_llm_async
 )
 
 __all__ = [
     'get_user_location',
     'get_geo_from_county', 
+    'get_county_from_geo',
     'get_local_weather',
-    'call_llm'
+    'get_local_weather_many',
+    'call_llm',
+    'get_user_location_async',
+    'get_geo_from_county_async',
+    'get_county_from_geo_async',
+    'get_local_weather_async',
+    'get_local_weather_many_async',
+    'call_llm_async'
 ]
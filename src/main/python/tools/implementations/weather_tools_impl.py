@@ -1,10 +1,37 @@
 """
 Standalone implementation of weather tools functions.
 """
+import asyncio
+import functools
 import random
+from array import array
+from typing import Sequence
 
-from app import App
-from ..interfaces.weather_tools import Weather
+from llm_client import (
+    ainvoke_with_prompt,
+    claim_stream_sink,
+    forward_stream,
+    get_calling_app,
+    get_registry,
+    invoke_with_prompt,
+    stream_with_prompt,
+)
+from ..caching import cached_tool
+from ..gazetteer import get_gazetteer, haversine_km
+from ..interfaces.weather_tools import Weather, WeatherColumns
+
+# With a partial gazetteer, reverse lookups farther than this from every bundled county are refused
+NEAREST_COUNTY_MAX_KM = 50.0
+
+
+@functools.cache
+def _numpy():
+    # NumPy is optional and only imported by the bulk tools that use it
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
 
 
 def get_user_location() -> tuple[str, str]:
@@ -18,37 +45,58 @@ def get_user_location() -> tuple[str, str]:
     return ("King County", "Washington")
 
 
+# County coordinates never change, so they are cached without expiry
+@cached_tool(ttl=None, maxsize=4096)
 def get_geo_from_county(county: str, state: str) -> tuple[float, float]:
     """
-    Returns mock coordinates based on some common locations.
-    
+    Returns coordinates of a county from the bundled gazetteer.
+
+    The bundled table only covers the most populous counties; any other
+    county is reported as unknown rather than given made-up coordinates.
+
     Args:
-        county: County name
-        state: State name
+        county: County name (fuzzy matched, "County" suffix optional)
+        state: State name or USPS code
         
     Returns:
         tuple[float, float]: (latitude, longitude)
+
+    Raises:
+        ValueError: If no county in the gazetteer matches
     """
-    # Mock coordinates for some common locations
-    location_coords = {
-        ("King County", "Washington"): (47.6062, -122.3321),  # Seattle area
-        ("Los Angeles County", "California"): (34.0522, -118.2437),  # Los Angeles
-        ("Cook County", "Illinois"): (41.8781, -87.6298),  # Chicago
-        ("Harris County", "Texas"): (29.7604, -95.3698),  # Houston
-        ("Maricopa County", "Arizona"): (33.4484, -112.0740),  # Phoenix
-    }
-    
-    # Return known coordinates or generate mock ones
-    location_key = (county, state)
-    if location_key in location_coords:
-        return location_coords[location_key]
-    else:
-        # Generate mock coordinates (US-ish range)
-        latitude = random.uniform(25.0, 49.0)  # Roughly continental US latitude range
-        longitude = random.uniform(-125.0, -66.0)  # Roughly continental US longitude range
-        return (latitude, longitude)
+    return get_gazetteer().coordinates(county, state)
+
+
+def get_county_from_geo(latitude: float, longitude: float) -> tuple[str, str]:
+    """
+    Returns the gazetteer county closest to a location.
 
+    With a partial gazetteer the closest bundled county may not be the one
+    containing the location, so one more than NEAREST_COUNTY_MAX_KM away is
+    not returned.
 
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+
+    Returns:
+        tuple[str, str]: (county, state)
+
+    Raises:
+        ValueError: If the gazetteer is partial and no bundled county is near the location
+    """
+    gazetteer = get_gazetteer()
+    county, state, county_latitude, county_longitude = gazetteer.record(gazetteer.nearest(latitude, longitude))
+    if not gazetteer.complete:
+        distance_km = haversine_km(latitude, longitude, county_latitude, county_longitude)
+        if distance_km > NEAREST_COUNTY_MAX_KM:
+            raise ValueError(f"No county known near ({latitude}, {longitude}): the nearest bundled county, "
+                             f"{county}, {state}, is {distance_km:.0f} km away")
+    return county, state
+
+
+# Weather is only fresh for a few minutes
+@cached_tool(ttl=300, maxsize=1024)
 def get_local_weather(latitude: float, longitude: float) -> Weather:
     """
     Returns mock weather data.
@@ -68,8 +116,83 @@ def get_local_weather(latitude: float, longitude: float) -> Weather:
     return Weather(temperature_fahrenheit, precipitation_chance_percent)
 
 
+def get_local_weather_many(latitudes: Sequence[float], longitudes: Sequence[float]) -> WeatherColumns:
+    """
+    Returns mock weather data for many points at once.
+
+    With NumPy installed the columns are float64 arrays generated in one
+    vectorized call; without it they are array('d') columns. Results are not
+    cached per point.
+
+    Args:
+        latitudes: Latitude coordinates (sequence or NumPy array)
+        longitudes: Longitude coordinates, same length as latitudes
+
+    Returns:
+        WeatherColumns: Mock weather columns aligned with the coordinates
+    """
+    count = len(latitudes)
+    if len(longitudes) != count:
+        raise ValueError(f"got {count} latitudes but {len(longitudes)} longitudes")
+    numpy = _numpy()
+    if numpy is not None:
+        generator = numpy.random.default_rng()
+        temperature_celsius = generator.uniform(-10.0, 40.0, count)
+        return WeatherColumns(temperature_celsius * 9 / 5 + 32, generator.uniform(0.0, 100.0, count))
+    temperature_fahrenheit = array('d', (random.uniform(-10.0, 40.0) * 9 / 5 + 32 for _ in range(count)))
+    return WeatherColumns(temperature_fahrenheit, array('d', (random.uniform(0.0, 100.0) for _ in range(count))))
+
+
 def call_llm(prompt: str) -> str:
-    app = App()
     print(f"Calling LLM with prompt: {prompt}")
-    return app.answer_with_prompt(prompt)
+    # Reuse the client of the App running this generated code; outside of one,
+    # fall back to the shared default model instead of constructing a new App
+    app = get_calling_app()
+    sink = claim_stream_sink()
+    if sink is not None:
+        # App.stream_answer is waiting for this call's text as the answer: forward tokens as they are generated
+        if app is not None:
+            chunks = app.stream_with_prompt(prompt)
+        else:
+            chunks = stream_with_prompt(get_registry().get_chat_model(), prompt)
+        return forward_stream(chunks, sink)
+    if app is not None:
+        return app.answer_with_prompt(prompt)
+    return invoke_with_prompt(get_registry().get_chat_model(), prompt)
+
+
+# The sync tools can block (cache locks, loading the gazetteer, real I/O), so the
+# async variants run them in a worker thread instead of on the event loop
+
+async def get_user_location_async() -> tuple[str, str]:
+    """Async variant of get_user_location for generated async programs; returns at once."""
+    return get_user_location()
 
+
+async def get_geo_from_county_async(county: str, state: str) -> tuple[float, float]:
+    """Async variant of get_geo_from_county for generated async programs."""
+    return await asyncio.to_thread(get_geo_from_county, county, state)
+
+
+async def get_county_from_geo_async(latitude: float, longitude: float) -> tuple[str, str]:
+    """Async variant of get_county_from_geo for generated async programs."""
+    return await asyncio.to_thread(get_county_from_geo, latitude, longitude)
+
+
+async def get_local_weather_async(latitude: float, longitude: float) -> Weather:
+    """Async variant of get_local_weather for generated async programs."""
+    return await asyncio.to_thread(get_local_weather, latitude, longitude)
+
+
+async def get_local_weather_many_async(latitudes: Sequence[float], longitudes: Sequence[float]) -> WeatherColumns:
+    """Async variant of get_local_weather_many for generated async programs."""
+    return await asyncio.to_thread(get_local_weather_many, latitudes, longitudes)
+
+
+async def call_llm_async(prompt: str) -> str:
+    """Async variant of call_llm; awaits the model without blocking the event loop."""
+    print(f"Calling LLM with prompt: {prompt}")
+    app = get_calling_app()
+    if app is not None:
+        return await app.aanswer_with_prompt(prompt)
+    return await ainvoke_with_prompt(get_registry().get_chat_model(), prompt)
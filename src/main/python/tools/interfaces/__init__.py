@@ -3,24 +3,34 @@ Weather tools interfaces package.
 """
 from .weather_tools import (
     Weather,
+    WeatherColumns,
     GetUserLocationFunc,
     GetGeoFromCountyFunc,
+    GetCountyFromGeoFunc,
     GetLocalWeatherFunc,
+    GetLocalWeatherManyFunc,
     CallLLMFunc,
     get_user_location,
     get_geo_from_county,
+    get_county_from_geo,
     get_local_weather,
+    get_local_weather_many,
     call_llm
 )
 
 __all__ = [
     'Weather',
+    'WeatherColumns',
     'GetUserLocationFunc',
     'GetGeoFromCountyFunc', 
+    'GetCountyFromGeoFunc',
     'GetLocalWeatherFunc',
+    'GetLocalWeatherManyFunc',
     'CallLLMFunc',
     'get_user_location',
     'get_geo_from_county',
+    'get_county_from_geo',
     'get_local_weather',
+    'get_local_weather_many',
     'call_llm'
 ]
@@ -1,27 +1,47 @@
 """
 Weather tools interface definitions - standalone function signatures.
+
+Each decorated stub is rendered into the system prompt; implementations live in
+tools/implementations/weather_tools_impl.py (see tools.registry).
 """
-from typing import Callable
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+from ..registry import interface_type, tool
 
 # Function type aliases for the weather tools interface
 GetUserLocationFunc = Callable[[], tuple[str, str]]
 GetGeoFromCountyFunc = Callable[[str, str], tuple[float, float]]
+GetCountyFromGeoFunc = Callable[[float, float], tuple[str, str]]
 GetLocalWeatherFunc = Callable[[float, float], 'Weather']
+GetLocalWeatherManyFunc = Callable[[Sequence[float], Sequence[float]], 'WeatherColumns']
 CallLLMFunc = Callable[[str], str]
 
 
-"""INTERFACE DEFINITIONS"""
-
+@interface_type
+@dataclass(frozen=True, slots=True)
 class Weather:
-    """Weather data container"""
-    def __init__(self, temperature_fahrenheit: float, precipitation_chance_percent: float):
-        self.temperature_fahrenheit = temperature_fahrenheit
-        self.precipitation_chance_percent = precipitation_chance_percent  # 0.0 to 100.0
+    """Weather data container (read-only)"""
+    temperature_fahrenheit: float
+    precipitation_chance_percent: float  # 0.0 to 100.0
 
 
+@interface_type
+@dataclass(frozen=True, slots=True)
+class WeatherColumns:
+    """Weather for many points as columns; element i of each column belongs to point i"""
+    temperature_fahrenheit: Sequence[float]  # numpy.ndarray if NumPy is installed, else array.array('d')
+    precipitation_chance_percent: Sequence[float]
 
+    def __len__(self) -> int:
+        return len(self.temperature_fahrenheit)
 
+    def __getitem__(self, index: int) -> Weather:
+        return Weather(float(self.temperature_fahrenheit[index]), float(self.precipitation_chance_percent[index]))
 
+
+@tool(keywords="location located where here live state county city place local",
+      speculative=True)
 def get_user_location() -> tuple[str, str]:
     """
     Returns:
@@ -30,6 +50,8 @@ def get_user_location() -> tuple[str, str]:
     ...
 
 
+@tool(keywords="coordinates latitude longitude geocode map position",
+      speculative=True)
 def get_geo_from_county(county: str, state: str) -> tuple[float, float]:
     """
     Returns:
@@ -38,6 +60,18 @@ def get_geo_from_county(county: str, state: str) -> tuple[float, float]:
     ...
 
 
+@tool(keywords="county state reverse geocode which nearest closest coordinates latitude longitude point",
+      speculative=True)
+def get_county_from_geo(latitude: float, longitude: float) -> tuple[str, str]:
+    """
+    Returns:
+    tuple[str, str]: (county, state) closest to the coordinates
+    """
+    ...
+
+
+@tool(keywords="weather temperature outside hot cold warm rain precipitation umbrella forecast wear clothing jacket",
+      requires=('get_geo_from_county', 'get_user_location'), speculative=True)
 def get_local_weather(latitude: float, longitude: float) -> Weather:
     """
     Returns:
@@ -46,6 +80,19 @@ def get_local_weather(latitude: float, longitude: float) -> Weather:
     ...
 
 
+@tool(keywords="weather temperature forecast rain precipitation many several multiple all cities points batch bulk compare",
+      requires=('get_geo_from_county',))
+def get_local_weather_many(latitudes: Sequence[float], longitudes: Sequence[float]) -> WeatherColumns:
+    """
+    Weather for many points in one call; prefer it to calling get_local_weather in a loop.
+
+    Returns:
+    WeatherColumns: columns aligned with the input coordinates
+    """
+    ...
+
+
+@tool(always_include=True)
 def call_llm(prompt: str) -> str:
     """Special function to call self with the additional context data returned by the functions. 
     Ensure returned data is integrated into the prompt, along with user's original question."""
@@ -0,0 +1,356 @@
+"""
+Registry of the tools generated programs can call.
+
+A tool is declared once, on its interface stub:
+
+    @tool()
+    def get_user_location() -> tuple[str, str]:
+        ...
+
+The implementation is imported lazily, the first time a namespace needs it.
+By convention it is the function of the same name in the matching
+tools.implementations.<module>_impl module, with <name>_async as its async
+variant; either can be given explicitly as "module:attribute". Classes the
+stubs refer to, such as Weather, are registered with @interface_type.
+
+Interface stubs are rendered into the system prompt from their source file,
+re-read when the file's mtime changes, and only the stubs (and the classes they
+mention) of the selected tools are rendered. select() picks the tools relevant
+to a question with the BM25 index in tools.selection.
+"""
+import ast
+import importlib
+import inspect
+import os
+import pkgutil
+import re
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+
+class ToolSpec:
+    """A registered tool function or interface class."""
+
+    __slots__ = ('name', 'stub', 'implementation', 'async_implementation', 'is_type',
+                 'keywords', 'requires', 'always_include', 'speculative')
+
+    def __init__(self, name: str, stub: Any, implementation: Optional[str] = None,
+                 async_implementation: Optional[str] = None, is_type: bool = False,
+                 keywords: str = '', requires: tuple[str, ...] = (), always_include: bool = False,
+                 speculative: bool = False):
+        """
+        Args:
+            name: Name the tool is called by in generated programs
+            stub: The interface stub function or interface class
+            implementation: "module:attribute" of the implementation
+            async_implementation: "module:attribute" of the async implementation
+            is_type: True for interface classes, which are their own implementation
+            keywords: Extra search terms for tool selection
+            requires: Tools selected together with this one (e.g. producers of its arguments)
+            always_include: Render this tool into every prompt, whatever the question
+            speculative: The tool has no side effects and may be called before the
+                program runs (see speculation)
+        """
+        self.name = name
+        self.stub = stub
+        self.implementation = implementation
+        self.async_implementation = async_implementation
+        self.is_type = is_type
+        self.keywords = keywords
+        self.requires = tuple(requires)
+        self.always_include = always_include
+        self.speculative = speculative
+
+    @property
+    def description(self) -> str:
+        """Docstring of the interface stub."""
+        return inspect.getdoc(self.stub) or ''
+
+    @property
+    def source_file(self) -> Optional[str]:
+        """File the interface stub is defined in."""
+        try:
+            return inspect.getsourcefile(self.stub)
+        except TypeError:
+            return None
+
+
+def default_implementation(stub: Any) -> str:
+    """Return the conventional "module:attribute" implementation path of a stub."""
+    module = stub.__module__
+    package, _, name = module.rpartition('.')
+    if package.endswith('.interfaces') or package == 'interfaces':
+        package = package[:-len('interfaces')] + 'implementations'
+    return f"{package}.{name}_impl:{stub.__name__}" if package else f"{name}_impl:{stub.__name__}"
+
+
+def _import_attribute(path: str) -> Any:
+    module_name, _, attribute = path.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _file_mtime(path: Optional[str]) -> Optional[int]:
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_definitions(path: str) -> dict[str, str]:
+    """Return the source of every top-level function and class in a file, without decorators."""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    lines = source.splitlines()
+    definitions = {}
+    for node in ast.parse(source, filename=path).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions[node.name] = '\n'.join(lines[node.lineno - 1:node.end_lineno])
+    return definitions
+
+
+def _async_wrapper(function: Callable[..., Any]) -> Callable[..., Any]:
+    # Tools without an async implementation run on a worker thread
+    async def run_in_thread(*args, **kwargs):
+        import asyncio
+        return await asyncio.to_thread(function, *args, **kwargs)
+    run_in_thread.__name__ = function.__name__
+    run_in_thread.__doc__ = function.__doc__
+    return run_in_thread
+
+
+class ToolRegistry:
+    """
+    Thread-safe table of tools, their lazily imported implementations and prompt stubs.
+
+    Resolved implementations are kept in a dict keyed by (name, asynchronous),
+    so building a namespace is a table lookup per tool after the first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._specs: dict[str, ToolSpec] = {}
+        self._resolved: dict[tuple[str, bool], Any] = {}
+        self._full_namespaces: dict[bool, dict[str, Any]] = {}
+        self._sources: dict[str, tuple[Optional[int], dict[str, str]]] = {}
+        self._index = None
+
+    def register(self, spec: ToolSpec) -> ToolSpec:
+        """Add or replace a tool."""
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._resolved.pop((spec.name, False), None)
+            self._resolved.pop((spec.name, True), None)
+            self._full_namespaces.clear()
+            self._index = None
+        return spec
+
+    def tool(self, implementation: Optional[str] = None, async_implementation: Optional[str] = None,
+             name: Optional[str] = None, keywords: str = '', requires: tuple[str, ...] = (),
+             always_include: bool = False,
+             speculative: bool = False) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator registering an interface stub as a tool.
+
+        Args:
+            implementation: "module:attribute" of the implementation (default: by convention)
+            async_implementation: "module:attribute" of the async implementation
+                (default: <implementation>_async if it exists, else the sync one on a thread)
+            name: Tool name (default: the stub's name)
+            keywords: Extra search terms for tool selection, e.g. synonyms
+            requires: Tools to select whenever this one is selected
+            always_include: Render this tool into every prompt
+            speculative: Allow prefetching calls while the program is generated
+
+        Returns:
+            Decorator returning the stub unchanged
+        """
+        def decorator(stub: Callable[..., Any]) -> Callable[..., Any]:
+            self.register(ToolSpec(name or stub.__name__, stub, implementation or default_implementation(stub),
+                                   async_implementation, keywords=keywords, requires=requires,
+                                   always_include=always_include, speculative=speculative))
+            return stub
+        return decorator
+
+    def interface_type(self, cls: type) -> type:
+        """Class decorator registering a class that tool signatures refer to."""
+        self.register(ToolSpec(cls.__name__, cls, is_type=True))
+        return cls
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def get(self, name: str) -> ToolSpec:
+        """Return the spec of a registered tool or interface class."""
+        return self._specs[name]
+
+    def tool_names(self) -> list[str]:
+        """Names of the registered tool functions, in registration order."""
+        return [spec.name for spec in self._specs.values() if not spec.is_type]
+
+    def specs(self) -> list[ToolSpec]:
+        """All registered tool functions and interface classes."""
+        return list(self._specs.values())
+
+    def implementation(self, name: str, asynchronous: bool = False) -> Any:
+        """
+        Return a tool's implementation, importing it on first use.
+
+        Args:
+            name: Tool name
+            asynchronous: Return the coroutine-function variant
+
+        Returns:
+            The implementation callable (or the class, for interface classes)
+        """
+        key = (name, asynchronous)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        spec = self._specs[name]
+        if spec.is_type:
+            resolved = spec.stub
+        elif not asynchronous:
+            resolved = _import_attribute(spec.implementation)
+        elif spec.async_implementation is not None:
+            resolved = _import_attribute(spec.async_implementation)
+        else:
+            module_name, _, attribute = spec.implementation.partition(':')
+            resolved = getattr(importlib.import_module(module_name), attribute + '_async', None)
+            if resolved is None:
+                resolved = _async_wrapper(self.implementation(name))
+        with self._lock:
+            return self._resolved.setdefault(key, resolved)
+
+    def namespace(self, names: Optional[Iterable[str]] = None, asynchronous: bool = False) -> dict[str, Any]:
+        """
+        Build the globals dict a generated program is executed in.
+
+        Args:
+            names: Tools to include (default: all); interface classes are always included
+            asynchronous: Use the async implementations
+
+        Returns:
+            dict: A fresh namespace with the tools, interface classes and builtins
+        """
+        if names is None:
+            full = self._full_namespaces.get(asynchronous)
+            if full is None:
+                full = {spec.name: self.implementation(spec.name, asynchronous) for spec in self.specs()}
+                full['__builtins__'] = __builtins__
+                with self._lock:
+                    self._full_namespaces[asynchronous] = full
+            return dict(full)
+        namespace = {spec.name: spec.stub for spec in self.specs() if spec.is_type}
+        for name in names:
+            namespace[name] = self.implementation(name, asynchronous)
+        namespace['__builtins__'] = __builtins__
+        return namespace
+
+    def _definitions(self, path: str) -> dict[str, str]:
+        mtime = _file_mtime(path)
+        with self._lock:
+            cached = self._sources.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        definitions = _read_definitions(path)
+        with self._lock:
+            self._sources[path] = (mtime, definitions)
+        return definitions
+
+    def stub_source(self, name: str) -> str:
+        """Source of a tool's interface stub (without decorators), as shown in the prompt."""
+        spec = self._specs[name]
+        path = spec.source_file
+        if path is not None:
+            source = self._definitions(path).get(spec.stub.__name__)
+            if source is not None:
+                return source
+        return inspect.getsource(spec.stub)
+
+    def source_mtimes(self) -> tuple:
+        """mtimes of the files stubs are rendered from; changes when any of them is edited."""
+        paths = sorted({spec.source_file for spec in self.specs()} - {None})
+        return tuple(_file_mtime(path) for path in paths)
+
+    def _tool_index(self):
+        index = self._index
+        if index is None:
+            from .selection import ToolIndex
+            documents = {name: f"{name} {self._specs[name].keywords} {self.stub_source(name)}"
+                         for name in self.tool_names()}
+            index = ToolIndex(documents)
+            with self._lock:
+                self._index = index
+        return index
+
+    def rank(self, question: str, k: int) -> list[tuple[str, float]]:
+        """Return up to k (tool name, relevance score) pairs for a question, best first."""
+        return self._tool_index().rank(question, k)
+
+    def select(self, question: str, k: int) -> list[str]:
+        """
+        Pick the tools relevant to a question.
+
+        Args:
+            question: The user's question
+            k: Number of best-ranked tools to take; always_include tools and the
+                requirements of selected tools are added on top
+
+        Returns:
+            list[str]: Selected tool names, in registration order
+        """
+        from .selection import expand_requirements
+        chosen = self._tool_index().select(question, k)
+        chosen.extend(spec.name for spec in self.specs() if spec.always_include)
+        selected = expand_requirements(chosen, {spec.name: spec.requires for spec in self.specs()})
+        return [name for name in self.tool_names() if name in selected]
+
+    def render(self, names: Optional[Iterable[str]] = None) -> str:
+        """
+        Render interface stubs for the system prompt.
+
+        Args:
+            names: Tools to render (default: all); interface classes are
+                rendered if a rendered stub mentions them
+
+        Returns:
+            str: Interface classes followed by the tool stubs
+        """
+        if names is None:
+            names = self.tool_names()
+        functions = [self.stub_source(name) for name in names]
+        mentioned = '\n'.join(functions)
+        types = [self.stub_source(spec.name) for spec in self.specs()
+                 if spec.is_type and re.search(rf'\b{re.escape(spec.name)}\b', mentioned)]
+        return '\n\n\n'.join(types + functions) + '\n'
+
+
+_default_registry = ToolRegistry()
+_loaded = False
+_load_lock = threading.Lock()
+
+tool = _default_registry.tool
+interface_type = _default_registry.interface_type
+
+
+def get_tool_registry() -> ToolRegistry:
+    """
+    Return the process-wide registry, importing every module in tools.interfaces once.
+
+    Implementations are not imported here; see ToolRegistry.implementation.
+    """
+    global _loaded
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                interfaces = importlib.import_module(__package__ + '.interfaces')
+                for module in pkgutil.iter_modules(interfaces.__path__):
+                    importlib.import_module(f"{interfaces.__name__}.{module.name}")
+                _loaded = True
+    return _default_registry
@@ -0,0 +1,102 @@
+"""
+Lexical relevance ranking of tools for a question.
+
+ToolIndex is an in-memory BM25 index over each tool's name, keywords, signature
+and docstring. It needs no network or model, builds in milliseconds for a
+thousand tools and ranks by walking only the postings of the question's terms.
+"""
+import heapq
+import math
+import re
+from typing import Iterable
+
+_WORD = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+    'a an and are am at be by can do does for from how i in is it me my of on or '
+    'should the this to today what which will with you your'.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lower-case search terms.
+
+    Identifiers are split on underscores, stopwords are dropped and a plural
+    "s" is stripped, so "get_local_weather" and "weathers" share terms.
+    """
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class ToolIndex:
+    """Okapi BM25 index mapping questions to the most relevant tool names."""
+
+    def __init__(self, documents: dict[str, str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents: Tool name -> searchable text
+            k1: Term-frequency saturation
+            b: Document-length normalization
+        """
+        self.names = list(documents)
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        for doc_id, text in enumerate(documents.values()):
+            counts: dict[str, int] = {}
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + 1
+            self._lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self._postings.setdefault(term, []).append((doc_id, count))
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        count = len(self.names)
+        self._idf = {term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                     for term, postings in self._postings.items()}
+
+    def rank(self, question: str, k: int) -> list[tuple[str, float]]:
+        """
+        Return the k best-matching tools for a question.
+
+        Args:
+            question: The user's question
+            k: Maximum number of tools to return
+
+        Returns:
+            list[tuple[str, float]]: (tool name, score) pairs, best first; tools
+            sharing no term with the question are not returned
+        """
+        scores: dict[int, float] = {}
+        for term in set(tokenize(question)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            idf = self._idf[term]
+            for doc_id, count in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / self._average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.names[doc_id], score) for doc_id, score in best]
+
+    def select(self, question: str, k: int) -> list[str]:
+        """Return the names of the k best-matching tools, best first."""
+        return [name for name, _ in self.rank(question, k)]
+
+
+def expand_requirements(names: Iterable[str], requires: dict[str, tuple[str, ...]]) -> set[str]:
+    """Return names plus every tool they (transitively) require."""
+    selected = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(requires.get(name, ()))
+    return selected
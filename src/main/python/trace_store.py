@@ -0,0 +1,435 @@
+"""
+Append-only on-disk log of answered questions, and offline replay.
+
+With App(trace_store=TraceStore(directory)), every App.answer appends one
+record: the question, the raw model output and cleaned program that produced
+the answer, every tool call that program made (arguments, result or error,
+duration), the answer and the time spent generating and executing. Records are
+compact JSON lines in numbered segment files; a segment that reaches
+segment_bytes is closed and gzip-compressed, and writing continues in the next.
+
+replay() re-runs recorded outputs through execution.execute_llm_code with each
+tool answering from the recorded calls, so changes to cleaning, compilation or
+execution can be regression-tested and benchmarked against real traffic with
+no model or tool latency.
+
+Tool values are stored as JSON where possible; tuples, interface dataclasses
+such as Weather, array.array and NumPy arrays are tagged so they are rebuilt
+exactly, and anything else is pickled. A value that cannot be stored at all
+(e.g. it does not pickle) is recorded as an __unencodable__ placeholder, so
+recording never changes what the program sees; replay treats such calls as
+not recorded. Trace files may come from elsewhere, so pickled values are only
+loaded with allow_pickle=True, and dataclass and exception types are only
+looked up among modules already imported (the tool registry imports the tool
+modules). A tool that raised is replayed by raising
+the recorded exception type, so the program's own except clauses still apply.
+Programs answered by a coalesced flight have no source to record and are
+skipped by replay.
+"""
+import array
+import base64
+import contextvars
+import dataclasses
+import functools
+import gzip
+import json
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from execution import execute_llm_code
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+_SEGMENT = re.compile(r'traces-(\d{6})\.jsonl(\.gz)?$')
+
+_active: contextvars.ContextVar[Optional['Recording']] = contextvars.ContextVar('recording', default=None)
+
+
+def current_recording() -> Optional['Recording']:
+    """Return the recording of the answer running in this context, if any."""
+    return _active.get()
+
+
+def encode_value(value: Any) -> Any:
+    """Return a JSON-compatible form of a tool argument or result that decode_value rebuilds."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, tuple):
+        return {'__tuple__': [encode_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {'__dict__': [[encode_value(key), encode_value(item)] for key, item in value.items()]}
+    if isinstance(value, array.array):
+        return {'__array__': value.typecode, 'items': value.tolist()}
+    if type(value).__module__ == 'numpy' and type(value).__name__ == 'ndarray':
+        return {'__ndarray__': value.dtype.str, 'items': value.tolist()}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {'__dataclass__': type_path(type(value)),
+                'fields': {field.name: encode_value(getattr(value, field.name)) for field in dataclasses.fields(value)}}
+    return {'__pickle__': base64.b64encode(pickle.dumps(value)).decode('ascii')}
+
+
+def _unencodable(error: Exception) -> dict[str, str]:
+    # Stands in for a value encode_value failed on
+    return {'__unencodable__': f'{type(error).__name__}: {error}'}
+
+
+def type_path(cls: type) -> str:
+    """Return the "module:qualname" reference of a class, as stored in traces."""
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+
+def _loaded_class(path: str) -> Optional[type]:
+    # Only modules this process already imported; a trace file never causes an import
+    module_name, _, qualname = path.partition(':')
+    target: Any = sys.modules.get(module_name)
+    for part in qualname.split('.'):
+        target = getattr(target, part, None)
+    return target if isinstance(target, type) else None
+
+
+def decode_value(value: Any, allow_pickle: bool = False) -> Any:
+    """
+    Rebuild a value stored by encode_value.
+
+    Args:
+        value: Encoded value
+        allow_pickle: Unpickle values that had no JSON form; only for trusted trace files
+
+    Raises:
+        ValueError: For a pickled value without allow_pickle, a dataclass type that is not loaded,
+            or a value that could not be recorded
+    """
+    if isinstance(value, list):
+        return [decode_value(item, allow_pickle) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if '__tuple__' in value:
+        return tuple(decode_value(item, allow_pickle) for item in value['__tuple__'])
+    if '__dict__' in value:
+        return {decode_value(key, allow_pickle): decode_value(item, allow_pickle) for key, item in value['__dict__']}
+    if '__array__' in value:
+        return array.array(value['__array__'], value['items'])
+    if '__ndarray__' in value:
+        try:
+            import numpy
+        except ImportError:
+            return array.array('d', value['items'])
+        return numpy.array(value['items'], dtype=value['__ndarray__'])
+    if '__dataclass__' in value:
+        cls = _loaded_class(value['__dataclass__'])
+        if cls is None or not dataclasses.is_dataclass(cls):
+            raise ValueError(f"{value['__dataclass__']} is not a loaded dataclass")
+        return cls(**{name: decode_value(item, allow_pickle) for name, item in value['fields'].items()})
+    if '__pickle__' in value:
+        if not allow_pickle:
+            raise ValueError("trace holds a pickled value; replay with allow_pickle=True if the trace is trusted")
+        return pickle.loads(base64.b64decode(value['__pickle__']))
+    if '__unencodable__' in value:
+        raise ValueError(f"value was not recorded ({value['__unencodable__']})")
+    return value
+
+
+def exception_from_call(call: dict[str, Any]) -> Exception:
+    """
+    Return the exception a recorded tool call raised.
+
+    The recorded type is used if it is a loaded Exception class that can be built
+    from the recorded message; otherwise RuntimeError("Type: message").
+    """
+    error_type = _loaded_class(call.get('error_type', ''))
+    if error_type is not None and issubclass(error_type, Exception):
+        try:
+            return error_type(call['error'])
+        except Exception:
+            pass
+    return RuntimeError(f"{call.get('error_type', 'Exception').rpartition(':')[2]}: {call['error']}")
+
+
+def _encode_call(args: tuple, kwargs: dict) -> tuple[Any, Any]:
+    # Keyword arguments are sorted so the same call always encodes the same way
+    return encode_value(list(args)), encode_value(dict(sorted(kwargs.items())))
+
+
+def _call_key(name: str, encoded_args: Any, encoded_kwargs: Any) -> str:
+    return json.dumps([name, encoded_args, encoded_kwargs], separators=(',', ':'))
+
+
+def call_key(name: str, args: tuple, kwargs: dict) -> str:
+    """Return the replay lookup key of a tool call."""
+    return _call_key(name, *_encode_call(args, kwargs))
+
+
+class Recording:
+    """The program and tool calls of one answer, collected while it runs."""
+
+    def __init__(self, question: str):
+        self.question = question
+        self.started = time.time()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.llm_output: Optional[str] = None
+        self.source: Optional[str] = None
+        self.attempts = 0
+        self.calls: list[dict[str, Any]] = []
+        self.timings_ms: dict[str, float] = {}
+
+    def program(self, source: Optional[str], llm_output: Optional[str] = None) -> None:
+        """Start recording a new program attempt; tool calls of earlier attempts are dropped."""
+        with self._lock:
+            self.source = source
+            self.llm_output = llm_output
+            self.attempts += 1
+            self.calls = []
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Add the duration of the block to the stage's total."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.timings_ms[stage] = self.timings_ms.get(stage, 0.0) + elapsed
+
+    def wrap(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Return function recording each call's arguments, result and duration."""
+        @functools.wraps(function)
+        def recorded(*args, **kwargs):
+            try:
+                encoded_args, encoded_kwargs = _encode_call(args, kwargs)
+            except Exception as e:
+                encoded_args = encoded_kwargs = _unencodable(e)
+            call = {'tool': name, 'args': encoded_args, 'kwargs': encoded_kwargs}
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                call['error'] = str(e)
+                call['error_type'] = type_path(type(e))
+                raise
+            else:
+                try:
+                    call['result'] = encode_value(result)
+                except Exception as e:
+                    call['result'] = _unencodable(e)
+                return result
+            finally:
+                call['ms'] = round((time.perf_counter() - started) * 1000, 3)
+                with self._lock:
+                    self.calls.append(call)
+        return recorded
+
+    @contextmanager
+    def active(self) -> Iterator['Recording']:
+        """Make this recording visible to App for the duration of the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    def to_record(self, answer: str) -> dict[str, Any]:
+        """Return the JSON record of the finished answer."""
+        with self._lock:
+            timings = {stage: round(ms, 3) for stage, ms in self.timings_ms.items()}
+            timings['total'] = round((time.perf_counter() - self._started) * 1000, 3)
+            return {
+                'time': self.started,
+                'question': self.question,
+                'llm_output': self.llm_output,
+                'source': self.source,
+                'attempts': self.attempts,
+                'calls': list(self.calls),
+                'answer': answer,
+                'timings_ms': timings,
+            }
+
+
+class TraceStore:
+    """Thread-safe append-only trace log in a directory of segment files."""
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES, compress: bool = True):
+        """
+        Args:
+            directory: Directory holding the segments; created if missing
+            segment_bytes: Size at which the current segment is closed and a new one started
+            compress: gzip closed segments
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        numbers = [number for number, _ in self._segments()]
+        self._number = max(numbers, default=0) + 1
+        self._file = None
+        self._size = 0
+        self.appended = 0
+
+    def _segments(self) -> list[tuple[int, str]]:
+        segments = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, f'traces-{number:06d}.jsonl')
+
+    def append(self, record: dict[str, Any]) -> None:
+        """Append one record as a JSON line."""
+        line = (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path(self._number), 'ab')
+                self._size = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+            self.appended += 1
+            if self._size >= self.segment_bytes:
+                self._close_segment()
+
+    def _close_segment(self) -> None:
+        # Caller must hold self._lock
+        self._file.close()
+        self._file = None
+        path = self._path(self._number)
+        if self.compress:
+            with open(path, 'rb') as source, gzip.open(f'{path}.gz', 'wb') as target:
+                target.writelines(source)
+            os.remove(path)
+        self._number += 1
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """Yield every record in the order it was appended."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        for _, path in self._segments():
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def stats(self) -> dict[str, int]:
+        """Return records appended by this process, segments and bytes on disk."""
+        segments = self._segments()
+        return {
+            'appended': self.appended,
+            'segments': len(segments),
+            'bytes': sum(os.path.getsize(path) for _, path in segments),
+        }
+
+    def close(self) -> None:
+        """Close the current segment file (it is compressed once full, not on close)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ReplayMiss(LookupError):
+    """Raised when a replayed program makes a tool call that was not recorded."""
+
+
+def _replay_tool(name: str, results: dict[str, deque], allow_pickle: bool) -> Callable[..., Any]:
+    def replayed(*args, **kwargs):
+        try:
+            key = call_key(name, args, kwargs)
+        except Exception:
+            key = None
+        outcomes = results.get(key)
+        if not outcomes:
+            raise ReplayMiss(f"no recorded result for {name}{args!r}")
+        # Repeated calls take the recorded results in order; the last one is kept for any further calls
+        call = outcomes.popleft() if len(outcomes) > 1 else outcomes[0]
+        if 'error' in call:
+            raise exception_from_call(call)
+        if isinstance(call['result'], dict) and '__unencodable__' in call['result']:
+            raise ReplayMiss(f"result of {name}{args!r} was not recorded ({call['result']['__unencodable__']})")
+        return decode_value(call['result'], allow_pickle)
+    replayed.__name__ = name
+    return replayed
+
+
+def replay_namespace(record: dict[str, Any], tool_registry=None, allow_pickle: bool = False) -> dict:
+    """Return a program namespace whose tools answer from the record's tool calls."""
+    if tool_registry is None:
+        from tools.registry import get_tool_registry
+        tool_registry = get_tool_registry()
+    namespace = tool_registry.namespace()
+    results: dict[str, deque] = {}
+    for call in record['calls']:
+        # Matched by encoded form, so arguments are never decoded
+        results.setdefault(_call_key(call['tool'], call['args'], call['kwargs']), deque()).append(call)
+    for name in set(tool_registry.tool_names()) | {call['tool'] for call in record['calls']}:
+        namespace[name] = _replay_tool(name, results, allow_pickle)
+    return namespace
+
+
+class ReplayReport:
+    """Outcome of replaying a set of records."""
+
+    def __init__(self):
+        self.replayed = 0
+        self.matched = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        # (question, recorded answer, replayed answer) of every mismatch
+        self.changed: list[tuple[str, str, str]] = []
+
+    def stats(self) -> dict[str, Any]:
+        """Return replay counters and the mean time per replayed record."""
+        return {
+            'replayed': self.replayed,
+            'matched': self.matched,
+            'changed': len(self.changed),
+            'skipped': self.skipped,
+            'seconds': self.seconds,
+            'mean_us': self.seconds / self.replayed * 1e6 if self.replayed else 0.0,
+        }
+
+
+def replay(records: Iterable[dict[str, Any]], tool_registry=None,
+           execute: Callable[[str, str, dict], str] = execute_llm_code, allow_pickle: bool = False) -> ReplayReport:
+    """
+    Re-run recorded programs against their recorded tool results, with no model calls.
+
+    Args:
+        records: Records from TraceStore.records()
+        tool_registry: Registry providing interface classes (default: the process-wide one)
+        execute: Runs (llm_output, question, namespace) to an answer; execution.execute_llm_code
+            by default, or the code under test
+        allow_pickle: Unpickle tool values that had no JSON form; only for trusted trace files
+
+    Returns:
+        ReplayReport: Matches, changed answers, skipped records and time spent executing
+    """
+    report = ReplayReport()
+    for record in records:
+        llm_output = record.get('llm_output') or record.get('source')
+        if not llm_output:
+            report.skipped += 1
+            continue
+        namespace = replay_namespace(record, tool_registry, allow_pickle)
+        started = time.perf_counter()
+        answer = execute(llm_output, record['question'], namespace)
+        report.seconds += time.perf_counter() - started
+        report.replayed += 1
+        if answer == record['answer']:
+            report.matched += 1
+        else:
+            report.changed.append((record['question'], record['answer'], answer))
+    return report
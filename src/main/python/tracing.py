@@ -0,0 +1,292 @@
+"""
+Per-stage tracing for the answer pipeline.
+
+A Tracer hands out nested spans (prompt build, generation, clean, compile,
+execution, every tool call, nested call_llm generations) and passes each
+finished span to its exporters. The current span is held in a context variable,
+so spans opened in tool threads started with a copied context nest correctly.
+
+App uses NULL_TRACER unless a Tracer is passed in, which makes every span a
+shared no-op object.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """A timed pipeline stage with attributes and an optional parent span."""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'trace_id', 'thread_id',
+                 'start_ns', 'end_ns', 'start_time', 'attributes', '_token')
+
+    def __init__(self, name: str, parent: Optional['Span'], attributes: dict[str, Any]):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.thread_id = threading.get_ident()
+        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'thread_id': self.thread_id,
+            'start_time': self.start_time,
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+        }
+
+
+class _SpanContext:
+    __slots__ = ('tracer', 'span')
+
+    def __init__(self, tracer: 'Tracer', span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.span._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.span.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.span.attributes['error'] = f"{exc_type.__name__}: {exc_value}"
+        _current_span.reset(self.span._token)
+        self.tracer._export(self.span)
+
+
+class Tracer:
+    """Creates spans and forwards finished ones to the configured exporters."""
+
+    enabled = True
+
+    def __init__(self, exporters: Optional[list] = None, profile_generated_code: bool = False):
+        """
+        Args:
+            exporters: Objects with export(span) and close() methods
+            profile_generated_code: Attach a cProfile summary to each execute span
+        """
+        self.exporters = list(exporters or [])
+        self.profile_generated_code = profile_generated_code
+
+    def span(self, name: str, **attributes: Any) -> _SpanContext:
+        """
+        Open a span nested under the current one.
+
+        Args:
+            name: Stage name, e.g. "llm.generate" or "tool.get_local_weather"
+            **attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the Span
+        """
+        return _SpanContext(self, Span(name, _current_span.get(), attributes))
+
+    def wrap_tool(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Return function wrapped in a "tool.<name>" span per call."""
+        @functools.wraps(function)
+        def traced(*args, **kwargs):
+            with self.span(f'tool.{name}', args=repr(args)[:200]):
+                return function(*args, **kwargs)
+        return traced
+
+    def profile(self, span: Span, function: Callable[..., Any], *args) -> Any:
+        """
+        Call function under cProfile and attach the top entries to span.
+
+        Profiling is skipped if another profiler is already active (Python
+        3.12+ allows one profiler per process).
+        """
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return function(*args)
+        try:
+            return function(*args)
+        finally:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(20)
+            span.set_attribute('profile', output.getvalue())
+
+    def _export(self, span: Span) -> None:
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    def close(self) -> None:
+        """Flush and close every exporter."""
+        for exporter in self.exporters:
+            exporter.close()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+class NullTracer:
+    """Tracer that records nothing; the default for App."""
+
+    enabled = False
+    profile_generated_code = False
+    _span = _NullSpan()
+
+    def span(self, name: str, **attributes: Any) -> _NullSpan:
+        return self._span
+
+    def wrap_tool(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        return function
+
+    def close(self) -> None:
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span in this context, if any."""
+    return _current_span.get()
+
+
+def record_usage(span, response: Any) -> None:
+    """
+    Copy token counts from a chat model response onto span.
+
+    Reads the usage_metadata LangChain extracts from the Bedrock response
+    (input, output and cache read/write token counts).
+    """
+    usage = getattr(response, 'usage_metadata', None)
+    if not usage:
+        return
+    span.set_attribute('input_tokens', usage.get('input_tokens', 0))
+    span.set_attribute('output_tokens', usage.get('output_tokens', 0))
+    details = usage.get('input_token_details') or {}
+    if 'cache_read' in details:
+        span.set_attribute('cache_read_tokens', details['cache_read'])
+    if 'cache_creation' in details:
+        span.set_attribute('cache_write_tokens', details['cache_creation'])
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, e.g. for tests or ad-hoc inspection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def find(self, name: str) -> list[Span]:
+        """Return the finished spans with the given name."""
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesExporter:
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ChromeTraceExporter:
+    """
+    Collects spans as Chrome trace events and writes them on close.
+
+    The output loads in chrome://tracing or https://ui.perfetto.dev.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+
+    def export(self, span: Span) -> None:
+        event = {
+            'name': span.name,
+            'ph': 'X',
+            'ts': span.start_ns / 1000,
+            'dur': (span.end_ns - span.start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': span.thread_id,
+            'args': {key: str(value) for key, value in span.attributes.items()},
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def close(self) -> None:
+        with self._lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': self._events, 'displayTimeUnit': 'ms'}, f)
+
+
+def iter_tree(spans: list[Span]) -> Iterator[tuple[int, Span]]:
+    """Yield (depth, span) pairs in start order, for printing a trace as a tree."""
+    children: dict[Optional[int], list[Span]] = {}
+    for span in sorted(spans, key=lambda item: item.start_ns):
+        children.setdefault(span.parent_id, []).append(span)
+    known = {span.span_id for span in spans}
+
+    def walk(parent_id: Optional[int], depth: int) -> Iterator[tuple[int, Span]]:
+        for span in children.get(parent_id, []):
+            yield depth, span
+            yield from walk(span.span_id, depth + 1)
+
+    for root in sorted((span for span in spans if span.parent_id not in known), key=lambda item: item.start_ns):
+        yield 0, root
+        yield from walk(root.span_id, 1)
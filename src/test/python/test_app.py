@@ -1,8 +1,18 @@
 """
 Test module for the App class.
 """
+import asyncio
+import importlib.util
+import os
+import shutil
+import tempfile
 import unittest
+
 from app import App
+from fake_llm import FakeLLM
+from tools.registry import ToolRegistry
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), '..', 'resources', 'bedrock_responses.json')
 
 
 class TestApp(unittest.TestCase):    
@@ -92,6 +102,229 @@ class TestApp(unittest.TestCase):
         self.assertTrue(callable(getattr(self.app, 'answer')))
 
 
+class TestAppReplay(unittest.TestCase):
+    """Runs the question classes above against recorded Bedrock responses."""
+
+    def setUp(self):
+        """Set up an App replaying the recorded fixtures."""
+        self.app = App()
+        self.app.llm = FakeLLM.from_fixtures(FIXTURES_PATH)
+
+    def test_simple_knowledge_question(self):
+        """Test question that doesn't require any tools (pure knowledge)."""
+        self.assertIn("Jakarta", self.app.answer("what is the capital of Indonesia?"))
+
+    def test_single_tool_question(self):
+        """Test question requiring single tool call (location only)."""
+        self.assertIn("Washington", self.app.answer("what state am I in?"))
+
+    def test_chained_tools_question(self):
+        """Test question requiring tool chaining (location + weather)."""
+        result = self.app.answer("what is the temperature outside?")
+        self.assertIn("°F", result)
+        self.assertIn("temperature", result.lower())
+
+    def test_complex_reasoning_question(self):
+        """Test question requiring multiple tools + LLM reasoning."""
+        result = self.app.answer("what should I wear today?")
+        self.assertIn("King County", result)
+        self.assertIn("jacket", result)
+        self.assertEqual(self.app.llm.calls, 2)
+
+    def test_impossible_question(self):
+        """Test question that cannot be answered with available tools."""
+        self.assertIn("sorry", self.app.answer("what do I have in my pocket?").lower())
+
+    def test_async_answer(self):
+        """Test the async pipeline against the same fixtures."""
+        self.assertIn("Washington", asyncio.run(self.app.aanswer("where am I located?")))
+
+
+class CountingApp(App):
+    """App counting how often the system prompt is rendered."""
+
+    renders = 0
+
+    def build_system_prompt(self, names=None) -> str:
+        CountingApp.renders += 1
+        return super().build_system_prompt(names)
+
+
+class TestPromptCaching(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a registry whose single tool stub lives in a temporary file."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.interface_path = os.path.join(self.directory, 'humidity_tools.py')
+        self.write_interface("Returns the relative humidity.")
+        spec = importlib.util.spec_from_file_location('humidity_tools', self.interface_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.registry = ToolRegistry()
+        self.registry.tool(implementation='humidity_tools_impl:get_humidity')(module.get_humidity)
+        CountingApp.renders = 0
+
+    def write_interface(self, description):
+        with open(self.interface_path, 'w', encoding='utf-8') as f:
+            f.write(f'def get_humidity() -> float:\n    """{description}"""\n    ...\n')
+        # Make sure the rewrite is visible even on filesystems with coarse mtimes
+        stat = os.stat(self.interface_path)
+        os.utime(self.interface_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_system_prompt_is_rendered_once_per_process(self):
+        """Test that new App instances reuse the rendered system prompt."""
+        first = CountingApp(tool_registry=self.registry).system_prompt
+        second = CountingApp(tool_registry=self.registry).system_prompt
+        self.assertIs(first, second)
+        self.assertEqual(CountingApp.renders, 1)
+
+    def test_system_prompt_is_rerendered_when_interfaces_change(self):
+        """Test that editing an interface file invalidates the rendered prompt."""
+        before = CountingApp(tool_registry=self.registry).system_prompt
+        self.write_interface("Returns the dew point.")
+
+        after = CountingApp(tool_registry=self.registry).system_prompt
+        self.assertIn("relative humidity", before)
+        self.assertIn("dew point", after)
+        self.assertEqual(CountingApp.renders, 2)
+
+    def test_repeated_generations_read_system_prompt_from_cache(self):
+        """Test that the generation system prompt is sent with a cache point."""
+        app = App()
+        app.llm = FakeLLM.from_fixtures(FIXTURES_PATH)
+        app.answer("what state am I in?")
+        app.answer("where am I located?")
+
+        stats = app.usage.stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['cache_hit_rate'], 0.5)
+        self.assertGreater(stats['cache_read_tokens'], 0)
+
+    def test_prompt_caching_can_be_disabled(self):
+        """Test that no cache point is sent when prompt caching is off."""
+        app = App(prompt_caching=False)
+        app.llm = FakeLLM.from_fixtures(FIXTURES_PATH)
+        app.answer("what state am I in?")
+        app.answer("what state am I in?")
+
+        self.assertEqual(app.usage.stats()['cache_read_tokens'], 0)
+
+
+class TestAsyncExecution(unittest.TestCase):
+
+    ASYNC_PROGRAM = """```python
+async def answer_user_question(question: str) -> str:
+    county, state = await get_user_location()
+    latitude, longitude = await get_geo_from_county(county, state)
+    weather = await get_local_weather(latitude, longitude)
+    return f"{county}, {state}: {weather.temperature_fahrenheit:.0f}°F"
+```"""
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = App()
+
+    def test_async_program_is_awaited(self):
+        """Test that an async generated program runs with the async tools."""
+        result = asyncio.run(self.app.aexecute_llm_code(self.ASYNC_PROGRAM, "what is the temperature outside?"))
+
+        self.assertIn("King County, Washington", result)
+        self.assertIn("°F", result)
+
+    def test_sync_program_falls_back_to_thread(self):
+        """Test that a plain generated function still runs in async mode."""
+        program = "def answer_user_question(question):\n    return get_user_location()[1]"
+        result = asyncio.run(self.app.aexecute_llm_code(program, "what state am I in?"))
+
+        self.assertEqual(result, "Washington")
+
+    def test_many_programs_share_one_event_loop(self):
+        """Test that many async programs run concurrently on a single loop."""
+        async def run_all():
+            return await asyncio.gather(*(
+                self.app.aexecute_llm_code(self.ASYNC_PROGRAM, "what is the temperature outside?")
+                for _ in range(1000)
+            ))
+
+        results = asyncio.run(run_all())
+
+        self.assertEqual(len(results), 1000)
+        self.assertTrue(all("King County" in result for result in results))
+
+
+class ScriptedLLM:
+    """Chat model double returning a fixed program and streaming fixed chunks."""
+
+    def __init__(self, program, chunks=()):
+        self.program = program
+        self.chunks = list(chunks)
+
+    def invoke(self, messages):
+        return type("Message", (), {"content": self.program})()
+
+    def stream(self, messages):
+        for chunk in self.chunks:
+            yield type("Chunk", (), {"content": [{"type": "text", "text": chunk, "index": 0}]})()
+
+
+class TestStreamAnswer(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = App()
+
+    def test_call_llm_tokens_are_streamed(self):
+        """Test that the final call_llm output arrives chunk by chunk."""
+        self.app.llm = ScriptedLLM(
+            "def answer_user_question(question):\n    return call_llm('What to wear in ' + get_user_location()[1])",
+            chunks=["Wear ", "a ", "jacket."])
+
+        chunks = list(self.app.stream_answer("what should I wear today?"))
+
+        self.assertEqual(chunks, ["Wear ", "a ", "jacket."])
+
+    def test_direct_answer_is_single_chunk(self):
+        """Test that an answer returned directly is yielded once."""
+        self.app.llm = ScriptedLLM("def answer_user_question(question):\n    return 'Jakarta'")
+
+        self.assertEqual(list(self.app.stream_answer("what is the capital of Indonesia?")), ["Jakarta"])
+
+    def test_remainder_after_streamed_text(self):
+        """Test that text appended after the streamed call_llm output is still delivered."""
+        self.app.llm = ScriptedLLM(
+            "def answer_user_question(question):\n    return call_llm('hi') + ' (King County)'",
+            chunks=["Sunny"])
+
+        self.assertEqual(list(self.app.stream_answer("weather?")), ["Sunny", " (King County)"])
+
+    def test_intermediate_call_llm_is_not_streamed(self):
+        """Test that call_llm output used only as context for another call is not streamed."""
+        self.app.llm = ScriptedLLM(
+            "def answer_user_question(question):\n    facts = call_llm('facts')\n    return call_llm('use ' + facts)",
+            chunks=["Wear ", "a ", "jacket."])
+
+        chunks = list(self.app.stream_answer("what should I wear today?"))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertNotIn("Wear ", chunks)
+
+    def test_repaired_program_streams_once(self):
+        """Test that a program repaired after streaming does not stream its call_llm output again."""
+        class RepairingLLM(ScriptedLLM):
+            def invoke(self, messages):
+                text = str(messages)
+                program = ("def answer_user_question(question):\n    return call_llm('hi')" if "failed" in text
+                           else "def answer_user_question(question):\n    return call_llm('hi') + 1")
+                return type("Message", (), {"content": program})()
+
+        self.app.llm = RepairingLLM(None, chunks=["Sunny"])
+
+        chunks = list(self.app.stream_answer("weather?"))
+
+        self.assertEqual(chunks.count("Sunny"), 1)
+        self.assertEqual(self.app.repair_stats.stats()['attempts'], 1)
+
 
 if __name__ == "__main__":
     unittest.main()
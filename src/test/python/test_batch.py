@@ -0,0 +1,98 @@
+"""
+Test module for batch answering, rate limiting and throttling retries.
+"""
+import time
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from rate_limit import RateLimiter, TokenBucket, call_with_retries, is_throttling_error
+
+PROGRAMS = {
+    "what state am I in?": "def answer_user_question(question):\n    return get_user_location()[1]",
+    "what county am I in?": "def answer_user_question(question):\n    return get_user_location()[0]",
+    "what is the capital of Indonesia?": "def answer_user_question(question):\n    return 'Jakarta'",
+}
+
+THROTTLED = Exception("An error occurred (ThrottlingException) when calling the Converse operation")
+
+
+class TestAnswerMany(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App backed by the offline fake LLM."""
+        self.app = App()
+        self.app.llm = FakeLLM(PROGRAMS, latency=0.05)
+
+    def test_answers_are_returned_in_order(self):
+        """Test that answer_many preserves the order of the questions."""
+        questions = list(PROGRAMS) * 3
+
+        answers = self.app.answer_many(questions, max_concurrency=4)
+
+        self.assertEqual(answers, ["Washington", "King County", "Jakarta"] * 3)
+
+    def test_concurrency_reduces_wall_time(self):
+        """Test that questions are generated concurrently."""
+        start = time.perf_counter()
+        self.app.answer_many(list(PROGRAMS) * 4, max_concurrency=12)
+
+        self.assertLess(time.perf_counter() - start, 0.05 * 12 / 2)
+
+    def test_as_completed_yields_every_index(self):
+        """Test that answer_as_completed covers every question exactly once."""
+        indexes = sorted(index for index, _ in self.app.answer_as_completed(list(PROGRAMS), max_concurrency=2))
+
+        self.assertEqual(indexes, [0, 1, 2])
+
+    def test_throttled_generation_is_retried(self):
+        """Test that throttling errors are retried with backoff."""
+        self.app.llm = FakeLLM(PROGRAMS, failures=[THROTTLED, THROTTLED])
+
+        self.assertEqual(self.app.answer_many(["what state am I in?"]), ["Washington"])
+        self.assertEqual(self.app.llm.calls, 3)
+
+    def test_unknown_question_reports_error(self):
+        """Test that a failing question produces an error string, not an exception."""
+        answers = self.app.answer_many(["what do I have in my pocket?"])
+
+        self.assertTrue(answers[0].startswith("Error"))
+
+
+class TestRateLimiting(unittest.TestCase):
+
+    def test_token_bucket_waits_when_empty(self):
+        """Test that the bucket delays requests beyond its capacity."""
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+        start = time.perf_counter()
+        for _ in range(3):
+            bucket.acquire()
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+    def test_rate_limiter_applies_to_app(self):
+        """Test that the App waits for its rate limiter before each call."""
+        app = App(rate_limiter=RateLimiter(requests_per_minute=600))
+        app.rate_limiter.requests = TokenBucket(rate_per_minute=600, capacity=1)
+        app.llm = FakeLLM(PROGRAMS)
+        start = time.perf_counter()
+        app.answer_many(list(PROGRAMS), max_concurrency=3)
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+    def test_non_throttling_errors_are_not_retried(self):
+        """Test that other errors propagate immediately."""
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            call_with_retries(failing, max_retries=3)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(is_throttling_error(ValueError("bad request")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Test module for coalescing of identical in-flight requests.
+"""
+import contextvars
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app import App
+from coalescing import RequestCoalescer
+from fake_llm import FakeLLM
+from tools.registry import ToolRegistry
+
+PROGRAM = ("def answer_user_question(question):\n"
+           "    return f'Rain chance in {get_user_city()}: {get_rain_chance(get_user_city())}%'\n")
+FAILING_PROGRAM = ("def answer_user_question(question):\n"
+                   "    return f'Rain chance in Atlantis: {get_rain_chance(\"Atlantis\")}%'\n")
+rain_chance_calls = []
+current_user_city = contextvars.ContextVar('current_user_city', default='Seattle')
+
+
+def get_user_city() -> str:
+    """
+    Returns:
+    str: The city of the user asking
+    """
+    ...
+
+
+def get_rain_chance(city: str) -> int:
+    """
+    Returns:
+    int: Chance of rain today in percent
+    """
+    ...
+
+
+def user_city_impl() -> str:
+    return current_user_city.get()
+
+
+def rain_chance_impl(city: str) -> int:
+    rain_chance_calls.append(city)
+    return {'Seattle': 80, 'Phoenix': 5}[city]
+
+
+class TestRequestCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a coalescer and a slow call counting its invocations."""
+        self.coalescer = RequestCoalescer()
+        self.invocations = 0
+
+    def slow_call(self) -> str:
+        self.invocations += 1
+        time.sleep(0.1)
+        return 'sunny'
+
+    def test_concurrent_identical_calls_share_one_invocation(self):
+        """Test that identical calls in flight together make one upstream call."""
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(self.coalescer.call, 'system', 'weather?', self.slow_call) for _ in range(5)]
+            responses = [future.result() for future in futures]
+
+        self.assertEqual(responses, ['sunny'] * 5)
+        self.assertEqual(self.invocations, 1)
+        stats = self.coalescer.stats()
+        self.assertEqual((stats['leaders'], stats['coalesced_calls'], stats['saved_calls'], stats['in_flight']),
+                         (1, 4, 4, 0))
+
+    def test_completed_calls_are_not_reused(self):
+        """Test that a call made after the previous one completed runs again."""
+        self.coalescer.call('system', 'weather?', self.slow_call)
+        self.coalescer.call('system', 'weather?', self.slow_call)
+        self.assertEqual(self.invocations, 2)
+
+    def test_leader_error_reaches_followers(self):
+        """Test that callers waiting on a failing call get its error instead of retrying it."""
+        started = threading.Event()
+
+        def failing_call():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError('throttled')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(self.coalescer.call, 'system', 'weather?', failing_call)
+            started.wait()
+            follower = executor.submit(self.coalescer.call, 'system', 'weather?', self.slow_call)
+            for future in (leader, follower):
+                with self.assertRaisesRegex(RuntimeError, 'throttled'):
+                    future.result()
+        self.assertEqual(self.invocations, 0)
+
+
+class TestAppCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App generating one program slowly, with a per-user city tool."""
+        registry = ToolRegistry()
+        registry.tool(implementation=f'{__name__}:user_city_impl')(get_user_city)
+        registry.tool(implementation=f'{__name__}:rain_chance_impl')(get_rain_chance)
+        self.coalescer = RequestCoalescer()
+        self.app = App(tool_registry=registry, coalescer=self.coalescer)
+        self.app.llm = FakeLLM({}, default=PROGRAM, latency=0.2)
+        rain_chance_calls.clear()
+
+    def ask(self, question: str, city: str) -> str:
+        current_user_city.set(city)
+        return self.app.answer(question)
+
+    def test_burst_shares_one_generation(self):
+        """Test that concurrent identical questions make one Bedrock call but keep per-user tool inputs."""
+        questions = [("Is it going to rain today?", 'Seattle'), ("is it going to rain today", 'Phoenix'),
+                     ("IS IT GOING TO RAIN TODAY?!", 'Seattle')]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, self.ask, question, city)
+                       for question, city in questions]
+            answers = [future.result() for future in futures]
+
+        self.assertEqual(answers, ["Rain chance in Seattle: 80%", "Rain chance in Phoenix: 5%",
+                                   "Rain chance in Seattle: 80%"])
+        self.assertEqual(self.app.llm.calls, 1)
+        stats = self.coalescer.stats()
+        self.assertEqual((stats['coalesced_questions'], stats['saved_calls']), (2, 2))
+
+    def test_followers_share_the_leaders_error(self):
+        """Test that requests joining a leader that gave up after its repair get its error without rerunning it."""
+        self.app.llm = FakeLLM({}, default=FAILING_PROGRAM, latency=0.2)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, self.ask, "will it rain in Atlantis?", 'Seattle')
+                       for _ in range(3)]
+            answers = [future.result() for future in futures]
+
+        self.assertEqual(answers, ["Error executing LLM code: 'Atlantis'"] * 3)
+        # The leader's generation and repair; the failing program ran only for the leader
+        self.assertEqual(self.app.llm.calls, 2)
+        self.assertEqual(rain_chance_calls, ['Atlantis', 'Atlantis'])
+        self.assertEqual(self.coalescer.stats()['coalesced_questions'], 2)
+
+    def test_different_questions_are_not_coalesced(self):
+        """Test that only matching questions share a generation."""
+        self.app.answer_many(["will it rain?", "will it snow?"])
+        self.assertEqual(self.app.llm.calls, 2)
+        self.assertEqual(self.coalescer.stats()['coalesced_questions'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
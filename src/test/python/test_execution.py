@@ -0,0 +1,56 @@
+"""
+Test module for the shared code extraction and execution core.
+"""
+import unittest
+
+from execution import NO_FUNCTION_ERROR, call_entry_point, clean_llm_output, execute_llm_code
+from program_cache import compile_program
+
+PROGRAM = "def answer_user_question(question):\n    return question.upper()\n"
+
+
+class TestCleanLlmOutput(unittest.TestCase):
+
+    def test_fenced_block(self):
+        """Test that a single fenced block is returned without its fences."""
+        self.assertEqual(clean_llm_output(f"```python\n{PROGRAM}```"), PROGRAM)
+
+    def test_prose_around_blocks_is_dropped(self):
+        """Test that several python blocks are joined in order and the prose between them dropped."""
+        output = f"Imports first:\n```python\nimport math\n```\nThen the function:\n```py\n{PROGRAM}```\nDone."
+        self.assertEqual(clean_llm_output(output), f"import math\n\n{PROGRAM}")
+
+    def test_unfenced_output(self):
+        """Test that output without fences is kept, minus a line naming the language."""
+        self.assertEqual(clean_llm_output(f"python\n{PROGRAM}"), PROGRAM)
+        self.assertEqual(clean_llm_output(PROGRAM), PROGRAM)
+
+    def test_truncated_block(self):
+        """Test that a block without a closing fence runs to the end of the output."""
+        self.assertEqual(clean_llm_output(f"```python\n{PROGRAM}"), PROGRAM)
+
+    def test_blocks_in_other_languages(self):
+        """Test that non-python blocks are skipped, unless there is nothing else."""
+        self.assertEqual(clean_llm_output(f"```json\n{{}}\n```\n```\n{PROGRAM}```"), PROGRAM)
+        self.assertEqual(clean_llm_output(f"```text\n{PROGRAM}```"), PROGRAM)
+
+
+class TestCallEntryPoint(unittest.TestCase):
+
+    def test_calls_answer_user_question(self):
+        """Test that the compiled program's function is called with the question."""
+        self.assertEqual(call_entry_point(compile_program(PROGRAM), {}, "hi"), "HI")
+
+    def test_missing_function(self):
+        """Test that a program without answer_user_question returns the standard error."""
+        self.assertEqual(call_entry_point(compile_program("x = 1"), {}, "hi"), NO_FUNCTION_ERROR)
+
+    def test_execute_llm_code_reports_errors(self):
+        """Test that failures are returned as error strings."""
+        self.assertEqual(execute_llm_code(f"```python\n{PROGRAM}```", "hi", {}), "HI")
+        self.assertEqual(execute_llm_code("def answer_user_question(q):\n    return 1 / 0", "hi", {}),
+                         "Error executing LLM code: division by zero")
+
+
+if __name__ == '__main__':
+    unittest.main()
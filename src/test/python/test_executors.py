@@ -0,0 +1,145 @@
+"""
+Test module for the generated-code executor backends.
+"""
+import pickle
+import threading
+import time
+import unittest
+
+from app import App
+from executors import ExecutionLimitExceeded, ProcessPoolCodeExecutor
+from repair import format_program_error
+from tools.registry import ToolRegistry
+
+WEATHER_PROGRAM = """
+def answer_user_question(question):
+    county, state = get_user_location()
+    weather = get_local_weather(*get_geo_from_county(county, state))
+    return f"{county}: {isinstance(weather, Weather)}"
+"""
+
+napping = threading.Event()
+
+
+class Unpicklable:
+    def __reduce__(self):
+        raise pickle.PicklingError("cannot send this")
+
+
+def nap(seconds: float) -> float:
+    """
+    Returns:
+    float: The seconds slept
+    """
+    ...
+
+
+def nap_impl(seconds: float) -> float:
+    napping.set()
+    time.sleep(seconds)
+    return seconds
+
+
+def make_unpicklable() -> object:
+    """
+    Returns:
+    object: A value that cannot be pickled
+    """
+    ...
+
+
+def make_unpicklable_impl() -> object:
+    return Unpicklable()
+
+
+class TestProcessPoolCodeExecutor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Start one small worker pool shared by the tests."""
+        cls.executor = ProcessPoolCodeExecutor(size=1, wall_time_limit=2.0, cpu_time_limit=5.0)
+        cls.app = App(executor=cls.executor)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+
+    def test_tool_calls_are_proxied_to_parent(self):
+        """Test that tools and interface classes are usable from the worker."""
+        self.assertEqual(self.app.execute_llm_code(WEATHER_PROGRAM, "weather?"), "King County: True")
+
+    def test_program_errors_are_reported(self):
+        """Test that an exception in the program becomes the same error string as in process."""
+        result = self.app.execute_llm_code("def answer_user_question(question):\n    return 1 / 0", "?")
+
+        self.assertEqual(result, "Error executing LLM code: division by zero")
+
+    def test_program_exception_keeps_type_and_frames(self):
+        """Test that a worker exception is re-raised with its type and the program's traceback frames."""
+        source = "def answer_user_question(question):\n    return missing_tool()"
+        with self.assertRaises(NameError) as raised:
+            self.app.run_compiled_code(self.app.compile_llm_code(source), "?")
+        self.assertEqual(str(raised.exception), "name 'missing_tool' is not defined")
+        self.assertEqual(format_program_error(raised.exception, source),
+                         "line 2, in answer_user_question: return missing_tool()\n"
+                         "NameError: name 'missing_tool' is not defined")
+
+    def test_unknown_exception_type_becomes_runtime_error(self):
+        """Test that an exception class defined by the program is reported as RuntimeError."""
+        source = ("class Oops(Exception):\n    pass\n"
+                  "def answer_user_question(question):\n    raise Oops('bad')")
+        with self.assertRaisesRegex(RuntimeError, "Oops: bad"):
+            self.app.run_compiled_code(self.app.compile_llm_code(source), "?")
+
+    def test_runaway_program_is_killed_and_replaced(self):
+        """Test that the wall-time limit stops a program and the pool keeps working."""
+        # The loop condition is not a constant, so static analysis cannot reject it
+        with self.assertRaises(ExecutionLimitExceeded):
+            self.app.run_compiled_code(
+                self.app.compile_llm_code("def answer_user_question(question):\n    while question:\n        pass"), "?")
+
+        self.assertEqual(self.app.execute_llm_code(WEATHER_PROGRAM, "weather?"), "King County: True")
+
+
+class TestProcessPoolWorkerHandling(unittest.TestCase):
+
+    def setUp(self):
+        """Start a one-worker pool for an App with a slow tool and a tool returning an unpicklable value."""
+        napping.clear()
+        registry = ToolRegistry()
+        registry.tool(implementation=f'{__name__}:nap_impl')(nap)
+        registry.tool(implementation=f'{__name__}:make_unpicklable_impl')(make_unpicklable)
+        self.executor = ProcessPoolCodeExecutor(size=1, wall_time_limit=2.0, cpu_time_limit=5.0)
+        self.app = App(executor=self.executor, tool_registry=registry)
+
+    def tearDown(self):
+        self.executor.close()
+
+    def test_waiting_for_a_worker_does_not_use_the_time_limit(self):
+        """Test that a program queued behind another gets the full wall-time limit once it has a worker."""
+        first = self.app.compile_llm_code("def answer_user_question(question):\n    return str(nap(1.4))")
+        # Still running in the worker after the nap, when a limit counted from the queueing has passed
+        second = self.app.compile_llm_code("def answer_user_question(question):\n"
+                                           "    nap(1.0)\n"
+                                           "    return str(sum(i * i for i in range(5_000_000)) > 0)")
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.app.run_compiled_code(first, "?")))
+        thread.start()
+        self.assertTrue(napping.wait(10))
+
+        results.append(self.app.run_compiled_code(second, "?"))
+        thread.join()
+        self.assertEqual(results, ['1.4', 'True'])
+
+    def test_unsendable_tool_result_keeps_the_worker(self):
+        """Test that a tool result failing to pickle becomes a program error and the pool keeps its worker."""
+        result = self.app.execute_llm_code("def answer_user_question(question):\n    return make_unpicklable()", "?")
+
+        self.assertEqual(result, "Error executing LLM code: make_unpicklable returned an unpicklable value: "
+                                 "cannot send this")
+        self.assertEqual(self.app.execute_llm_code("def answer_user_question(question):\n    return 'ok'", "?"),
+                         'ok')
+
+
+if __name__ == "__main__":
+    unittest.main()
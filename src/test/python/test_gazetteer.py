@@ -0,0 +1,112 @@
+"""
+Test module for the county gazetteer and the geocoding tools built on it.
+"""
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from tools.gazetteer import (
+    DEFAULT_SOURCE, Gazetteer, get_gazetteer, haversine_km, normalize_county, state_code,
+)
+from tools.implementations.weather_tools_impl import get_county_from_geo, get_geo_from_county
+
+
+class TestNormalization(unittest.TestCase):
+
+    def test_county_names(self):
+        """Test that suffixes, punctuation and "Saint" do not affect the lookup key."""
+        self.assertEqual(normalize_county("St. Louis County"), "st louis")
+        self.assertEqual(normalize_county("saint louis"), "st louis")
+        self.assertEqual(normalize_county("Prince George's County"), "prince georges")
+        self.assertEqual(normalize_county("Orleans Parish"), "orleans")
+        self.assertEqual(normalize_county("Miami-Dade"), "miami dade")
+
+    def test_states(self):
+        """Test that states are accepted by name or USPS code."""
+        self.assertEqual(state_code("Washington"), "WA")
+        self.assertEqual(state_code(" wa "), "WA")
+        self.assertEqual(state_code("District of Columbia"), "DC")
+        self.assertIsNone(state_code("Atlantis"))
+
+
+class TestGazetteer(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the bundled table."""
+        self.gazetteer = get_gazetteer()
+
+    def test_bundled_table_matches_source(self):
+        """Test that counties.bin was rebuilt after the last edit of counties.tsv."""
+        source = Gazetteer.from_tsv(DEFAULT_SOURCE)
+        self.assertEqual(self.gazetteer.names, source.names)
+        self.assertEqual(list(self.gazetteer.latitudes), list(source.latitudes))
+        self.assertEqual(list(self.gazetteer.longitudes), list(source.longitudes))
+
+    def test_write_and_load_round_trip(self):
+        """Test that a written table memory-maps back to the same records."""
+        table = Gazetteer.from_rows([("WA", "King County", 47.6062, -122.3321), ("LA", "Orleans Parish", 29.95, -90.07)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'counties.bin')
+            table.write(path)
+            loaded = Gazetteer.load(path)
+            self.assertEqual(len(loaded), 2)
+            self.assertEqual(loaded.record(1), ("King County", "Washington", 47.6062, -122.3321))
+            self.assertIsInstance(loaded.latitudes, memoryview)
+
+    def test_exact_and_fuzzy_lookup(self):
+        """Test lookups with and without suffixes, with typos and by USPS code."""
+        king = self.gazetteer.coordinates("King County", "Washington")
+        self.assertEqual(king, (47.6062, -122.3321))
+        self.assertEqual(self.gazetteer.coordinates("king", "WA"), king)
+        self.assertEqual(self.gazetteer.coordinates("Kings County", "Washington"), king)
+        self.assertEqual(self.gazetteer.coordinates("Maricopa Cnty", "Arizona"), (33.4484, -112.074))
+        self.assertEqual(self.gazetteer.record(self.gazetteer.find("Baltimore", "Maryland"))[0], "Baltimore city")
+
+    def test_unknown_county(self):
+        """Test that a county that matches nothing raises instead of inventing coordinates."""
+        with self.assertRaises(ValueError):
+            self.gazetteer.coordinates("Nowhere County", "Washington")
+
+    def test_nearest_matches_brute_force(self):
+        """Test that the grid search finds the same county as scanning every record."""
+        generator = random.Random(7)
+        for _ in range(500):
+            latitude, longitude = generator.uniform(18.0, 65.0), generator.uniform(-160.0, -65.0)
+            expected = min(range(len(self.gazetteer)), key=lambda index: haversine_km(
+                latitude, longitude, self.gazetteer.latitudes[index], self.gazetteer.longitudes[index]))
+            self.assertEqual(self.gazetteer.nearest(latitude, longitude), expected)
+
+
+class TestGeocodingTools(unittest.TestCase):
+
+    def test_geo_from_county_is_reproducible(self):
+        """Test that county coordinates come from the gazetteer rather than a random guess."""
+        self.assertEqual(get_geo_from_county("Cook County", "Illinois"), (41.8781, -87.6298))
+        self.assertEqual(get_geo_from_county("Dallas County", "Texas"), get_geo_from_county("Dallas", "TX"))
+
+    def test_county_from_geo(self):
+        """Test reverse geocoding of the user's location."""
+        self.assertEqual(get_county_from_geo(47.61, -122.20), ("King County", "Washington"))
+        self.assertEqual(get_county_from_geo(*get_geo_from_county("Harris County", "Texas")),
+                         ("Harris County", "Texas"))
+
+    def test_county_missing_from_partial_table_raises(self):
+        """Test that an unbundled county is reported as unknown rather than given made-up coordinates."""
+        self.assertFalse(get_gazetteer().complete)
+        with self.assertRaisesRegex(ValueError, "Whatcom County, Washington .*covers only 142 counties"):
+            get_geo_from_county("Whatcom County", "Washington")
+        with mock.patch.object(Gazetteer, 'complete', True), \
+                self.assertRaisesRegex(ValueError, "^Unknown county: Nowhere County, Atlantis$"):
+            get_geo_from_county("Nowhere County", "Atlantis")
+
+    def test_distant_nearest_county_raises(self):
+        """Test that reverse geocoding far from every bundled county is refused with a partial table."""
+        with self.assertRaisesRegex(ValueError, "nearest bundled county"):
+            get_county_from_geo(48.8, -122.0)
+        self.assertEqual(get_county_from_geo(47.61, -122.20), ("King County", "Washington"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Test module for the HTTP front end, served by an App answering from the fake LLM.
+"""
+import http.client
+import json
+import os
+import threading
+import time
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from http_server import HttpAppServer
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), '..', 'resources', 'bedrock_responses.json')
+
+
+class TestHttpAppServer(unittest.TestCase):
+
+    def setUp(self):
+        """Start a server on a free port with one worker and one queue slot."""
+        self.release = threading.Event()
+        self.release.set()
+        fixtures = FakeLLM.from_fixtures(FIXTURES_PATH)
+
+        def responder(system_prompt, message):
+            # Lets a test hold questions in the worker until it releases them
+            self.release.wait(5)
+            return fixtures.responder(system_prompt, message)
+
+        app = App()
+        app.llm = FakeLLM(responder)
+        self.server = HttpAppServer(('127.0.0.1', 0), app, workers=1, queue_size=1, request_timeout=2)
+        self.server.ready.set()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """Release held questions and stop the server."""
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method, path, body=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=10)
+        try:
+            connection.request(method, path, body=None if body is None else json.dumps(body),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read()), response
+        finally:
+            connection.close()
+
+    def ask_in_background(self, question, results):
+        thread = threading.Thread(
+            target=lambda: results.append(self.request('POST', '/answer', {'question': question})))
+        thread.start()
+        return thread
+
+    def wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "condition not reached")
+            time.sleep(0.01)
+
+    def test_answer(self):
+        """Test that POST /answer returns the answer of the generated program."""
+        status, body, _ = self.request('POST', '/answer', {'question': 'what is the capital of Indonesia?'})
+        self.assertEqual(status, 200)
+        self.assertIn('Jakarta', body['answer'])
+
+    def test_invalid_request(self):
+        """Test that a body without a question gets 400 and unknown paths 404."""
+        self.assertEqual(self.request('POST', '/answer', {'q': 'hi'})[0], 400)
+        self.assertEqual(self.request('GET', '/nowhere')[0], 404)
+        self.assertEqual(self.server.metrics()['invalid'], 1)
+
+    def test_negative_content_length_gets_400(self):
+        """Test that a negative Content-Length is refused instead of reading until the client disconnects."""
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+        try:
+            connection.putrequest('POST', '/answer')
+            connection.putheader('Content-Length', '-1')
+            connection.endheaders()
+            self.assertEqual(connection.getresponse().status, 400)
+        finally:
+            connection.close()
+
+    def test_full_queue_gets_429(self):
+        """Test that requests beyond the workers and queue are refused at once with Retry-After."""
+        self.release.clear()
+        results = []
+        running = self.ask_in_background('what is the capital of Indonesia?', results)
+        self.wait_for(lambda: self.server.pool.stats()['in_flight'] == 1)
+        queued = self.ask_in_background('what state am I in?', results)
+        self.wait_for(lambda: self.server.pool.stats()['queue_depth'] == 1)
+
+        status, body, response = self.request('POST', '/answer', {'question': 'where am I located?'})
+        self.assertEqual(status, 429)
+        self.assertEqual(response.getheader('Retry-After'), '1')
+
+        self.release.set()
+        running.join()
+        queued.join()
+        self.assertEqual(sorted(status for status, _, _ in results), [200, 200])
+        self.assertEqual(self.server.metrics()['rejected'], 1)
+
+    def test_timeout_gets_504_and_cancels_queued_request(self):
+        """Test that a request waiting past its timeout gets 504 and never runs."""
+        self.release.clear()
+        self.server.request_timeout = 0.2
+        results = []
+        running = self.ask_in_background('what is the capital of Indonesia?', results)
+        self.wait_for(lambda: self.server.pool.stats()['in_flight'] == 1)
+
+        status, _, _ = self.request('POST', '/answer', {'question': 'what state am I in?'})
+        self.assertEqual(status, 504)
+        self.release.set()
+        running.join()
+        # The running request timed out too; its answer still completes in the worker
+        self.wait_for(lambda: self.server.pool.stats()['in_flight'] == 0)
+
+        self.assertEqual(self.server.app.llm.calls, 1)
+        metrics = self.server.metrics()
+        self.assertEqual((metrics['timed_out'], metrics['queue_depth']), (2, 0))
+
+    def test_health_and_readiness(self):
+        """Test that health is always ok and readiness follows warm-up and draining."""
+        self.assertEqual(self.request('GET', '/healthz')[0], 200)
+        self.assertEqual(self.request('GET', '/readyz')[0], 200)
+        self.server.ready.clear()
+        self.assertEqual(self.request('GET', '/readyz')[0], 503)
+        self.server.ready.set()
+        self.server.drain()
+        self.assertEqual(self.request('GET', '/readyz')[0], 503)
+        self.assertEqual(self.request('POST', '/answer', {'question': 'what state am I in?'})[0], 503)
+
+    def test_metrics(self):
+        """Test that metrics report outcomes, latency histograms and token usage."""
+        self.request('POST', '/answer', {'question': 'what state am I in?'})
+
+        status, metrics, _ = self.request('GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertEqual((metrics['requests'], metrics['answered']), (1, 1))
+        self.assertEqual((metrics['queue_depth'], metrics['in_flight'], metrics['workers']), (0, 0, 1))
+        self.assertEqual(metrics['latency']['count'], 1)
+        self.assertEqual(sum(metrics['latency']['buckets_ms'].values()), 1)
+        self.assertEqual(metrics['queue_wait']['count'], 1)
+        self.assertEqual(metrics['usage']['requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
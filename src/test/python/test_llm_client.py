@@ -0,0 +1,92 @@
+"""
+Test module for the shared LLM client registry.
+"""
+import threading
+import unittest
+
+from llm_client import CACHE_POINT, LLMClientRegistry, UsageStats, build_messages, calling_app, get_calling_app, message_text
+
+
+class TestLLMClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a fresh registry for each test."""
+        self.registry = LLMClientRegistry(max_pool_connections=4)
+
+    def test_boto_client_is_reused(self):
+        """Test that the same service/region pair returns one shared client."""
+        first = self.registry.get_boto_client("bedrock", "us-east-1")
+        second = self.registry.get_boto_client("bedrock", "us-east-1")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.meta.config.max_pool_connections, 4)
+        stats = self.registry.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_chat_model_is_reused_across_threads(self):
+        """Test that concurrent callers all receive the same chat model."""
+        results = []
+
+        def worker():
+            results.append(self.registry.get_chat_model())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(llm) for llm in results}), 1)
+        self.assertEqual(self.registry.stats()['chat_models'], 1)
+
+    def test_calling_app_context(self):
+        """Test that the calling app is only visible inside the context."""
+        app = object()
+        self.assertIsNone(get_calling_app())
+        with calling_app(app):
+            self.assertIs(get_calling_app(), app)
+        self.assertIsNone(get_calling_app())
+
+    def test_message_text_joins_content_parts(self):
+        """Test extraction of text from string and list message content."""
+        class Message:
+            def __init__(self, content):
+                self.content = content
+
+        self.assertEqual(message_text(Message("hello")), "hello")
+        self.assertEqual(message_text(Message(["a", "b"])), "a b")
+
+    def test_build_messages_cache_point(self):
+        """Test that a cached system prompt is followed by a Bedrock cache point."""
+        plain, _ = build_messages("system", "question")
+        cached, _ = build_messages("system", "question", cache_system_prompt=True)
+
+        self.assertEqual(plain.content, "system")
+        self.assertEqual(cached.content, [{'type': 'text', 'text': "system"}, CACHE_POINT])
+
+
+class TestUsageStats(unittest.TestCase):
+
+    def test_cache_hit_rates(self):
+        """Test hit rates computed from usage_metadata cache details."""
+        class Response:
+            def __init__(self, usage_metadata):
+                self.usage_metadata = usage_metadata
+
+        usage = UsageStats()
+        usage.record(Response({'input_tokens': 100, 'output_tokens': 10,
+                               'input_token_details': {'cache_read': 0, 'cache_creation': 90}}))
+        usage.record(Response({'input_tokens': 100, 'output_tokens': 10,
+                               'input_token_details': {'cache_read': 90, 'cache_creation': 0}}))
+        usage.record(Response(None))
+
+        stats = usage.stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['cache_write_tokens'], 90)
+        self.assertEqual(stats['cache_hit_rate'], 0.5)
+        self.assertAlmostEqual(stats['cache_token_rate'], 0.45)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Test module for parallel tool execution.
+"""
+import time
+import unittest
+from unittest import mock
+
+from app import PARALLEL_TOOLS_NOTE, App
+from fake_llm import FakeLLM
+from parallel_tools import ParallelToolRunner, ToolFuture, join_tool_calls, resolve
+from tools.interfaces.weather_tools import Weather
+
+DELAY = 0.2
+
+
+def slow_geo(county: str, state: str) -> tuple[float, float]:
+    time.sleep(DELAY)
+    return (47.0, -122.0)
+
+
+def slow_weather(latitude: float, longitude: float) -> Weather:
+    time.sleep(DELAY)
+    return Weather(latitude + 10, 50.0)
+
+
+def failing_tool(county: str, state: str) -> tuple[float, float]:
+    raise ValueError("unknown county")
+
+
+class TestParallelToolRunner(unittest.TestCase):
+
+    def setUp(self):
+        """Set up wrapped slow tools for each test."""
+        self.runner = ParallelToolRunner()
+        self.geo = self.runner.wrap(slow_geo)
+        self.weather = self.runner.wrap(slow_weather)
+
+    def test_independent_calls_run_in_parallel(self):
+        """Test that five independent chains take about one chain's time."""
+        start = time.perf_counter()
+        coords = [self.geo(f"County {i}", "Washington") for i in range(5)]
+        reports = [self.weather(*coord) for coord in coords]
+        temperatures = [report.temperature_fahrenheit for report in reports]
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(temperatures, [57.0] * 5)
+        self.assertLess(elapsed, DELAY * 4)
+
+    def test_future_arguments_are_chained(self):
+        """Test that a pending result passed as an argument is not waited on by the caller."""
+        start = time.perf_counter()
+        coord = self.geo("King County", "Washington")
+        latitude = self.runner.submit(lambda pair: pair[0], coord)
+
+        self.assertIs(type(latitude), ToolFuture)
+        self.assertLess(time.perf_counter() - start, DELAY / 2)
+        self.assertEqual(latitude.result(), 47.0)
+
+    def test_future_behaves_like_its_value(self):
+        """Test formatting, arithmetic, comparison and isinstance on a future."""
+        latitude, longitude = self.geo("King County", "Washington")
+        report = self.weather(latitude, longitude)
+
+        self.assertIsInstance(report, Weather)
+        self.assertEqual(f"{report.temperature_fahrenheit:.1f}", "57.0")
+        self.assertEqual(resolve([self.geo("a", "b")]), [(47.0, -122.0)])
+        self.assertTrue(self.runner.submit(lambda: 3) + 1 == 4)
+        self.assertTrue(self.runner.submit(lambda: 3) < 5)
+
+    def test_dependency_errors_propagate(self):
+        """Test that a failed call fails the calls depending on it."""
+        coord = self.runner.wrap(failing_tool)("Nowhere", "Nowhere")
+        report = self.runner.submit(slow_weather, coord, 0.0)
+
+        with self.assertRaises(ValueError):
+            report.result()
+
+    def test_join_raises_errors_the_program_never_saw(self):
+        """Test that a failed call whose result was never used is raised by join."""
+        self.runner.wrap(failing_tool)("Nowhere", "Nowhere")
+        self.geo("King County", "Washington")
+
+        with self.assertRaisesRegex(ValueError, "unknown county"):
+            join_tool_calls({'failing_tool': self.runner.wrap(failing_tool)})
+
+    def test_join_skips_errors_the_program_handled(self):
+        """Test that an error already raised to the program is not raised again, nor through its dependents."""
+        coord = self.runner.wrap(failing_tool)("Nowhere", "Nowhere")
+        report = self.runner.submit(slow_weather, coord, 0.0)
+        with self.assertRaises(ValueError):
+            report.result()
+
+        self.runner.join()
+
+
+class TestAppParallelTools(unittest.TestCase):
+
+    def test_unused_failed_call_fails_the_answer(self):
+        """Test that the program's answer is not returned while a tool it called failed unseen."""
+        app = App(parallel_tools=True, max_repairs=0)
+        app.llm = FakeLLM({}, default="def answer_user_question(question):\n"
+                                      "    get_geo_from_county('Nowhere', 'Atlantis')\n"
+                                      "    get_geo_from_county('Nowhere', 'Atlantis')\n"
+                                      "    return 'done'")
+        with mock.patch('tools.implementations.weather_tools_impl.get_gazetteer') as gazetteer:
+            gazetteer.return_value.coordinates.side_effect = LookupError("gazetteer offline")
+            self.assertEqual(app.answer("where is Nowhere?"), "Error executing LLM code: gazetteer offline")
+
+    def test_try_except_programs_run_without_deferral(self):
+        """Test that a program catching tool errors gets them at the call, as written."""
+        app = App(parallel_tools=True)
+        app.llm = FakeLLM({}, default="def answer_user_question(question):\n"
+                                      "    try:\n"
+                                      "        get_county_from_geo('north', 'pole')\n"
+                                      "        get_county_from_geo('south', 'pole')\n"
+                                      "    except TypeError:\n"
+                                      "        return 'bad coordinates'\n"
+                                      "    return 'ok'")
+        with mock.patch('app.ParallelToolRunner', side_effect=AssertionError("runner created")):
+            self.assertEqual(app.answer("which county is at the pole?"), 'bad coordinates')
+
+    def test_prompt_describes_deferred_results(self):
+        """Test that only an App with parallel tools tells the model about deferred results."""
+        self.assertIn(PARALLEL_TOOLS_NOTE, App(parallel_tools=True).system_prompt)
+        self.assertNotIn(PARALLEL_TOOLS_NOTE, App().system_prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
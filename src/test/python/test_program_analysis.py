@@ -0,0 +1,193 @@
+"""
+Test module for static analysis of generated programs.
+"""
+import tempfile
+import unittest
+from unittest import mock
+
+from app import App
+from fake_llm import FakeLLM
+from program_analysis import ProgramPolicy, ProgramRejected, analyze_program, cached_analysis
+from program_cache import ProgramCache, compile_program
+
+
+def analyze(source: str, policy: ProgramPolicy = None):
+    code = compile_program(source)
+    return analyze_program(source, code) if policy is None else analyze_program(source, code, policy)
+
+
+class TestProgramAnalysis(unittest.TestCase):
+
+    def test_constant_return(self):
+        """Test that programs only returning a literal are recognized, with their result."""
+        self.assertEqual(analyze("def answer_user_question(question):\n    return 'Jakarta'").constant_result,
+                         'Jakarta')
+        self.assertEqual(analyze('def answer_user_question(question):\n    """Capital."""\n    return f"Jakarta"')
+                         .constant_result, 'Jakarta')
+        self.assertEqual(analyze("def answer_user_question(question):\n    return 42").constant_result, '42')
+
+    def test_computed_return_is_not_constant(self):
+        """Test that returning anything depending on calls or arguments is not short-circuited."""
+        for body in ("return get_user_location()[0]", "return question", "x = 1\n    return 'a'",
+                     "return f'{question}'"):
+            with self.subTest(body=body):
+                self.assertIsNone(analyze(f"def answer_user_question(question):\n    {body}").constant_result)
+
+    def test_forbidden_imports_names_and_attributes(self):
+        """Test that escapes from the tool sandbox are reported."""
+        cases = {
+            "import os": "import of 'os'",
+            "from subprocess import run": "import of 'subprocess'",
+            "import os.path as p": "import of 'os.path'",
+            "x = __import__('os')": "use of '__import__'",
+            "x = eval('1')": "use of 'eval'",
+            "x = ().__class__.__bases__": "attribute '__class__'",
+        }
+        for statement, violation in cases.items():
+            with self.subTest(statement=statement):
+                analysis = analyze(f"{statement}\ndef answer_user_question(question):\n    return 'x'")
+                self.assertTrue(any(v.startswith(violation) for v in analysis.violations), analysis.violations)
+                with self.assertRaises(ProgramRejected):
+                    analysis.check()
+
+    def test_shadowed_forbidden_names(self):
+        """Test that locals named like forbidden builtins are allowed, but every way of reaching the builtin is not."""
+        allowed = {
+            "local": "    input = question.strip()\n    return input",
+            "parameter": "    def pick(vars):\n        return vars[0]\n    return pick([question])",
+            "closure": "    open = question\n    def inner():\n        return open\n    return inner()",
+        }
+        rejected = {
+            "default": "    def inner(open=open):\n        return open('x')\n    return inner()",
+            "comprehension": "    names = [open for open in question]\n    return open('x')",
+            "class body": "    open = 1\n    class Box:\n        value = open\n        open = 2\n    return Box.value",
+            "global": ("    open = 1\n    def inner():\n        global open\n        return open('x')\n"
+                       "    return inner()"),
+            "module": "    return open('x')\nopen = 1",
+        }
+        for case, body in allowed.items():
+            with self.subTest(case=case):
+                self.assertEqual(analyze(f"def answer_user_question(question):\n{body}").violations, ())
+        for case, body in rejected.items():
+            with self.subTest(case=case):
+                self.assertIn("use of 'open'", ' '.join(analyze(f"def answer_user_question(question):\n{body}")
+                                                        .violations))
+
+    def test_violations_are_in_source_order(self):
+        """Test that violations are reported by line, whatever order the AST walk finds them in."""
+        analysis = analyze("def answer_user_question(question):\n    return eval(question)\nimport os")
+        self.assertEqual(analysis.violations, ("use of 'eval' (line 2)", "import of 'os' (line 3)"))
+
+    def test_allowed_program(self):
+        """Test that ordinary tool-calling programs pass the default policy."""
+        analysis = analyze("import math\ndef answer_user_question(question):\n"
+                           "    w = get_local_weather(*get_geo_from_county(*get_user_location()))\n"
+                           "    return f'{math.floor(w.temperature_fahrenheit)}'")
+        analysis.check()
+        self.assertEqual(analysis.violations, ())
+
+    def test_policy_is_configurable(self):
+        """Test that a custom policy changes what is rejected."""
+        source = "import os\ndef answer_user_question(question):\n    return open('x').read()"
+        analysis = analyze(source, ProgramPolicy(forbidden_modules=(), forbidden_names=()))
+        self.assertEqual(analysis.violations, ())
+
+    def test_endless_loop(self):
+        """Test that a while loop without any exit is rejected and one with a break is not."""
+        self.assertTrue(analyze("def answer_user_question(question):\n    while True:\n        pass").violations)
+        self.assertFalse(analyze("def answer_user_question(question):\n    while True:\n        break").violations)
+        self.assertFalse(analyze("def answer_user_question(question):\n    while question:\n        pass").violations)
+
+    def test_call_estimates(self):
+        """Test call site counts and detection of calls made in loops."""
+        analysis = analyze("def answer_user_question(question):\n"
+                           "    a = get_local_weather(1, 2)\n"
+                           "    b = get_local_weather(3, 4)\n"
+                           "    c = [call_llm(x) for x in 'ab']\n"
+                           "    return get_user_location()")
+        self.assertEqual(analysis.estimated_calls(['get_local_weather', 'get_user_location']), 3)
+        self.assertEqual(analysis.looped_calls, frozenset({'call_llm'}))
+        self.assertTrue(analysis.calls_may_overlap(['call_llm']))
+        self.assertFalse(analysis.calls_may_overlap(['get_user_location']))
+
+    def test_answer_call(self):
+        """Test that only a single call whose result goes straight into the return value is an answer call."""
+        direct = analyze("def answer_user_question(question):\n    return call_llm('x') + '!'")
+        context = analyze("def answer_user_question(question):\n    facts = call_llm('a')\n    return facts")
+        nested = analyze("def answer_user_question(question):\n    return str(call_llm('a'))")
+        self.assertTrue(direct.answer_call('call_llm'))
+        self.assertFalse(context.answer_call('call_llm'))
+        self.assertFalse(nested.answer_call('call_llm'))
+
+    def test_analysis_is_cached_by_code(self):
+        """Test that recompiling the same source reuses the earlier analysis."""
+        source = "def answer_user_question(question):\n    return 'cached'"
+        first = analyze(source)
+        self.assertIs(cached_analysis(compile_program(source)), first)
+        self.assertIs(analyze(source), first)
+
+
+class TestAppProgramAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App answering from a fixed program."""
+        self.app = App(max_repairs=0)
+
+    def test_constant_program_skips_tool_namespace(self):
+        """Test that a literal answer is returned without building the tool namespace."""
+        self.app.llm = FakeLLM({}, default="def answer_user_question(question):\n    return 'Jakarta'")
+        with mock.patch.object(App, 'tool_namespace', side_effect=AssertionError("namespace built")):
+            self.assertEqual(self.app.answer("what is the capital of Indonesia?"), "Jakarta")
+
+    def test_forbidden_program_is_not_executed(self):
+        """Test that a rejected program never runs and its violation is reported."""
+        self.app.llm = FakeLLM({}, default="import os\ndef answer_user_question(question):\n"
+                                           "    os.remove('important')\n    return 'done'")
+        with mock.patch.object(App, 'tool_namespace', side_effect=AssertionError("program executed")):
+            result = self.app.answer("clean up")
+        self.assertEqual(result, "Error executing LLM code: Program rejected: import of 'os' (line 1)")
+
+    def test_cached_program_is_checked_before_it_runs(self):
+        """Test that a program from the cache's disk store is analyzed and rejected like a generated one."""
+        with tempfile.TemporaryDirectory() as directory:
+            ProgramCache(directory=directory).put(
+                "where am I?", self.app.system_prompt,
+                "import os\ndef answer_user_question(question):\n    return os.getcwd()")
+            self.app.program_cache = ProgramCache(directory=directory)
+            self.app.llm = FakeLLM({}, default="")
+            with mock.patch.object(App, 'tool_namespace', side_effect=AssertionError("program executed")):
+                result = self.app.answer("where am I?")
+        self.assertEqual(result, "Error executing LLM code: Program rejected: import of 'os' (line 1)")
+        self.assertEqual(self.app.llm.calls, 0)
+
+    def test_program_without_analysis_or_source_is_refused(self):
+        """Test that code the App never analyzed does not run when there is no source to check."""
+        code = compile_program("def answer_user_question(question):\n    return 'unchecked'\n# not analyzed")
+        with self.assertRaises(ProgramRejected):
+            self.app.run_compiled_code(code, "?")
+
+    def test_rejected_program_is_repaired(self):
+        """Test that the rejection reason goes to the repair loop like any other error."""
+        repaired = "def answer_user_question(question):\n    return 'fixed'"
+        self.app = App(max_repairs=1)
+        self.app.llm = FakeLLM(lambda system_prompt, message: repaired if "Program rejected" in message
+                               else "import subprocess\ndef answer_user_question(question):\n    return 'x'")
+        self.assertEqual(self.app.answer("anything"), "fixed")
+
+    def test_single_tool_call_is_not_parallelized(self):
+        """Test that the parallel tool runner is skipped when the program cannot overlap calls."""
+        app = App(parallel_tools=True)
+        app.llm = FakeLLM({}, default="def answer_user_question(question):\n"
+                                      "    return get_user_location()[1]")
+        with mock.patch('app.ParallelToolRunner', side_effect=AssertionError("runner created")):
+            self.assertEqual(app.answer("what state am I in?"), "Washington")
+
+    def test_analysis_can_be_disabled(self):
+        """Test that program_policy=None runs programs unchecked."""
+        app = App(program_policy=None)
+        app.llm = FakeLLM({}, default="import sys\ndef answer_user_question(question):\n    return sys.platform")
+        self.assertNotIn("Error", app.answer("which platform?"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Test module for the compiled-program cache.
+"""
+import tempfile
+import time
+import unittest
+
+from app import App
+from program_cache import ProgramCache, normalize_question
+
+PROGRAM = "def answer_user_question(question):\n    return get_user_location()[1]"
+
+
+class TestProgramCache(unittest.TestCase):
+
+    def test_normalize_question(self):
+        """Test that case, whitespace and trailing punctuation are ignored."""
+        self.assertEqual(normalize_question("  What should I   wear today?! "), "what should i wear today")
+
+    def test_lru_eviction(self):
+        """Test that the least recently used program is evicted first."""
+        cache = ProgramCache(maxsize=2)
+        cache.put("a", "prompt", PROGRAM)
+        cache.put("b", "prompt", PROGRAM)
+        cache.get("a", "prompt")
+        cache.put("c", "prompt", PROGRAM)
+
+        self.assertIsNotNone(cache.get("a", "prompt"))
+        self.assertIsNone(cache.get("b", "prompt"))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        """Test that entries older than the TTL are treated as misses."""
+        cache = ProgramCache(ttl=0.05)
+        cache.put("a", "prompt", PROGRAM)
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get("a", "prompt"))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_system_prompt_is_part_of_key(self):
+        """Test that a program generated for another prompt is not reused."""
+        cache = ProgramCache()
+        cache.put("a", "prompt one", PROGRAM)
+
+        self.assertIsNone(cache.get("a", "prompt two"))
+
+    def test_disk_store_survives_restart(self):
+        """Test that a new cache instance loads programs from the directory."""
+        with tempfile.TemporaryDirectory() as directory:
+            ProgramCache(directory=directory).put("what state am I in?", "prompt", PROGRAM)
+            restarted = ProgramCache(directory=directory)
+
+            self.assertIsNotNone(restarted.get("What state am I in", "prompt"))
+            self.assertEqual(restarted.stats()['disk_hits'], 1)
+
+    def test_app_answer_uses_cached_program(self):
+        """Test that a cache hit answers without calling the LLM."""
+        cache = ProgramCache()
+        app = App(program_cache=cache)
+        cache.put("what state am I in?", app.system_prompt, PROGRAM)
+
+        self.assertEqual(app.answer("What state am I in?"), "Washington")
+        self.assertEqual(cache.stats()['hits'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Test module for the repair loop of failed generated programs.
+"""
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from program_cache import compile_program
+from repair import format_program_error
+from tools.registry import ToolRegistry
+
+BROKEN_PROGRAM = """def answer_user_question(question):
+    depth = get_depth('Puget Sound')
+    return f"Depth: {depth / 0}"
+"""
+FIXED_PROGRAM = """def answer_user_question(question):
+    depth = get_depth('Puget Sound')
+    return f"Depth: {depth} ft"
+"""
+depth_calls = []
+
+
+def get_depth(body_of_water: str) -> float:
+    """
+    Returns:
+    float: Maximum depth in feet
+    """
+    ...
+
+
+def depth_impl(body_of_water: str) -> float:
+    depth_calls.append(body_of_water)
+    return 930.0
+
+
+class RepairingLLM:
+    """Responds with the broken program first and the fixed one to repair requests."""
+
+    def __init__(self, fixed=FIXED_PROGRAM):
+        self.fixed = fixed
+        self.messages = []
+
+    def __call__(self, system_prompt, message):
+        self.messages.append(message)
+        return self.fixed if message.startswith("The answer_user_question program") else BROKEN_PROGRAM
+
+
+class TestRepairLoop(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App whose only tool counts its calls."""
+        depth_calls.clear()
+        registry = ToolRegistry()
+        registry.tool(implementation=f'{__name__}:depth_impl')(get_depth)
+        self.responder = RepairingLLM()
+        self.app = App(tool_registry=registry)
+        self.app.llm = FakeLLM(self.responder)
+
+    def test_failed_program_is_repaired(self):
+        """Test that the failing code and its traceback are sent back and the fix is run."""
+        self.assertEqual(self.app.answer("how deep is Puget Sound?"), "Depth: 930.0 ft")
+
+        repair_message = self.responder.messages[1]
+        self.assertIn(BROKEN_PROGRAM.strip(), repair_message)
+        self.assertIn("line 3, in answer_user_question", repair_message)
+        self.assertIn("ZeroDivisionError", repair_message)
+        stats = self.app.repair_stats.stats()
+        self.assertEqual((stats['attempts'], stats['repaired'], stats['failed']), (1, 1, 0))
+
+    def test_tool_results_are_reused(self):
+        """Test that the repaired program does not call tools the failed one already called."""
+        self.app.answer("how deep is Puget Sound?")
+
+        self.assertEqual(depth_calls, ['Puget Sound'])
+        self.assertEqual(self.app.repair_stats.stats()['reused_tool_results'], 1)
+
+    def test_repairs_are_bounded(self):
+        """Test that repairs stop after max_repairs attempts."""
+        self.responder.fixed = BROKEN_PROGRAM
+        self.app.max_repairs = 2
+
+        result = self.app.answer("how deep is Puget Sound?")
+
+        self.assertIn("Error executing LLM code: float division by zero", result)
+        self.assertEqual(self.app.llm.calls, 3)
+        stats = self.app.repair_stats.stats()
+        self.assertEqual((stats['attempts'], stats['repaired'], stats['failed']), (2, 0, 1))
+
+    def test_syntax_error_is_repaired(self):
+        """Test that a program that does not compile is repaired too."""
+        self.app.llm = FakeLLM(lambda system_prompt, message: (
+            FIXED_PROGRAM if message.startswith("The answer_user_question program")
+            else "def answer_user_question(question)\n    return 1"))
+
+        self.assertEqual(self.app.answer("how deep is Puget Sound?"), "Depth: 930.0 ft")
+
+    def test_repairs_can_be_disabled(self):
+        """Test that max_repairs=0 returns the error without another generation."""
+        self.app.max_repairs = 0
+        self.assertIn("Error executing LLM code", self.app.answer("how deep is Puget Sound?"))
+        self.assertEqual(self.app.llm.calls, 1)
+
+
+class TestFormatProgramError(unittest.TestCase):
+
+    def test_only_program_frames_are_shown(self):
+        """Test that the traceback is limited to the generated program's own lines."""
+        namespace = {}
+        exec(compile_program("def answer_user_question(question):\n    return {}['missing']\n"), namespace)
+        try:
+            namespace['answer_user_question']("q")
+        except KeyError as e:
+            error = e
+
+        self.assertEqual(format_program_error(error, "def answer_user_question(question):\n    return {}['missing']"),
+                         "line 2, in answer_user_question: return {}['missing']\nKeyError: 'missing'")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Test module for per-stage model routing and escalation.
+"""
+import unittest
+
+from app import App
+from coalescing import RequestCoalescer
+from fake_llm import FakeLLM
+from routing import DIRECT, TOOLS, ModelRouter, classify_question
+from tools.registry import ToolRegistry
+
+FAST = 'fast-model'
+LARGE = 'large-model'
+DIRECT_PROGRAM = "def answer_user_question(question):\n    return 'Jakarta'"
+DEPTH_PROGRAM = "def answer_user_question(question):\n    return f\"{get_depth('Puget Sound'):.0f} ft\""
+BROKEN_PROGRAM = "def answer_user_question(question):\n    return f\"{get_depth('Puget Sound') / 0} ft\""
+REJECTED_PROGRAM = "import os\ndef answer_user_question(question):\n    return os.getcwd()"
+SUMMARY_PROGRAM = "def answer_user_question(question):\n    return call_llm(f\"Depth {get_depth('Puget Sound')}\")"
+
+
+def get_depth(body_of_water: str) -> float:
+    """
+    Maximum depth of a lake, sound or sea.
+
+    Returns:
+    float: Maximum depth in feet
+    """
+    ...
+
+
+def depth_impl(body_of_water: str) -> float:
+    return 930.0
+
+
+def call_llm(prompt: str) -> str:
+    """
+    Returns:
+    str: Model response to the prompt
+    """
+    ...
+
+
+def call_llm_impl(prompt: str) -> str:
+    from llm_client import get_calling_app
+    return get_calling_app().answer_with_prompt(prompt)
+
+
+class TestModelRouting(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App routing between two fake models over a depth tool."""
+        self.registry = ToolRegistry()
+        self.registry.tool(implementation=f'{__name__}:depth_impl')(get_depth)
+        self.registry.tool(implementation=f'{__name__}:call_llm_impl')(call_llm)
+        self.router = ModelRouter([FAST, LARGE], min_samples=3)
+        self.app = App(tool_registry=self.registry, router=self.router)
+        self.fast_program = DEPTH_PROGRAM
+        self.fast = FakeLLM(lambda system_prompt, message: (
+            "fast summary" if message.startswith("Provide answer") else self.fast_program))
+        self.large = FakeLLM(lambda system_prompt, message: (
+            "large summary" if message.startswith("Provide answer") else DEPTH_PROGRAM))
+        self.app.models = {FAST: self.fast, LARGE: self.large}
+
+    def test_questions_are_classified_by_tool_relevance(self):
+        """Test that questions no tool matches are direct and the rest need tools."""
+        self.assertEqual(classify_question("what is the capital of Indonesia?", self.registry), DIRECT)
+        self.assertEqual(classify_question("how deep is Puget Sound?", self.registry), TOOLS)
+
+    def test_generation_starts_on_the_fast_model(self):
+        """Test that a program that runs is generated by the first model only."""
+        self.assertEqual(self.app.answer("how deep is Puget Sound?"), "930 ft")
+        self.assertEqual((self.fast.calls, self.large.calls), (1, 0))
+
+    def test_failed_program_escalates(self):
+        """Test that the repair of a program raising an error goes to the larger model."""
+        self.fast_program = BROKEN_PROGRAM
+
+        self.assertEqual(self.app.answer("how deep is Puget Sound?"), "930 ft")
+        self.assertEqual((self.fast.calls, self.large.calls), (1, 1))
+        stats = self.router.stats()
+        self.assertEqual((stats[FAST]['succeeded'], stats[FAST]['escalated']), (0, 1))
+        self.assertEqual((stats[LARGE]['programs'], stats[LARGE]['success_rate']), (1, 1.0))
+
+    def test_rejected_program_escalates(self):
+        """Test that a program rejected by the static checks is repaired by the larger model."""
+        self.fast_program = REJECTED_PROGRAM
+
+        self.assertEqual(self.app.answer("how deep is Puget Sound?"), "930 ft")
+        self.assertEqual(self.large.calls, 1)
+
+    def test_call_llm_follows_escalation(self):
+        """Test that call_llm uses the fast model, or the larger one once the answer escalated."""
+        self.fast_program = SUMMARY_PROGRAM
+        self.assertEqual(self.app.answer("summarize the depth of Puget Sound"), "fast summary")
+
+        self.fast_program = "def answer_user_question(question):\n    return undefined_helper()"
+        self.large = FakeLLM(lambda system_prompt, message: (
+            "large summary" if message.startswith("Provide answer") else SUMMARY_PROGRAM))
+        self.app.models[LARGE] = self.large
+        self.assertEqual(self.app.answer("summarize the depth of Puget Sound"), "large summary")
+
+    def test_unreliable_model_is_skipped(self):
+        """Test that a route whose first model keeps failing starts on the next one."""
+        for _ in range(3):
+            self.router.record_outcome(FAST, 'generate', TOOLS, False)
+
+        self.assertEqual(self.router.choose('generate', TOOLS), LARGE)
+        self.assertEqual(self.router.choose('generate', DIRECT), FAST)
+        self.app.answer("how deep is Puget Sound?")
+        self.assertEqual((self.fast.calls, self.large.calls), (0, 1))
+
+    def test_coalescing_is_scoped_to_the_routed_model(self):
+        """Test that program generations are only shared between requests routed to the same model."""
+        scopes = []
+
+        class RecordingCoalescer(RequestCoalescer):
+            def program(self, question, system_prompt, generate, scope=None):
+                scopes.append(scope)
+                return super().program(question, system_prompt, generate, scope)
+
+        self.app.coalescer = RecordingCoalescer()
+        self.app.answer("how deep is Puget Sound?")
+        for _ in range(3):
+            self.router.record_outcome(FAST, 'generate', TOOLS, False)
+        self.app.answer("how deep is Puget Sound?")
+
+        self.assertEqual(scopes, [FAST, LARGE])
+        self.assertEqual((self.fast.calls, self.large.calls), (1, 1))
+
+    def test_skipped_model_recovers_through_probes(self):
+        """Test that a skipped model gets probe questions and is used again once they succeed."""
+        self.router.probe_every = 2
+        self.router.window = 3
+        for _ in range(3):
+            self.router.record_outcome(FAST, 'generate', TOOLS, False)
+
+        for _ in range(6):
+            self.assertEqual(self.app.answer("how deep is Puget Sound?"), "930 ft")
+
+        # Every second question probed the fast model; three successes fill its window again
+        self.assertEqual((self.fast.calls, self.large.calls), (3, 3))
+        self.assertEqual(self.router.stats()[FAST]['probes'], 3)
+        self.assertEqual(self.router.choose('generate', TOOLS), FAST)
+
+    def test_configured_routes(self):
+        """Test that routes pick the starting model per stage and question class."""
+        router = ModelRouter([FAST, LARGE], routes={('generate', TOOLS): 1})
+
+        self.assertEqual(router.choose('generate', TOOLS), LARGE)
+        self.assertEqual(router.choose('generate', DIRECT), FAST)
+        self.assertEqual(router.choose('generate', DIRECT, escalation=5), LARGE)
+
+    def test_latency_is_recorded_per_model(self):
+        """Test that every model call is counted with its latency."""
+        self.app.answer("how deep is Puget Sound?")
+
+        stats = self.router.stats()[FAST]
+        self.assertEqual((stats['calls'], stats['errors']), (1, 0))
+        self.assertGreaterEqual(stats['mean_seconds'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Test module for multi-turn sessions.
+"""
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from program_cache import ProgramCache
+from rate_limit import estimate_tokens
+from session import HISTORY_HEADER, Session
+from tools.registry import ToolRegistry
+
+DEPTH_PROGRAM = """def answer_user_question(question):
+    return f"Puget Sound is {get_depth('Puget Sound'):.0f} ft deep."
+"""
+FEET_PROGRAM = """def answer_user_question(question):
+    return f"{get_depth('Puget Sound') * 0.3048:.0f} m"
+"""
+PREVIOUS_RESULT_PROGRAM = """def answer_user_question(question):
+    return str(previous_results["get_depth('Puget Sound')"])
+"""
+depth_calls = []
+
+
+def get_depth(body_of_water: str) -> float:
+    """
+    Returns:
+    float: Maximum depth in feet
+    """
+    ...
+
+
+def depth_impl(body_of_water: str) -> float:
+    depth_calls.append(body_of_water)
+    return 930.0
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App whose only tool counts its calls, answering from a question table."""
+        depth_calls.clear()
+        registry = ToolRegistry()
+        registry.tool(implementation=f'{__name__}:depth_impl')(get_depth)
+        self.app = App(tool_registry=registry)
+        self.messages = []
+        self.programs = {
+            "how deep is Puget Sound?": DEPTH_PROGRAM,
+            "and in meters?": FEET_PROGRAM,
+            "what did you find?": PREVIOUS_RESULT_PROGRAM,
+        }
+
+        def respond(system_prompt, message):
+            self.messages.append((system_prompt, message))
+            return self.programs[message.rsplit('\n', 1)[-1]]
+
+        self.app.llm = FakeLLM(respond)
+        self.session = Session(self.app)
+
+    def test_follow_up_carries_earlier_turns(self):
+        """Test that a follow-up is generated after the earlier question and answer, with the same system prompt."""
+        self.session.answer("how deep is Puget Sound?")
+        self.assertEqual(self.session.answer("and in meters?"), "283 m")
+
+        first_prompt, first_message = self.messages[0]
+        second_prompt, second_message = self.messages[1]
+        self.assertEqual(first_message, "how deep is Puget Sound?")
+        self.assertEqual(second_prompt, first_prompt)
+        self.assertIn(f"{HISTORY_HEADER}\nQ: how deep is Puget Sound?\nA: Puget Sound is 930 ft deep.", second_message)
+        self.assertTrue(second_message.endswith("\n\nand in meters?"))
+
+    def test_tool_results_are_reused_across_turns(self):
+        """Test that a later program calling a tool with the same arguments does not call it again."""
+        self.session.answer("how deep is Puget Sound?")
+        self.session.answer("and in meters?")
+
+        self.assertEqual(depth_calls, ['Puget Sound'])
+        self.assertEqual(self.session.stats()['reused_tool_results'], 1)
+
+    def test_previous_results_in_namespace(self):
+        """Test that programs can read earlier tool results from previous_results."""
+        self.session.answer("how deep is Puget Sound?")
+
+        self.assertEqual(self.session.answer("what did you find?"), "930.0")
+        self.assertIn("""previous_results["get_depth('Puget Sound')"] == 930.0""", self.messages[1][1])
+
+    def test_context_is_trimmed_to_budget(self):
+        """Test that the oldest turns are dropped once the context exceeds the token budget."""
+        self.session = Session(self.app, token_budget=40, remember_tool_results=False)
+        for _ in range(4):
+            self.session.answer("how deep is Puget Sound?")
+
+        stats = self.session.stats()
+        self.assertEqual(stats['turns'], 4)
+        self.assertGreater(stats['trimmed_turns'], 0)
+        self.assertEqual(stats['kept_turns'] + stats['trimmed_turns'], 4)
+        context = self.messages[-1][1].rsplit('\n\n', 1)[0]
+        self.assertLessEqual(estimate_tokens(context), 40 + estimate_tokens(HISTORY_HEADER))
+
+    def test_session_bypasses_program_cache(self):
+        """Test that programs generated from conversation context are not cached by question."""
+        self.app.program_cache = ProgramCache()
+        self.session.answer("how deep is Puget Sound?")
+        self.session.answer("how deep is Puget Sound?")
+
+        self.assertEqual(self.app.llm.calls, 2)
+        self.assertEqual(self.app.program_cache.stats()['size'], 0)
+
+    def test_stateless_answers_are_unaffected(self):
+        """Test that App.answer outside the session sends only the question."""
+        self.session.answer("how deep is Puget Sound?")
+        self.app.answer("and in meters?")
+
+        self.assertEqual(self.messages[-1][1], "and in meters?")
+        self.assertEqual(depth_calls, ['Puget Sound', 'Puget Sound'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Test module for the warm unix-socket server and the CLI client that talks to it.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import main
+import socket_server
+from app import App
+from fake_llm import FakeLLM
+from socket_server import AppServer, ask, serve
+
+ECHO_PROGRAM = """```python
+def answer_user_question(question):
+    return f"You asked: {question}"
+```"""
+
+
+class TestSocketServer(unittest.TestCase):
+
+    def setUp(self):
+        """Start serve() in a thread with an App answering from the fake LLM."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'app.sock')
+        self.app = App()
+        self.app.llm = FakeLLM(lambda system_prompt, message: ECHO_PROGRAM)
+        servers = []
+
+        class RecordingServer(AppServer):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                servers.append(self)
+
+        patcher = mock.patch.object(socket_server, 'AppServer', RecordingServer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.thread = threading.Thread(target=serve, args=(self.socket_path, lambda: self.app), daemon=True)
+            self.thread.start()
+            deadline = time.monotonic() + 5
+            while not servers or not os.path.exists(self.socket_path):
+                self.assertLess(time.monotonic(), deadline, "server did not start")
+                time.sleep(0.01)
+        self.server = servers[0]
+
+    def tearDown(self):
+        """Stop the server and check serve() removed its socket."""
+        self.server.shutdown()
+        self.thread.join(5)
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.directory.cleanup()
+
+    def test_ask_round_trip(self):
+        """Test that ask() streams back the answer of the served App."""
+        answer = ''.join(ask("what should I wear today?", self.socket_path))
+        self.assertEqual(answer, "You asked: what should I wear today?")
+        self.assertEqual(self.app.llm.calls, 1)
+
+    def test_ask_raises_server_error(self):
+        """Test that an error reported by the server is raised by ask()."""
+        self.app.stream_answer = mock.Mock(side_effect=RuntimeError("model unavailable"))
+        with self.assertRaisesRegex(RuntimeError, "model unavailable"):
+            list(ask("what should I wear today?", self.socket_path))
+
+    def test_cli_sends_question_starting_with_dash(self):
+        """Test that the CLI asks the server a question given after --, even one starting with '-'."""
+        argv = ['main', '--socket', self.socket_path, '--', '-5', 'degrees:', 'coat', 'or', '--serve?']
+        output = io.StringIO()
+        with mock.patch.object(sys, 'argv', argv), contextlib.redirect_stdout(output):
+            main.main()
+        # The server thread shares stdout and prints the generated program too
+        self.assertTrue(output.getvalue().endswith("\nAnswer: You asked: -5 degrees: coat or --serve?\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
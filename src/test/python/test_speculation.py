@@ -0,0 +1,132 @@
+"""
+Test module for speculative tool prefetch.
+"""
+import os
+import time
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from speculation import ToolPrefetcher
+from tools.registry import ToolRegistry
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), '..', 'resources', 'bedrock_responses.json')
+TOOL_DELAY = 0.1
+calls = []
+
+
+def get_tide_height(harbor: str) -> float:
+    """
+    Returns:
+    float: Current tide height in feet
+    """
+    ...
+
+
+def get_home_harbor() -> str:
+    """
+    Returns:
+    str: The user's home harbor
+    """
+    ...
+
+
+def tide_height_impl(harbor: str) -> float:
+    calls.append(harbor)
+    time.sleep(TOOL_DELAY)
+    return {'Seattle': 4.5, 'Tacoma': 3.0}[harbor]
+
+
+def home_harbor_impl() -> str:
+    return 'Seattle'
+
+
+def make_registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    registry.tool(implementation=f'{__name__}:tide_height_impl', speculative=True)(get_tide_height)
+    registry.tool(implementation=f'{__name__}:home_harbor_impl', speculative=True)(get_home_harbor)
+    return registry
+
+
+class TestSpeculation(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a prefetcher over a slow tide tool."""
+        calls.clear()
+        self.prefetcher = ToolPrefetcher(make_registry())
+        self.implementation = self.prefetcher.registry.implementation('get_tide_height')
+
+    def test_literal_call_starts_before_program_completes(self):
+        """Test that a call with literal arguments is started once its line is complete."""
+        speculation = self.prefetcher.begin()
+        speculation.feed("def answer_user_question(question):\n    height = get_tide_height(")
+        self.assertEqual(self.prefetcher.stats()['started'], 0)
+        speculation.feed("'Seattle')\n")
+        self.assertEqual(self.prefetcher.stats()['started'], 1)
+
+        tide = speculation.wrap('get_tide_height', self.implementation)
+        self.assertEqual(tide('Seattle'), 4.5)
+        speculation.close()
+
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats['used'], stats['discarded']), (1, 0))
+        self.assertEqual(calls, ['Seattle'])
+
+    def test_runtime_arguments_are_predicted_from_history(self):
+        """Test that a call with variable arguments repeats the tool's last arguments."""
+        self.prefetcher.record_call('get_tide_height', ('Seattle',), {})
+        speculation = self.prefetcher.begin()
+        speculation.feed("    return get_tide_height(get_home_harbor())\n")
+        speculation.finish()
+
+        self.assertEqual(self.prefetcher.stats()['started'], 2)
+        speculation.close()
+
+    def test_wrong_guess_is_discarded(self):
+        """Test that a prefetch with different arguments is never used."""
+        self.prefetcher.record_call('get_tide_height', ('Seattle',), {})
+        speculation = self.prefetcher.begin()
+        speculation.feed("    return get_tide_height(harbor)\n")
+
+        tide = speculation.wrap('get_tide_height', self.implementation)
+        self.assertEqual(tide('Tacoma'), 3.0)
+        speculation.close()
+
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats['used'], stats['discarded']), (0, 1))
+        self.assertEqual(self.prefetcher.history['get_tide_height'], (('Tacoma',), {}))
+
+
+class TestAppSpeculation(unittest.TestCase):
+
+    PROGRAM = ("def answer_user_question(question):\n"
+               "    height = get_tide_height('Seattle')\n"
+               "    harbor = get_home_harbor()\n"
+               "    note = 'and the rest of the program keeps the model busy for a while longer'\n"
+               "    return f'The tide in {harbor} is {height} ft, {note}.'\n")
+
+    def test_prefetch_saves_wall_time(self):
+        """Test that a tool started during generation is not waited for again."""
+        calls.clear()
+        app = App(tool_registry=make_registry(), speculative_tools=True)
+        # Stream the program over 0.3s so the prefetch finishes before the program runs
+        app.llm = FakeLLM({}, default=self.PROGRAM, latency=0.3)
+
+        self.assertEqual(app.answer("how high is the tide?"), "The tide in Seattle is 4.5 ft, and the rest of "
+                                                              "the program keeps the model busy for a while longer.")
+        stats = app.prefetcher.stats()
+        self.assertEqual(calls, ['Seattle'])
+        self.assertEqual(stats['used'], 2)
+        self.assertGreater(stats['saved_seconds'], TOOL_DELAY / 2)
+
+    def test_replayed_fixtures_with_speculation(self):
+        """Test that speculation leaves the weather answers unchanged."""
+        app = App(speculative_tools=True)
+        app.llm = FakeLLM.from_fixtures(FIXTURES_PATH)
+        self.assertIn("Washington", app.answer("what state am I in?"))
+        self.assertIn("°F", app.answer("what is the temperature outside?"))
+        self.assertGreaterEqual(app.prefetcher.stats()['used'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
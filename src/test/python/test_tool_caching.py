@@ -0,0 +1,107 @@
+"""
+Test module for tool result caching.
+"""
+import threading
+import time
+import unittest
+
+from tools import caching, tool_cache_stats
+from tools.caching import cached_tool
+from tools.implementations import weather_tools_impl  # noqa: F401 (registers the weather tool caches)
+
+
+class TestCachedTool(unittest.TestCase):
+
+    def setUp(self):
+        """Remember the registered tool caches so the ones made by a test can be unregistered."""
+        self.registered = dict(caching._tool_caches)
+
+    def tearDown(self):
+        caching._tool_caches.clear()
+        caching._tool_caches.update(self.registered)
+
+    def test_repeated_calls_hit_cache(self):
+        """Test that identical arguments call the tool only once."""
+        calls = []
+
+        @cached_tool(name='test_repeated')
+        def tool(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual(tool(2), 4)
+        self.assertEqual(tool(2), 4)
+        self.assertEqual(calls, [2])
+        self.assertEqual(tool.cache.stats()['hits'], 1)
+
+    def test_ttl_expiry(self):
+        """Test that results are recomputed after the TTL."""
+        calls = []
+
+        @cached_tool(ttl=0.05, name='test_ttl')
+        def tool(x):
+            calls.append(x)
+            return x
+
+        tool(1)
+        time.sleep(0.1)
+        tool(1)
+        self.assertEqual(calls, [1, 1])
+
+    def test_lru_eviction(self):
+        """Test that the least recently used result is evicted at maxsize."""
+        @cached_tool(maxsize=2, name='test_lru')
+        def tool(x):
+            return x
+
+        tool(1)
+        tool(2)
+        tool(1)
+        tool(3)
+        self.assertEqual(tool.cache.stats()['evictions'], 1)
+        tool(1)
+        self.assertEqual(tool.cache.stats()['misses'], 3)
+
+    def test_single_flight(self):
+        """Test that concurrent identical calls share one execution."""
+        calls = []
+
+        @cached_tool(name='test_single_flight')
+        def tool(x):
+            calls.append(x)
+            time.sleep(0.1)
+            return x
+
+        threads = [threading.Thread(target=tool, args=(7,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [7])
+        self.assertEqual(tool.cache.stats()['deduplicated'], 4)
+
+    def test_errors_are_not_cached(self):
+        """Test that a failing call is retried on the next invocation."""
+        attempts = []
+
+        @cached_tool(name='test_errors')
+        def tool(x):
+            attempts.append(x)
+            if len(attempts) == 1:
+                raise ValueError("transient")
+            return x
+
+        with self.assertRaises(ValueError):
+            tool(1)
+        self.assertEqual(tool(1), 1)
+
+    def test_weather_tools_are_registered(self):
+        """Test that the weather tool caches are exposed per tool."""
+        stats = tool_cache_stats()
+        self.assertIn('get_geo_from_county', stats)
+        self.assertIn('get_local_weather', stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Test module for the tool plugin registry.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+
+from tools.interfaces.weather_tools import Weather
+from tools.registry import ToolRegistry, default_implementation, get_tool_registry
+
+
+def get_tide_height(harbor: str) -> float:
+    """
+    Returns:
+    float: Current tide height in feet
+    """
+    ...
+
+
+class Harbor:
+    """Harbor description"""
+
+
+def get_harbor(name: str) -> Harbor:
+    """
+    Returns:
+    Harbor: The named harbor
+    """
+    ...
+
+
+def tide_height_impl(harbor: str) -> float:
+    return 4.5
+
+
+class TestToolRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a registry with tools implemented in this module."""
+        self.registry = ToolRegistry()
+        self.registry.interface_type(Harbor)
+        self.registry.tool(implementation=f'{__name__}:tide_height_impl')(get_tide_height)
+        self.registry.tool(implementation=f'{__name__}:Harbor')(get_harbor)
+
+    def test_weather_tools_are_registered(self):
+        """Test that the interface stubs register the weather tools."""
+        registry = get_tool_registry()
+        self.assertEqual(registry.tool_names(),
+                         ['get_user_location', 'get_geo_from_county', 'get_county_from_geo',
+                          'get_local_weather', 'get_local_weather_many', 'call_llm'])
+        self.assertIs(registry.namespace()['Weather'], Weather)
+
+    def test_registry_does_not_import_implementations(self):
+        """Test that loading the process-wide registry leaves the implementation modules unimported."""
+        # A fresh interpreter, since other tests import the implementations into this one
+        script = ("import sys\n"
+                  "from tools.registry import get_tool_registry\n"
+                  "get_tool_registry().render()\n"
+                  "print(sorted(name for name in sys.modules if name.startswith('tools.implementations')))\n")
+        source_root = os.path.dirname(sys.modules['tools'].__path__[0])
+        output = subprocess.run([sys.executable, '-c', script], cwd=source_root, capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_implementation_is_imported_lazily(self):
+        """Test that an implementation module is only imported when a namespace needs it."""
+        registry = ToolRegistry()
+        registry.tool(implementation='colorsys:rgb_to_hsv')(get_tide_height)
+        sys.modules.pop('colorsys', None)
+
+        self.assertNotIn('colorsys', sys.modules)
+        registry.namespace()
+        self.assertIn('colorsys', sys.modules)
+
+    def test_default_implementation_path(self):
+        """Test the interfaces -> implementations naming convention."""
+        self.assertEqual(default_implementation(get_tool_registry().get('call_llm').stub),
+                         'tools.implementations.weather_tools_impl:call_llm')
+
+    def test_namespace_selection(self):
+        """Test that a selected namespace holds only the chosen tools plus interface classes."""
+        namespace = self.registry.namespace(['get_tide_height'])
+        self.assertEqual(namespace['get_tide_height']('Seattle'), 4.5)
+        self.assertIs(namespace['Harbor'], Harbor)
+        self.assertNotIn('get_harbor', namespace)
+
+    def test_namespaces_are_independent(self):
+        """Test that programs cannot change the shared namespace table."""
+        first = self.registry.namespace()
+        first['get_tide_height'] = None
+        self.assertIsNotNone(self.registry.namespace()['get_tide_height'])
+
+    def test_render_includes_only_mentioned_types(self):
+        """Test that rendering a selection adds the classes its stubs refer to."""
+        tide_only = self.registry.render(['get_tide_height'])
+        harbor = self.registry.render(['get_harbor'])
+
+        self.assertIn("def get_tide_height(harbor: str) -> float:", tide_only)
+        self.assertNotIn("class Harbor", tide_only)
+        self.assertIn("class Harbor", harbor)
+        self.assertLess(harbor.index("class Harbor"), harbor.index("def get_harbor"))
+
+    def test_render_strips_decorators(self):
+        """Test that stubs are rendered without their registration decorator."""
+        prompt = get_tool_registry().render()
+        self.assertNotIn("@tool", prompt)
+        self.assertNotIn("@interface_type", prompt)
+        self.assertIn("def get_local_weather(latitude: float, longitude: float) -> Weather:", prompt)
+
+    def test_async_fallback_runs_sync_implementation(self):
+        """Test that a tool without an async variant is awaitable in async programs."""
+        namespace = self.registry.namespace(asynchronous=True)
+        self.assertEqual(asyncio.run(namespace['get_tide_height']('Seattle')), 4.5)
+
+    def test_async_variant_by_convention(self):
+        """Test that <name>_async implementations are picked up for async programs."""
+        namespace = get_tool_registry().namespace(['get_user_location'], asynchronous=True)
+        self.assertEqual(namespace['get_user_location'].__name__, 'get_user_location_async')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Test module for relevance-based tool selection.
+"""
+import unittest
+
+from app import MORE_TOOLS_NEEDED, App
+from fake_llm import FakeLLM
+from tools.registry import get_tool_registry
+from tools.selection import ToolIndex, expand_requirements, tokenize
+
+LOCATION_PROGRAM = """def answer_user_question(question):
+    county, state = get_user_location()
+    return f"You are in {state}."
+"""
+
+
+class TestToolIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an index over a small tool catalog."""
+        self.index = ToolIndex({
+            'get_stock_price': "get_stock_price ticker symbol share price market",
+            'get_flight_status': "get_flight_status flight number airline departure arrival",
+            'get_local_weather': "get_local_weather temperature rain forecast",
+        })
+
+    def test_tokenize(self):
+        """Test identifier splitting, stopword removal and plural stripping."""
+        self.assertEqual(tokenize("What are the get_local_weathers?"), ['get', 'local', 'weather'])
+
+    def test_rank_prefers_matching_tool(self):
+        """Test that the tool sharing the question's terms ranks first."""
+        self.assertEqual(self.index.select("is my flight departure delayed?", 2)[0], 'get_flight_status')
+        self.assertEqual(self.index.select("share price of ACME", 1), ['get_stock_price'])
+
+    def test_unmatched_question_selects_nothing(self):
+        """Test that tools sharing no term with the question are not returned."""
+        self.assertEqual(self.index.select("capital of Indonesia", 3), [])
+
+    def test_expand_requirements(self):
+        """Test that requirements are added transitively."""
+        requires = {'a': ('b',), 'b': ('c',)}
+        self.assertEqual(expand_requirements(['a'], requires), {'a', 'b', 'c'})
+
+
+class TestRegistrySelection(unittest.TestCase):
+
+    def test_weather_question_selects_tool_chain(self):
+        """Test that the weather tool brings the tools producing its arguments."""
+        selected = get_tool_registry().select("what should I wear today?", 1)
+        self.assertEqual(selected, ['get_user_location', 'get_geo_from_county', 'get_local_weather', 'call_llm'])
+
+    def test_knowledge_question_selects_only_always_included(self):
+        """Test that a question matching no tool only gets call_llm."""
+        self.assertEqual(get_tool_registry().select("what is the capital of Indonesia?", 2), ['call_llm'])
+
+
+class TestAppToolSelection(unittest.TestCase):
+
+    def test_small_catalog_renders_every_tool(self):
+        """Test that selection is skipped while the catalog fits max_prompt_tools."""
+        self.assertIsNone(App().select_tools("what state am I in?"))
+
+    def test_prompt_only_describes_selected_tools(self):
+        """Test that a selected prompt omits unrelated tools and is smaller."""
+        app = App(max_prompt_tools=1)
+        tools = app.select_tools("what state am I in?")
+        prompt = app.prompt_for_tools(tools)
+
+        self.assertEqual(tools, ['get_user_location', 'call_llm'])
+        self.assertNotIn("def get_local_weather", prompt)
+        self.assertNotIn("class Weather", prompt)
+        self.assertIn(MORE_TOOLS_NEEDED, prompt)
+        self.assertLess(len(prompt), len(app.system_prompt))
+
+    def test_fallback_when_program_needs_more_tools(self):
+        """Test that the question is retried with every tool when the program asks for more."""
+        def responder(system_prompt, message):
+            if "def get_user_location" in system_prompt:
+                return LOCATION_PROGRAM
+            return f"def answer_user_question(question):\n    return '{MORE_TOOLS_NEEDED}'"
+
+        app = App(max_prompt_tools=1)
+        app.llm = FakeLLM(responder)
+
+        self.assertEqual(app.answer("how far is the ocean from me?"), "You are in Washington.")
+        self.assertEqual(app.llm.calls, 2)
+
+    def test_fallback_when_program_calls_unlisted_tool(self):
+        """Test that a NameError for a tool the program was not shown triggers the retry."""
+        def responder(system_prompt, message):
+            if "def get_user_location" in system_prompt:
+                return LOCATION_PROGRAM
+            return "def answer_user_question(question):\n    return get_ocean_distance()"
+
+        app = App(max_prompt_tools=1)
+        app.llm = FakeLLM(responder)
+
+        self.assertEqual(app.answer("how far is the ocean from me?"), "You are in Washington.")
+        self.assertEqual(app.llm.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+Test module for the execution-trace store and offline replay.
+"""
+import array
+import os
+import tempfile
+import threading
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from program_cache import ProgramCache
+from tools.interfaces.weather_tools import Weather
+from tools.registry import ToolRegistry
+from trace_store import TraceStore, decode_value, encode_value, replay
+
+CAUGHT_ERROR_PROGRAM = """def answer_user_question(question):
+    try:
+        return str(get_depth('Lake Nowhere'))
+    except ValueError:
+        return 'unknown'
+"""
+DEPTH_PROGRAM = """```python
+def answer_user_question(question):
+    north = get_depth('Puget Sound', unit='ft')
+    south = get_depth('Hood Canal', unit='ft')
+    return f"Puget Sound is {north - south:.0f} ft deeper."
+```"""
+LOCK_PROGRAM = """def answer_user_question(question):
+    with get_lock(question):
+        return 'locked'
+"""
+depth_calls = []
+
+
+def get_depth(body_of_water: str, unit: str = 'ft') -> float:
+    """
+    Returns:
+    float: Maximum depth
+    """
+    ...
+
+
+def depth_impl(body_of_water: str, unit: str = 'ft') -> float:
+    depth_calls.append(body_of_water)
+    if body_of_water not in ('Puget Sound', 'Hood Canal'):
+        raise ValueError(f"unknown body of water: {body_of_water}")
+    return {'Puget Sound': 930.0, 'Hood Canal': 600.0}[body_of_water]
+
+
+def get_lock(name: str) -> object:
+    """
+    Returns:
+    object: A lock for the name
+    """
+    ...
+
+
+def lock_impl(name: str) -> object:
+    return threading.Lock()
+
+
+class TestTraceStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App recording to a temporary store, with one tool that counts its calls."""
+        depth_calls.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = TraceStore(self.directory.name)
+        self.registry = ToolRegistry()
+        self.registry.tool(implementation=f'{__name__}:depth_impl')(get_depth)
+        self.app = App(tool_registry=self.registry, trace_store=self.store)
+        self.app.llm = FakeLLM(lambda system_prompt, message: DEPTH_PROGRAM)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_values_round_trip(self):
+        """Test that tool values keep their types through encoding and JSON."""
+        values = [('King County', 'Washington'), {'a': [1, 2.5]}, Weather(54.0, 20.0),
+                  array.array('d', [1.0, 2.0]), {1, 2}, None]
+        for value in values:
+            with self.subTest(value=value):
+                decoded = decode_value(encode_value(value), allow_pickle=True)
+                self.assertEqual(decoded, value)
+                self.assertIs(type(decoded), type(value))
+
+    def test_pickled_values_need_opt_in(self):
+        """Test that values stored as pickles are not loaded from a trace unless allowed."""
+        with self.assertRaisesRegex(ValueError, "allow_pickle"):
+            decode_value(encode_value({1, 2}))
+        with self.assertRaisesRegex(ValueError, "not a loaded dataclass"):
+            decode_value({'__dataclass__': 'subprocess:Popen', 'fields': {'args': ['true']}})
+
+    def test_answer_is_recorded(self):
+        """Test that an answer appends its question, program, tool calls, answer and timings."""
+        answer = self.app.answer("how much deeper is Puget Sound?")
+
+        [record] = list(self.store.records())
+        self.assertEqual(record['question'], "how much deeper is Puget Sound?")
+        self.assertEqual(record['answer'], answer)
+        self.assertEqual(record['llm_output'], DEPTH_PROGRAM)
+        self.assertTrue(record['source'].startswith('def answer_user_question'))
+        self.assertEqual([(call['tool'], call['args'], call['kwargs'], call['result']) for call in record['calls']],
+                         [('get_depth', ['Puget Sound'], {'__dict__': [['unit', 'ft']]}, 930.0),
+                          ('get_depth', ['Hood Canal'], {'__dict__': [['unit', 'ft']]}, 600.0)])
+        self.assertGreaterEqual(record['timings_ms']['total'], record['timings_ms']['execute'])
+        self.assertIn('generate', record['timings_ms'])
+
+    def test_unencodable_values_do_not_change_the_answer(self):
+        """Test that a tool result that cannot be stored is recorded as a placeholder and the program still runs."""
+        self.registry.tool(implementation=f'{__name__}:lock_impl')(get_lock)
+        self.app.llm = FakeLLM(lambda system_prompt, message: LOCK_PROGRAM)
+        self.assertEqual(self.app.answer("lock it"), 'locked')
+
+        [record] = list(self.store.records())
+        self.assertIn("TypeError", record['calls'][0]['result']['__unencodable__'])
+        report = replay([record], self.registry)
+        [(_, _, answer)] = report.changed
+        self.assertIn("result of get_lock('lock it',) was not recorded", answer)
+
+    def test_cache_hit_records_cached_source(self):
+        """Test that a program served from the cache is recorded with its cleaned source."""
+        self.app.program_cache = ProgramCache()
+        self.app.answer("how much deeper is Puget Sound?")
+        self.app.answer("how much deeper is Puget Sound?")
+
+        first, second = self.store.records()
+        self.assertEqual(self.app.llm.calls, 1)
+        self.assertIsNone(second['llm_output'])
+        self.assertEqual(second['source'], first['source'])
+        self.assertEqual(len(second['calls']), 2)
+
+    def test_segments_roll_and_compress(self):
+        """Test that full segments are gzipped and records are read back in order across restarts."""
+        store = TraceStore(os.path.join(self.directory.name, 'small'), segment_bytes=100)
+        for i in range(3):
+            store.append({'question': f'q{i}', 'padding': 'x' * 100})
+        store.close()
+        reopened = TraceStore(store.directory, segment_bytes=100)
+        reopened.append({'question': 'q3'})
+        reopened.close()
+
+        self.assertEqual(sorted(os.listdir(store.directory)),
+                         ['traces-000001.jsonl.gz', 'traces-000002.jsonl.gz', 'traces-000003.jsonl.gz',
+                          'traces-000004.jsonl'])
+        self.assertEqual([record['question'] for record in reopened.records()], ['q0', 'q1', 'q2', 'q3'])
+
+    def test_replay_uses_recorded_tool_results(self):
+        """Test that replay reproduces recorded answers without calling the tools or the model."""
+        self.app.answer("how much deeper is Puget Sound?")
+        depth_calls.clear()
+
+        report = replay(self.store.records(), self.registry)
+
+        self.assertEqual(report.stats()['replayed'], 1)
+        self.assertEqual((report.matched, report.changed), (1, []))
+        self.assertEqual(depth_calls, [])
+        self.assertEqual(self.app.llm.calls, 1)
+
+    def test_replay_raises_recorded_exception_type(self):
+        """Test that a tool error caught by the program replays as the same exception type."""
+        self.app.llm = FakeLLM(lambda system_prompt, message: CAUGHT_ERROR_PROGRAM)
+        self.assertEqual(self.app.answer("how deep is Lake Nowhere?"), 'unknown')
+
+        [record] = list(self.store.records())
+        self.assertEqual((record['calls'][0]['error_type'], record['calls'][0]['error']),
+                         ('builtins:ValueError', 'unknown body of water: Lake Nowhere'))
+        report = replay([record], self.registry)
+        self.assertEqual((report.matched, report.changed), (1, []))
+
+    def test_replay_reports_changed_answers(self):
+        """Test that a changed answer or an unrecorded tool call is reported, and records without a program skipped."""
+        self.app.answer("how much deeper is Puget Sound?")
+        record = next(self.store.records())
+        unrecorded = dict(record, llm_output=DEPTH_PROGRAM.replace('Hood Canal', 'Lake Chelan'))
+
+        report = replay([record, unrecorded, dict(record, llm_output=None, source=None)], self.registry,
+                        execute=lambda llm_output, question, namespace: 'different')
+
+        self.assertEqual((report.replayed, report.matched, report.skipped), (2, 0, 1))
+        report = replay([unrecorded], self.registry)
+        [(_, _, answer)] = report.changed
+        self.assertIn("no recorded result for get_depth('Lake Chelan',)", answer)
+
+
+if __name__ == '__main__':
+    unittest.main()
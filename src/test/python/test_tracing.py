@@ -0,0 +1,96 @@
+"""
+Test module for per-stage tracing.
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from app import App
+from fake_llm import FakeLLM
+from tracing import ChromeTraceExporter, InMemoryExporter, JsonLinesExporter, Tracer, iter_tree
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), '..', 'resources', 'bedrock_responses.json')
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an App replaying the fixtures with an in-memory trace."""
+        self.exporter = InMemoryExporter()
+        self.app = App(tracer=Tracer([self.exporter]))
+        self.app.llm = FakeLLM.from_fixtures(FIXTURES_PATH)
+
+    def test_stages_nest_under_answer(self):
+        """Test that every stage and tool call is a descendant of the answer span."""
+        self.app.answer("what should I wear today?")
+        answer, = self.exporter.find('answer')
+        by_id = {span.span_id: span for span in self.exporter.spans}
+        for name in ('llm.generate', 'clean', 'compile', 'execute',
+                     'tool.get_user_location', 'tool.get_local_weather', 'tool.call_llm'):
+            spans = self.exporter.find(name)
+            self.assertTrue(spans, name)
+            self.assertEqual(spans[0].trace_id, answer.trace_id, name)
+
+        # The generation made by call_llm is nested under its tool span
+        nested = [span for span in self.exporter.find('llm.generate')
+                  if by_id[span.parent_id].name == 'tool.call_llm']
+        self.assertEqual(len(nested), 1)
+
+    def test_generation_records_token_usage(self):
+        """Test that llm.generate spans carry the response token counts."""
+        self.app.answer("what state am I in?")
+        generate, = self.exporter.find('llm.generate')
+        self.assertGreater(generate.attributes['input_tokens'], 0)
+        self.assertGreater(generate.attributes['output_tokens'], 0)
+
+    def test_failed_stage_records_error(self):
+        """Test that an exception inside a span is recorded on it."""
+        self.app.max_repairs = 0
+        self.app.llm = FakeLLM({}, default="```python\ndef answer_user_question(question):\n    return 1 / 0\n```")
+        self.assertIn("division by zero", self.app.answer("anything"))
+        execute, = self.exporter.find('execute')
+        self.assertIn("ZeroDivisionError", execute.attributes['error'])
+
+    def test_profile_generated_code(self):
+        """Test that the execute span carries a profile when requested."""
+        self.app.tracer.profile_generated_code = True
+        self.app.answer("what state am I in?")
+        execute, = self.exporter.find('execute')
+        if 'profile' not in execute.attributes:
+            self.skipTest("another profiler is active")
+        self.assertIn("answer_user_question", execute.attributes['profile'])
+
+    def test_iter_tree_orders_children_after_parents(self):
+        """Test that iter_tree puts the answer span first at depth zero."""
+        self.app.answer("what state am I in?")
+        tree = list(iter_tree(self.exporter.spans))
+        self.assertEqual((tree[0][0], tree[0][1].name), (0, 'answer'))
+        self.assertEqual(len(tree), len(self.exporter.spans))
+
+
+class TestExporters(unittest.TestCase):
+
+    def test_json_lines_and_chrome_trace(self):
+        """Test that the file exporters write one record per span."""
+        with tempfile.TemporaryDirectory() as directory:
+            jsonl_path = os.path.join(directory, 'trace.jsonl')
+            chrome_path = os.path.join(directory, 'trace.json')
+            tracer = Tracer([JsonLinesExporter(jsonl_path), ChromeTraceExporter(chrome_path)])
+            with tracer.span('outer'):
+                with tracer.span('inner', detail=1):
+                    pass
+            tracer.close()
+
+            with open(jsonl_path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([record['name'] for record in records], ['inner', 'outer'])
+            self.assertEqual(records[0]['parent_id'], records[1]['span_id'])
+
+            with open(chrome_path, 'r', encoding='utf-8') as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual({event['name'] for event in events}, {'inner', 'outer'})
+
+
+if __name__ == '__main__':
+    unittest.main()
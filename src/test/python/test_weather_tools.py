@@ -0,0 +1,106 @@
+"""
+Test module for the weather tool records and bulk weather lookup.
+"""
+import asyncio
+import dataclasses
+import pickle
+import threading
+import unittest
+from array import array
+from unittest import mock
+
+from tools.implementations import weather_tools_impl
+from tools.implementations.weather_tools_impl import get_local_weather, get_local_weather_many
+from tools.interfaces.weather_tools import Weather, WeatherColumns
+from tools.registry import get_tool_registry
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+
+class TestWeather(unittest.TestCase):
+
+    def test_weather_is_compact_and_read_only(self):
+        """Test that Weather has no per-instance dict and cannot be modified."""
+        weather = Weather(71.5, 20.0)
+
+        self.assertFalse(hasattr(weather, '__dict__'))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            weather.temperature_fahrenheit = 80.0
+        self.assertEqual(pickle.loads(pickle.dumps(weather)), weather)
+
+    def test_weather_columns_index_to_weather(self):
+        """Test that a row of the columnar result is a Weather record."""
+        columns = WeatherColumns(array('d', [50.0, 60.0]), array('d', [10.0, 90.0]))
+
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns[1], Weather(60.0, 90.0))
+        self.assertEqual(list(columns), [Weather(50.0, 10.0), Weather(60.0, 90.0)])
+
+
+class TestAsyncTools(unittest.TestCase):
+
+    def test_blocking_tool_does_not_stall_the_event_loop(self):
+        """Test that an async tool runs its sync implementation off the event loop."""
+        release = threading.Event()
+
+        def blocking_weather(latitude, longitude):
+            # Only released by the event loop, so this times out if it runs on the loop
+            if not release.wait(5):
+                raise TimeoutError("event loop was blocked")
+            return Weather(50.0, 10.0)
+
+        async def scenario():
+            task = asyncio.ensure_future(weather_tools_impl.get_local_weather_async(47.6, -122.3))
+            await asyncio.sleep(0)
+            release.set()
+            return await task
+
+        with mock.patch.object(weather_tools_impl, 'get_local_weather', side_effect=blocking_weather):
+            self.assertEqual(asyncio.run(scenario()), Weather(50.0, 10.0))
+
+
+class TestGetLocalWeatherMany(unittest.TestCase):
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_arrays_give_array_columns(self):
+        """Test that N points are answered with float arrays of length N in the per-point ranges."""
+        latitudes = numpy.linspace(25.0, 49.0, 1000)
+        columns = get_local_weather_many(latitudes, numpy.full(1000, -100.0))
+
+        self.assertIsInstance(columns.temperature_fahrenheit, numpy.ndarray)
+        self.assertEqual(columns.temperature_fahrenheit.shape, (1000,))
+        self.assertTrue(((columns.temperature_fahrenheit >= 14.0) & (columns.temperature_fahrenheit <= 104.0)).all())
+        self.assertTrue(((columns.precipitation_chance_percent >= 0.0)
+                         & (columns.precipitation_chance_percent <= 100.0)).all())
+
+    def test_without_numpy(self):
+        """Test that plain sequences are answered with array('d') columns when NumPy is missing."""
+        with mock.patch.object(weather_tools_impl, '_numpy', return_value=None):
+            columns = get_local_weather_many([47.6, 34.1], (-122.3, -118.2))
+
+        self.assertIsInstance(columns.temperature_fahrenheit, array)
+        self.assertEqual(len(columns), 2)
+        self.assertIsInstance(columns[0], Weather)
+
+    def test_mismatched_lengths(self):
+        """Test that coordinates of different lengths are rejected."""
+        with self.assertRaises(ValueError):
+            get_local_weather_many([47.6, 34.1], [-122.3])
+
+    def test_matches_per_point_record_type(self):
+        """Test that bulk and per-point lookups return the same record type per point."""
+        self.assertIs(type(get_local_weather_many([47.6], [-122.3])[0]), type(get_local_weather(47.6, -122.3)))
+
+    def test_bulk_tool_is_rendered_with_its_result_type(self):
+        """Test that selecting the bulk tool puts WeatherColumns into the prompt."""
+        prompt = get_tool_registry().render(['get_local_weather_many'])
+
+        self.assertIn("class WeatherColumns", prompt)
+        self.assertIn("def get_local_weather_many", prompt)
+
+
+if __name__ == '__main__':
+    unittest.main()